@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- in-memory semantic answer cache for serving.
+
+Prospects ask near-identical questions ("what does MW cost?", "what is
+the pricing model?"), so assistant_server.py checks this cache before
+calling the backend:
+
+  1. Exact tier (before retrieval): the question normalized to lower-case
+     alphanumeric words, plus k and token budget, is a dict key. A hit
+     costs a few microseconds.
+  2. Semantic tier (after retrieval): an earlier answer is reused when its
+     retrieval signature (the set of retrieved chunk ids) has Jaccard
+     similarity >= signature_threshold with this question's, and the
+     question terms overlap by >= text_threshold. Candidates are found
+     through a chunk id -> entries inverted map, not a full scan.
+
+Entries are keyed by canon version: the SHA-256 of
+verification/master-index.json, optionally combined with the retrieval
+index signature so edits to documents outside the master index count too.
+CanonVersion re-hashes only when the file's size or mtime changes; any
+version change clears the cache. Size is bounded with LRU eviction.
+
+Python 3.8+ compatible, standard library only.
+"""
+
+import collections
+import hashlib
+import os
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from canon_text import SCRIPT_DIR, TOKEN_RE, tokenize
+
+MASTER_INDEX = os.path.join(SCRIPT_DIR, "verification", "master-index.json")
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_SIGNATURE_THRESHOLD = 0.8
+DEFAULT_TEXT_THRESHOLD = 0.5
+
+
+def normalize_text(text):
+    # type: (str) -> str
+    """Lower-case alphanumeric words joined by single spaces."""
+    return " ".join(TOKEN_RE.findall((text or "").lower()))
+
+
+def jaccard(a, b):
+    # type: (Set, Set) -> float
+    if not a and not b:
+        return 1.0
+    return float(len(a & b)) / len(a | b)
+
+
+class CanonVersion(object):
+    """Callable returning the current canon version string.
+
+    The master index is re-hashed only when its (size, mtime) changes, so
+    calling this on every request costs one stat().
+    """
+
+    def __init__(self, path=MASTER_INDEX, extra=""):
+        # type: (str, str) -> None
+        self.path = path
+        self.extra = extra
+        self._stat = None  # type: Optional[Tuple[int, int]]
+        self._version = ""
+
+    def __call__(self):
+        # type: () -> str
+        try:
+            st = os.stat(self.path)
+            stat = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            stat = (-1, -1)
+        if stat != self._stat:
+            h = hashlib.sha256()
+            if stat[0] >= 0:
+                with open(self.path, "rb") as f:
+                    h.update(f.read())
+            self._stat = stat
+            self._version = h.hexdigest()
+        return "%s:%s" % (self._version, self.extra) if self.extra else self._version
+
+
+class SemanticAnswerCache(object):
+    """Bounded LRU answer cache with exact and retrieval-signature lookup."""
+
+    def __init__(self, version_fn=None, max_entries=DEFAULT_MAX_ENTRIES,
+                 signature_threshold=DEFAULT_SIGNATURE_THRESHOLD,
+                 text_threshold=DEFAULT_TEXT_THRESHOLD):
+        # type: (Optional[Callable[[], str]], int, float, float) -> None
+        self.version_fn = version_fn or CanonVersion()
+        self.max_entries = max_entries
+        self.signature_threshold = signature_threshold
+        self.text_threshold = text_threshold
+        self.version = None  # type: Optional[str]
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0,
+                      "evictions": 0, "invalidations": 0}
+        self._entries = collections.OrderedDict()  # type: collections.OrderedDict
+        self._by_chunk = {}  # type: Dict[str, Set[Tuple]]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _check_version(self):
+        # type: () -> None
+        version = self.version_fn()
+        if version != self.version:
+            if self._entries:
+                self.stats["invalidations"] += 1
+            self.clear()
+            self.version = version
+
+    def clear(self):
+        # type: () -> None
+        self._entries.clear()
+        self._by_chunk.clear()
+
+    @staticmethod
+    def _key(question, k, token_budget):
+        # type: (str, int, int) -> Tuple[str, int, int]
+        return (normalize_text(question), k, token_budget)
+
+    def lookup_exact(self, question, k, token_budget):
+        # type: (str, int, int) -> Optional[Dict[str, Any]]
+        """Exact-tier lookup; does not count a miss (the semantic tier may hit)."""
+        self._check_version()
+        key = self._key(question, k, token_budget)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self.stats["exact_hits"] += 1
+        return entry
+
+    def lookup_semantic(self, question, chunk_ids, k, token_budget):
+        # type: (str, Iterable[str], int, int) -> Optional[Dict[str, Any]]
+        self._check_version()
+        signature = frozenset(chunk_ids)
+        terms = set(tokenize(question))
+        candidates = set()  # type: Set[Tuple]
+        for chunk_id in signature:
+            candidates.update(self._by_chunk.get(chunk_id, ()))
+        best = None
+        best_score = 0.0
+        for key in candidates:
+            if key[1:] != (k, token_budget):
+                continue
+            entry = self._entries[key]
+            sig_score = jaccard(signature, entry["signature"])
+            if sig_score < self.signature_threshold:
+                continue
+            if jaccard(terms, entry["terms"]) < self.text_threshold:
+                continue
+            if sig_score > best_score:
+                best, best_score = key, sig_score
+        if best is None:
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(best)
+        self.stats["semantic_hits"] += 1
+        return self._entries[best]
+
+    def put(self, question, chunk_ids, k, token_budget, answer, **extra):
+        # type: (str, Iterable[str], int, int, str, Any) -> None
+        self._check_version()
+        key = self._key(question, k, token_budget)
+        if key in self._entries:
+            self._drop(key)
+        entry = dict(extra)
+        entry.update({
+            "question": question,
+            "answer": answer,
+            "signature": frozenset(chunk_ids),
+            "terms": set(tokenize(question)),
+        })
+        self._entries[key] = entry
+        for chunk_id in entry["signature"]:
+            self._by_chunk.setdefault(chunk_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    def _drop(self, key):
+        # type: (Tuple) -> None
+        entry = self._entries.pop(key)
+        for chunk_id in entry["signature"]:
+            keys = self._by_chunk.get(chunk_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_chunk[chunk_id]
+
+    def hit_ratio(self):
+        # type: () -> float
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        total = hits + self.stats["misses"]
+        return float(hits) / total if total else 0.0
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- answer-generation backends.
+
+A backend turns (system prompt, question, retrieved chunks) into an
+answer, whole (generate) or as a stream of text deltas (stream). Both
+calls are blocking; async callers run them in a thread pool.
+
+  offline    Deterministic stand-in that answers from the retrieved chunks
+             without any network call. Optional simulated latency makes it
+             usable for load tests.
+  anthropic  Claude Messages API, same settings as anthropic_migrate.py.
+  azure      Azure OpenAI chat completions on a deployment (AZURE_OPENAI_KEY,
+             AZURE_OPENAI_ENDPOINT).
+  ollama     Self-hosted model behind Ollama's /api/chat (standard library
+             HTTP, no SDK).
+
+Python 3.8+ compatible. The anthropic backend needs: pip install anthropic;
+azure needs: pip install openai
+"""
+
+import json
+import os
+import re
+import time
+from typing import Dict, Iterator, List, Optional
+from urllib.request import Request, urlopen
+
+DEFAULT_ANTHROPIC_MODEL = "claude-sonnet-4-5-20250929"
+DEFAULT_MAX_TOKENS = 4096
+DEFAULT_AZURE_API_VERSION = "2024-05-01-preview"
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+DEFAULT_OLLAMA_MODEL = "llama3.1:70b"
+SENTENCE_RE = re.compile(r"(.+?[.!?])(?:\s|$)", re.S)
+
+
+class OfflineBackend(object):
+    """Answers "Per DOC-xxx (section): <first sentence>" for each chunk."""
+
+    name = "offline"
+    model = "offline-extractive"
+
+    def __init__(self, latency=0.0, delta_chars=48):
+        # type: (float, int) -> None
+        self.latency = latency
+        self.delta_chars = delta_chars
+
+    def _compose(self, question, chunks):
+        # type: (str, List[Dict]) -> str
+        if not chunks:
+            return ("The canonical documents do not address this specific topic. "
+                    "Please rephrase the question or name the relevant document.")
+        lines = []
+        for chunk in chunks:
+            body = " ".join(chunk["text"].split()[:80])
+            match = SENTENCE_RE.match(body)
+            lines.append("Per %s (%s): %s" % (
+                chunk["doc_id"], chunk["section"] or "preamble",
+                match.group(1) if match else body))
+        return "\n".join(lines)
+
+    def stream(self, system, question, chunks):
+        # type: (str, str, List[Dict]) -> Iterator[str]
+        answer = self._compose(question, chunks)
+        pieces = [answer[i:i + self.delta_chars]
+                  for i in range(0, len(answer), self.delta_chars)] or [""]
+        for piece in pieces:
+            if self.latency:
+                time.sleep(self.latency / len(pieces))
+            yield piece
+
+    def generate(self, system, question, chunks):
+        # type: (str, str, List[Dict]) -> str
+        return "".join(self.stream(system, question, chunks))
+
+
+class AnthropicBackend(object):
+    """Claude Messages API; retrieved chunks are already in the system prompt."""
+
+    name = "anthropic"
+
+    def __init__(self, model=DEFAULT_ANTHROPIC_MODEL, max_tokens=DEFAULT_MAX_TOKENS, client=None):
+        # type: (str, int, object) -> None
+        if client is None:
+            from anthropic import Anthropic
+            client = Anthropic()  # Uses ANTHROPIC_API_KEY env var
+        self.client = client
+        self.model = model
+        self.max_tokens = max_tokens
+
+    def generate(self, system, question, chunks):
+        # type: (str, str, List[Dict]) -> str
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            temperature=0,
+            system=system,
+            messages=[{"role": "user", "content": question}],
+        )
+        return response.content[0].text
+
+    def stream(self, system, question, chunks):
+        # type: (str, str, List[Dict]) -> Iterator[str]
+        with self.client.messages.stream(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            temperature=0,
+            system=system,
+            messages=[{"role": "user", "content": question}],
+        ) as stream:
+            for text in stream.text_stream:
+                yield text
+
+
+class AzureOpenAIBackend(object):
+    """Azure OpenAI chat completions; the deployment name is the model."""
+
+    name = "azure"
+
+    def __init__(self, deployment="mw-knowledge-assistant", api_version=DEFAULT_AZURE_API_VERSION,
+                 max_tokens=DEFAULT_MAX_TOKENS, client=None):
+        # type: (str, str, int, object) -> None
+        if client is None:
+            from openai import AzureOpenAI
+            client = AzureOpenAI(api_key=os.environ.get("AZURE_OPENAI_KEY"),
+                                 azure_endpoint=os.environ.get("AZURE_OPENAI_ENDPOINT", ""),
+                                 api_version=api_version)
+        self.client = client
+        self.model = deployment
+        self.max_tokens = max_tokens
+
+    def _messages(self, system, question):
+        # type: (str, str) -> List[Dict[str, str]]
+        return [{"role": "system", "content": system}, {"role": "user", "content": question}]
+
+    def generate(self, system, question, chunks):
+        # type: (str, str, List[Dict]) -> str
+        response = self.client.chat.completions.create(
+            model=self.model, max_tokens=self.max_tokens, temperature=0,
+            messages=self._messages(system, question))
+        return response.choices[0].message.content or ""
+
+    def stream(self, system, question, chunks):
+        # type: (str, str, List[Dict]) -> Iterator[str]
+        for event in self.client.chat.completions.create(
+                model=self.model, max_tokens=self.max_tokens, temperature=0,
+                messages=self._messages(system, question), stream=True):
+            if event.choices and event.choices[0].delta.content:
+                yield event.choices[0].delta.content
+
+
+class OllamaBackend(object):
+    """Ollama /api/chat over plain HTTP; streams newline-delimited JSON."""
+
+    name = "ollama"
+
+    def __init__(self, model=DEFAULT_OLLAMA_MODEL, url=None, timeout=300.0):
+        # type: (str, Optional[str], float) -> None
+        self.model = model
+        self.url = (url or os.environ.get("OLLAMA_URL", DEFAULT_OLLAMA_URL)).rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, system, question, stream):
+        # type: (str, str, bool) -> Request
+        body = {"model": self.model, "stream": stream, "options": {"temperature": 0},
+                "messages": [{"role": "system", "content": system},
+                             {"role": "user", "content": question}]}
+        return Request(self.url + "/api/chat", data=json.dumps(body).encode("utf-8"),
+                       headers={"Content-Type": "application/json"})
+
+    def generate(self, system, question, chunks):
+        # type: (str, str, List[Dict]) -> str
+        with urlopen(self._request(system, question, False), timeout=self.timeout) as response:
+            return json.loads(response.read().decode("utf-8"))["message"]["content"]
+
+    def stream(self, system, question, chunks):
+        # type: (str, str, List[Dict]) -> Iterator[str]
+        with urlopen(self._request(system, question, True), timeout=self.timeout) as response:
+            for line in response:
+                if not line.strip():
+                    continue
+                event = json.loads(line.decode("utf-8"))
+                if event.get("message", {}).get("content"):
+                    yield event["message"]["content"]
+                if event.get("done"):
+                    break
+
+
+BACKENDS = {
+    "offline": OfflineBackend,
+    "anthropic": AnthropicBackend,
+    "azure": AzureOpenAIBackend,
+    "ollama": OllamaBackend,
+}
+
+
+def load_backend(name, **kwargs):
+    # type: (str, object) -> object
+    if name not in BACKENDS:
+        raise ValueError("Unknown backend %r (choose from %s)" % (name, ", ".join(sorted(BACKENDS))))
+    return BACKENDS[name](**kwargs)
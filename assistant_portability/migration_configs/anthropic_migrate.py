@@ -2,42 +2,52 @@
 """
 MW Knowledge Assistant -- Anthropic Claude Migration Script
 Run this to deploy the assistant on Anthropic's API.
-Prerequisites: pip install anthropic chromadb
+Prerequisites: pip install anthropic
+
+Each question is answered with retrieval-augmented context: the top-k
+canon chunks from the local BM25 index (canon_bm25.py), deduplicated and
+capped at a token budget, instead of the full FAQ on every call.
+Tune with MW_RAG_TOP_K / MW_RAG_TOKEN_BUDGET or the ask_assistant() args.
+Run from the repository root.
+
+Generated by build_migration_configs.py from migration_platforms/anthropic.json;
+edit the template in migration_platforms/templates/, not this file.
 """
 
 import json
 import os
-import glob
+import sys
 from anthropic import Anthropic
 
-# Load extracted state
-with open("assistant_portability/assistant_config.json") as f:
-    config = json.load(f)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from canon_bm25 import load_or_build
+from canon_rag import DEFAULT_TOKEN_BUDGET, DEFAULT_TOP_K, build_system_prompt, select_context
+from migration_generator import resolve_instructions
 
-# Load FAQ supplement
-faq_content = ""
-faq_files = glob.glob("assistant_portability/vector_store_files/*.txt") + \
-            glob.glob("assistant_portability/vector_store_files/*.md") + \
-            glob.glob("outreach/MW-PROSPECT-FAQ-SUPPLEMENT.txt")
-for faq_path in faq_files:
-    if os.path.exists(faq_path) and "FAQ" in faq_path.upper():
-        with open(faq_path) as f:
-            faq_content += f"\n\n--- {os.path.basename(faq_path)} ---\n" + f.read()
+RAG_TOP_K = int(os.environ.get("MW_RAG_TOP_K", DEFAULT_TOP_K))
+RAG_TOKEN_BUDGET = int(os.environ.get("MW_RAG_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+
+# Load the platform config; the instructions are referenced by content hash
+CONFIG_DIR = "assistant_portability/migration_configs"
+with open(os.path.join(CONFIG_DIR, "anthropic_config.json")) as f:
+    config = json.load(f)
+instructions = resolve_instructions(config["system"], CONFIG_DIR)
 
-# Build system prompt
-system_prompt = config["instructions"] + "\n\n## SUPPLEMENTARY FAQ\n" + faq_content
+# Local retrieval index (rebuilt automatically if the canon changed)
+index = load_or_build()
 
 # Initialize client
 client = Anthropic()  # Uses ANTHROPIC_API_KEY env var
 
 
-def ask_assistant(question: str) -> str:
+def ask_assistant(question: str, k: int = RAG_TOP_K, token_budget: int = RAG_TOKEN_BUDGET) -> str:
     """Send a prospect question to the MW Knowledge Assistant (Claude version)."""
+    chunks = select_context(index, question, k=k, token_budget=token_budget)
     response = client.messages.create(
         model="claude-sonnet-4-5-20250929",
         max_tokens=4096,
         temperature=0,
-        system=system_prompt,
+        system=build_system_prompt(instructions, chunks),
         messages=[{"role": "user", "content": question}]
     )
     return response.content[0].text
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- local serving stub for Azure OpenAI Service.
+
+Serves the assistant on http://127.0.0.1:8767 through assistant_server.py
+with the azure backend, using the backend settings and the hashed
+instructions referenced by azure_config.json. Extra arguments are passed on to
+assistant_server.py and override these defaults.
+
+Generated by build_migration_configs.py from migration_platforms/azure.json;
+do not edit.
+
+Usage:
+    python assistant_portability/migration_configs/serve_azure.py
+    python assistant_portability/migration_configs/serve_azure.py --retriever hybrid
+"""
+
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import assistant_server  # noqa: E402
+
+if __name__ == "__main__":
+    sys.argv[1:1] = ["--backend", "azure", "--port", "8767",
+                     "--platform-config", os.path.join(HERE, "azure_config.json")]
+    assistant_server.main()
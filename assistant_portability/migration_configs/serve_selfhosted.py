@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- local serving stub for Self-Hosted (Ollama + local NumPy index).
+
+Serves the assistant on http://127.0.0.1:8768 through assistant_server.py
+with the ollama backend, using the backend settings and the hashed
+instructions referenced by selfhosted_config.json. Extra arguments are passed on to
+assistant_server.py and override these defaults.
+
+Generated by build_migration_configs.py from migration_platforms/selfhosted.json;
+do not edit.
+
+Usage:
+    python assistant_portability/migration_configs/serve_selfhosted.py
+    python assistant_portability/migration_configs/serve_selfhosted.py --retriever hybrid
+"""
+
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import assistant_server  # noqa: E402
+
+if __name__ == "__main__":
+    sys.argv[1:1] = ["--backend", "ollama", "--port", "8768",
+                     "--platform-config", os.path.join(HERE, "selfhosted_config.json")]
+    assistant_server.main()
@@ -0,0 +1,703 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- local HTTP serving mode.
+
+An asyncio HTTP/1.1 server around the retrieval-augmented ask_assistant
+flow (canon_rag.py + a backend from assistant_backends.py):
+
+  POST /ask       {"question": "...", "stream": false, "k": 6,
+                   "token_budget": 1500, "persona": "cfo"}
+                  -> {"answer", "backend", "chunks", "cache", "citations",
+                      "retrieval_ms", "elapsed_ms"}
+                  With "stream": true the answer is sent as server-sent
+                  events: data: {"delta": "..."} ... data: {"done": true, ...}
+  GET  /health    Liveness plus index size, backend and in-flight count
+  GET  /metrics   Prometheus text: latency summary, error ratio, throughput
+                  (qa_metrics.py) plus in-flight/rejected/batching counters
+
+Per-client concurrency: each client (X-Client-Id header, else the peer
+address) may have at most --per-client requests in flight; extra requests
+get 429 with Retry-After instead of queueing behind the others.
+
+Answer cache: repeated and near-identical questions are answered from
+answer_cache.SemanticAnswerCache (exact normalized text before retrieval,
+retrieval-signature similarity after it), keyed by the master-index hash
+and the retrieval index signature; --answer-cache-size 0 disables it.
+
+Citations: every DOC-NNN / section reference in an answer is resolved
+through citation_index.py; "citations" lists each with its status and a
+path#L<line> link so clients can render them as links.
+
+Micro-batching: retrieval lookups from concurrent requests are collected
+for up to --batch-wait-ms (or --max-batch requests) and resolved in one
+thread-pool call via canon_rag.select_context_batch(), which scores the
+whole batch in one matrix product when the dense index is used.
+
+Usage:
+    python assistant_server.py                            # Offline backend on 127.0.0.1:8765
+    python assistant_server.py --backend anthropic --port 9000
+    python assistant_server.py --retriever dense          # canon_dense.py index
+    python assistant_server.py --retriever hybrid --reranker terms  # canon_hybrid.py
+    python assistant_server.py --platform-config assistant_portability/migration_configs/azure_config.json
+    python assistant_server.py --load-test 400 --concurrency 32 [--stream]
+
+--platform-config serves with the backend, backend options and instructions
+of a config generated by build_migration_configs.py (the serve_<platform>.py
+stubs next to those configs pass it).
+
+--load-test starts the server in-process with the offline backend
+(--latency simulates model time), replays qa_data/questions.jsonl against
+it, and prints the latency/throughput table from qa_metrics.py.
+
+Python 3.8+ compatible, standard library only (plus the chosen backend).
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from answer_cache import CanonVersion, SemanticAnswerCache
+from assistant_backends import load_backend
+from canon_hybrid import add_hybrid_args, hybrid_options
+from canon_rag import (DEFAULT_TOKEN_BUDGET, DEFAULT_TOP_K, build_system_prompt,
+                       load_instructions, select_context_batch)
+from citation_index import CitationIndex, load_or_build_citations
+from qa_metrics import build_metrics_report, print_metrics_report, render_prometheus
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_PER_CLIENT = 4
+DEFAULT_MAX_BATCH = 16
+DEFAULT_BATCH_WAIT_MS = 5.0
+DEFAULT_WORKERS = 32
+MAX_BODY_BYTES = 64 * 1024
+HISTORY_SIZE = 10000
+METRICS_PREFIX = "mw_assistant"
+CACHE_BACKEND = "answer-cache"
+CACHE_HITS = ("exact", "semantic")
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        # type: (int, str) -> None
+        Exception.__init__(self, message)
+        self.status = status
+
+
+# ═══════════════════════════════════════════════════════════════
+# RETRIEVAL MICRO-BATCHING
+# ═══════════════════════════════════════════════════════════════
+
+class RetrievalBatcher(object):
+    """Collects concurrent lookups and resolves them in one executor call."""
+
+    def __init__(self, index, executor, max_batch=DEFAULT_MAX_BATCH,
+                 max_wait=DEFAULT_BATCH_WAIT_MS / 1000.0):
+        # type: (Any, ThreadPoolExecutor, int, float) -> None
+        self.index = index
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.lookups = 0
+        self._queue = None  # type: Optional[asyncio.Queue]
+        self._task = None  # type: Optional[asyncio.Task]
+
+    def start(self):
+        # type: () -> None
+        self._queue = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        # type: () -> None
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def lookup(self, question, k, token_budget):
+        # type: (str, int, int) -> List[Dict]
+        future = asyncio.get_event_loop().create_future()
+        self._queue.put_nowait(((question, k, token_budget), future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batches += 1
+            self.lookups += len(batch)
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, select_context_batch, self.index, [req for req, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), chunks in zip(batch, results):
+                if not future.done():
+                    future.set_result(chunks)
+
+
+# ═══════════════════════════════════════════════════════════════
+# SERVER
+# ═══════════════════════════════════════════════════════════════
+
+class AssistantServer(object):
+
+    def __init__(self, index, backend, instructions, per_client=DEFAULT_PER_CLIENT,
+                 max_batch=DEFAULT_MAX_BATCH, batch_wait_ms=DEFAULT_BATCH_WAIT_MS,
+                 workers=DEFAULT_WORKERS, k=DEFAULT_TOP_K, token_budget=DEFAULT_TOKEN_BUDGET,
+                 cache=None, citations=None):
+        # type: (Any, Any, str, int, int, float, int, int, int, Optional[SemanticAnswerCache], Optional[CitationIndex]) -> None
+        self.index = index
+        self.cache = cache
+        self.citations = citations
+        self.backend = backend
+        self.instructions = instructions
+        self.per_client = per_client
+        self.k = k
+        self.token_budget = token_budget
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.batcher = RetrievalBatcher(index, self.executor, max_batch, batch_wait_ms / 1000.0)
+        self.in_flight = {}  # type: Dict[str, int]
+        self.rejected = 0
+        self.history = collections.deque(maxlen=HISTORY_SIZE)
+        self.started = time.time()
+        self._server = None  # type: Optional[asyncio.AbstractServer]
+        # writer -> "body" or "stream" once a status line has been sent
+        self._responded = {}  # type: Dict[Any, str]
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        # type: (str, int) -> Tuple[str, int]
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        # type: () -> None
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+        self.executor.shutdown(wait=False)
+
+    # ── HTTP plumbing ──
+
+    async def _read_request(self, reader):
+        # type: (asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise HTTPError(413, "Headers too large")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Body larger than %d bytes" % MAX_BODY_BYTES)
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), urlsplit(target).path, headers, body
+
+    @staticmethod
+    def _head(status, content_type, length=None, extra=None):
+        # type: (int, str, Optional[int], Optional[Dict[str, str]]) -> bytes
+        lines = ["HTTP/1.1 %d %s" % (status, REASONS.get(status, "")),
+                 "Content-Type: %s" % content_type,
+                 "Connection: close"]
+        if length is not None:
+            lines.append("Content-Length: %d" % length)
+        for key, value in (extra or {}).items():
+            lines.append("%s: %s" % (key, value))
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send(self, writer, status, body, content_type="application/json", extra=None):
+        # type: (asyncio.StreamWriter, int, Any, str, Optional[Dict[str, str]]) -> None
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self._responded[writer] = "body"
+        writer.write(self._head(status, content_type, len(body), extra) + body)
+        await writer.drain()
+
+    def _start_events(self, writer):
+        # type: (asyncio.StreamWriter) -> None
+        """Send the 200 head of a server-sent event stream."""
+        self._responded[writer] = "stream"
+        writer.write(self._head(200, "text/event-stream; charset=utf-8",
+                                extra={"Cache-Control": "no-cache"}))
+
+    async def _fail(self, writer, status, message, extra=None):
+        # type: (asyncio.StreamWriter, int, str, Optional[Dict[str, str]]) -> None
+        """Report an error: as a response if nothing was sent yet, as a final
+        event if an event stream is open, not at all after a full response."""
+        started = self._responded.get(writer)
+        if started is None:
+            await self._send(writer, status, {"error": message}, extra=extra)
+        elif started == "stream":
+            writer.write(b"data: " + json.dumps({"done": True, "error": message}).encode("utf-8")
+                         + b"\n\n")
+            await writer.drain()
+
+    async def _handle(self, reader, writer):
+        # type: (asyncio.StreamReader, asyncio.StreamWriter) -> None
+        try:
+            try:
+                method, path, headers, body = await self._read_request(reader)
+                if path == "/health":
+                    await self._send(writer, 200, self.health())
+                elif path == "/metrics":
+                    await self._send(writer, 200, self.metrics_text().encode("utf-8"),
+                                     "text/plain; version=0.0.4; charset=utf-8")
+                elif path == "/ask":
+                    if method != "POST":
+                        raise HTTPError(405, "Use POST /ask")
+                    peer = writer.get_extra_info("peername") or ("unknown",)
+                    client = headers.get("x-client-id") or str(peer[0])
+                    await self._ask(writer, client, body)
+                else:
+                    raise HTTPError(404, "No route for %s" % path)
+            except HTTPError as e:
+                extra = {"Retry-After": "1"} if e.status == 429 else None
+                await self._fail(writer, e.status, str(e), extra)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            except Exception as e:
+                await self._fail(writer, 500, str(e))
+        except ConnectionError:
+            pass
+        finally:
+            self._responded.pop(writer, None)
+            writer.close()
+
+    # ── endpoints ──
+
+    def health(self):
+        # type: () -> Dict[str, Any]
+        return {
+            "status": "ok",
+            "backend": self.backend.name,
+            "chunks": len(self.index.chunks),
+            "in_flight": sum(self.in_flight.values()),
+            "uptime_seconds": round(time.time() - self.started, 1),
+        }
+
+    def metrics_text(self):
+        # type: () -> str
+        text = render_prometheus(build_metrics_report(list(self.history)), prefix=METRICS_PREFIX)
+        counters = [
+            ("in_flight", "gauge", "Requests currently being answered.",
+             sum(self.in_flight.values())),
+            ("rejected_total", "counter", "Requests rejected by the per-client limit.",
+             self.rejected),
+            ("retrieval_batches_total", "counter", "Retrieval micro-batches executed.",
+             self.batcher.batches),
+            ("retrieval_lookups_total", "counter", "Retrieval lookups served by batches.",
+             self.batcher.lookups),
+        ]
+        if self.cache is not None:
+            stats = self.cache.stats
+            counters += [
+                ("answer_cache_hits_total", "counter", "Exact-tier answer cache hits.",
+                 stats["exact_hits"]),
+                ("answer_cache_semantic_hits_total", "counter",
+                 "Retrieval-signature answer cache hits.", stats["semantic_hits"]),
+                ("answer_cache_misses_total", "counter", "Answer cache misses.", stats["misses"]),
+                ("answer_cache_entries", "gauge", "Answers currently cached.", len(self.cache)),
+            ]
+        lines = []
+        for name, kind, help_text, value in counters:
+            metric = "%s_%s" % (METRICS_PREFIX, name)
+            lines.append("# HELP %s %s" % (metric, help_text))
+            lines.append("# TYPE %s %s" % (metric, kind))
+            lines.append("%s %s" % (metric, value))
+        if hasattr(self.index, "stage_summary"):
+            lines.extend(self._stage_metrics(self.index.stage_summary()))
+        return text + "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _stage_metrics(stages):
+        # type: (Dict[str, Dict[str, Any]]) -> List[str]
+        """Per-stage latency quantiles and timeouts of a hybrid retriever."""
+        latency = "%s_retrieval_stage_seconds" % METRICS_PREFIX
+        timeouts = "%s_retrieval_stage_timeouts_total" % METRICS_PREFIX
+        lines = ["# HELP %s Retrieval stage latency." % latency,
+                 "# TYPE %s summary" % latency]
+        for stage, s in sorted(stages.items()):
+            for q in ("50", "90", "99"):
+                lines.append('%s{stage="%s",quantile="0.%s"} %s' % (
+                    latency, stage, q, s["p%s_ms" % q] / 1000.0))
+            lines.append('%s_count{stage="%s"} %d' % (latency, stage, s["count"]))
+        lines += ["# HELP %s Retrieval stages that missed their latency budget." % timeouts,
+                  "# TYPE %s counter" % timeouts]
+        lines += ['%s{stage="%s"} %d' % (timeouts, stage, s["timeouts"])
+                  for stage, s in sorted(stages.items())]
+        return lines
+
+    def resolve_citations(self, answer):
+        # type: (str) -> List[Dict[str, Any]]
+        if self.citations is None:
+            return []
+        return [{k: c[k] for k in ("doc_id", "section", "status", "link") if k in c}
+                for c in self.citations.validate(answer)["citations"]]
+
+    def _parse_ask(self, body):
+        # type: (bytes) -> Dict[str, Any]
+        try:
+            payload = json.loads(body.decode("utf-8") or "{}")
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON")
+        if not isinstance(payload, dict) or not str(payload.get("question", "")).strip():
+            raise HTTPError(400, "Missing 'question'")
+        try:
+            payload["k"] = int(payload.get("k", self.k))
+            payload["token_budget"] = int(payload.get("token_budget", self.token_budget))
+        except (TypeError, ValueError):
+            raise HTTPError(400, "'k' and 'token_budget' must be integers")
+        return payload
+
+    async def _ask(self, writer, client, body):
+        # type: (asyncio.StreamWriter, str, bytes) -> None
+        payload = self._parse_ask(body)
+        if self.in_flight.get(client, 0) >= self.per_client:
+            self.rejected += 1
+            raise HTTPError(429, "Client %s already has %d requests in flight" % (
+                client, self.per_client))
+        self.in_flight[client] = self.in_flight.get(client, 0) + 1
+        record = {
+            "persona": payload.get("persona"),
+            "backend": self.backend.name,
+            "model": getattr(self.backend, "model", None),
+            "started_at": time.time(),
+            "status": "completed",
+            "error": None,
+        }
+        try:
+            question = str(payload["question"])
+            k, budget = payload["k"], payload["token_budget"]
+            cache_status = "off"
+            cached = None
+            retrieval_ms = 0.0
+            if self.cache is not None:
+                cached = self.cache.lookup_exact(question, k, budget)
+                cache_status = "exact" if cached else "miss"
+            if cached is None:
+                t0 = time.time()
+                chunks = await self.batcher.lookup(question, k, budget)
+                retrieval_ms = round((time.time() - t0) * 1000, 2)
+                chunk_ids = [c["id"] for c in chunks]
+                summary = [{"id": c["id"], "doc_id": c["doc_id"], "section": c["section"]}
+                           for c in chunks]
+                if self.cache is not None:
+                    cached = self.cache.lookup_semantic(question, chunk_ids, k, budget)
+                    if cached:
+                        cache_status = "semantic"
+            if cached is not None:
+                record["backend"] = CACHE_BACKEND
+                record["cached"] = True
+                await self._send_cached(writer, payload.get("stream"), cached, cache_status,
+                                        retrieval_ms, record)
+                return
+            system = build_system_prompt(self.instructions, chunks)
+            if payload.get("stream"):
+                answer = await self._stream_answer(writer, system, question, chunks, summary,
+                                                   retrieval_ms, record, cache_status)
+            else:
+                answer = await asyncio.get_event_loop().run_in_executor(
+                    self.executor, self.backend.generate, system, question, chunks)
+                await self._send(writer, 200, {
+                    "answer": answer,
+                    "backend": self.backend.name,
+                    "chunks": summary,
+                    "cache": cache_status,
+                    "citations": self.resolve_citations(answer),
+                    "retrieval_ms": retrieval_ms,
+                    "elapsed_ms": round((time.time() - record["started_at"]) * 1000, 2),
+                })
+            if self.cache is not None and answer is not None:
+                self.cache.put(question, chunk_ids, k, budget, answer, chunks=summary)
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = str(e)
+            raise
+        finally:
+            self.in_flight[client] -= 1
+            if not self.in_flight[client]:
+                del self.in_flight[client]
+            record["finished_at"] = time.time()
+            record["elapsed_seconds"] = record["finished_at"] - record["started_at"]
+            self.history.append(record)
+
+    async def _send_cached(self, writer, stream, cached, cache_status, retrieval_ms, record):
+        final = {"backend": CACHE_BACKEND, "chunks": cached["chunks"], "cache": cache_status,
+                 "citations": self.resolve_citations(cached["answer"]),
+                 "retrieval_ms": retrieval_ms,
+                 "elapsed_ms": round((time.time() - record["started_at"]) * 1000, 3)}
+        if not stream:
+            final["answer"] = cached["answer"]
+            await self._send(writer, 200, final)
+            return
+        final["done"] = True
+        self._start_events(writer)
+        for event in ({"delta": cached["answer"]}, final):
+            writer.write(b"data: " + json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n\n")
+        await writer.drain()
+
+    async def _stream_answer(self, writer, system, question, chunks, summary, retrieval_ms, record,
+                             cache_status="off"):
+        """Relay backend deltas as server-sent events; return the full answer
+        (None if the backend failed part-way)."""
+        loop = asyncio.get_event_loop()
+        queue = asyncio.Queue()  # type: asyncio.Queue
+        done = object()
+
+        def pump():
+            try:
+                for delta in self.backend.stream(system, question, chunks):
+                    loop.call_soon_threadsafe(queue.put_nowait, delta)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        self._start_events(writer)
+        producer = loop.run_in_executor(self.executor, pump)
+        deltas = []
+        error = None
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                error = item
+                continue
+            deltas.append(item)
+            writer.write(b"data: " + json.dumps({"delta": item}, ensure_ascii=False).encode("utf-8")
+                         + b"\n\n")
+            await writer.drain()
+        await producer
+        final = {"done": True, "backend": self.backend.name, "chunks": summary,
+                 "cache": cache_status, "retrieval_ms": retrieval_ms,
+                 "elapsed_ms": round((time.time() - record["started_at"]) * 1000, 2)}
+        if error is not None:
+            record["status"] = "error"
+            record["error"] = str(error)
+            final["error"] = str(error)
+        else:
+            final["citations"] = self.resolve_citations("".join(deltas))
+        writer.write(b"data: " + json.dumps(final).encode("utf-8") + b"\n\n")
+        await writer.drain()
+        return None if error is not None else "".join(deltas)
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLIENT / LOAD TEST
+# ═══════════════════════════════════════════════════════════════
+
+async def http_request(host, port, method, path, payload=None, headers=None):
+    # type: (str, int, str, str, Optional[Dict], Optional[Dict[str, str]]) -> Tuple[int, bytes]
+    """Minimal HTTP/1.1 client: returns (status, body)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    lines = ["%s %s HTTP/1.1" % (method, path), "Host: %s:%d" % (host, port),
+             "Connection: close", "Content-Length: %d" % len(body)]
+    if payload is not None:
+        lines.append("Content-Type: application/json")
+    for key, value in (headers or {}).items():
+        lines.append("%s: %s" % (key, value))
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, content = raw.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), content
+
+
+def parse_events(body):
+    # type: (bytes) -> List[Dict]
+    return [json.loads(line[len(b"data: "):].decode("utf-8"))
+            for line in body.split(b"\n\n") if line.startswith(b"data: ")]
+
+
+def _cache_status(body, stream):
+    # type: (bytes, bool) -> Optional[str]
+    """The "cache" field of an /ask response (the final event when streamed)."""
+    try:
+        final = parse_events(body)[-1] if stream else json.loads(body.decode("utf-8"))
+    except (ValueError, IndexError):
+        return None
+    return final.get("cache")
+
+
+async def run_load_test(host, port, questions, concurrency, stream=False):
+    # type: (str, int, List[Dict], int, bool) -> List[Dict]
+    """Replay questions with `concurrency` workers, one client id per worker.
+
+    Answers served from the answer cache are marked "cached", so
+    qa_metrics leaves them out of latency and throughput."""
+    queue = collections.deque(questions)
+    results = []  # type: List[Dict]
+
+    async def worker(n):
+        while queue:
+            q = queue.popleft()
+            started = time.time()
+            status, body = await http_request(
+                host, port, "POST", "/ask",
+                {"question": q["text"], "persona": q.get("persona"), "stream": stream},
+                {"X-Client-Id": "loadtest-%d" % n})
+            finished = time.time()
+            results.append({
+                "cached": status == 200 and _cache_status(body, stream) in CACHE_HITS,
+                "id": q.get("id"),
+                "persona": q.get("persona"),
+                "backend": "http",
+                "status": "completed" if status == 200 else "http_%d" % status,
+                "error": None if status == 200 else body.decode("utf-8", "replace")[:200],
+                "started_at": started,
+                "finished_at": finished,
+                "elapsed_seconds": finished - started,
+            })
+
+    await asyncio.gather(*[worker(n) for n in range(concurrency)])
+    return results
+
+
+def _load_index(retriever, args=None):
+    if retriever == "hybrid":
+        from canon_hybrid import load_or_build_hybrid
+        return load_or_build_hybrid(**hybrid_options(args))
+    if retriever == "dense":
+        from canon_dense import load_or_build_dense
+        return load_or_build_dense()
+    from canon_bm25 import load_or_build
+    return load_or_build()
+
+
+def _resolve_backend(args):
+    # type: (argparse.Namespace) -> Tuple[Optional[str], Dict[str, Any]]
+    """Settle args.backend (--backend, else --platform-config, else offline);
+    returns the config's (instructions, backend options)."""
+    instructions, options = None, {}  # type: Tuple[Optional[str], Dict[str, Any]]
+    if args.platform_config:
+        from migration_generator import serving_settings
+        settings = serving_settings(args.platform_config)
+        args.backend = args.backend or settings["backend"]
+        instructions = settings["instructions"]
+        if args.backend == settings["backend"]:
+            options = settings["backend_options"]
+    args.backend = args.backend or "offline"
+    return instructions, options
+
+
+async def _serve(args, instructions, options):
+    # type: (argparse.Namespace, Optional[str], Dict[str, Any]) -> None
+    if args.backend == "offline":
+        options["latency"] = args.latency
+    backend = load_backend(args.backend, **options)
+    index = _load_index(args.retriever, args)
+    cache = None
+    if args.answer_cache_size > 0:
+        cache = SemanticAnswerCache(CanonVersion(extra=index.signature),
+                                    max_entries=args.answer_cache_size)
+    server = AssistantServer(index, backend, instructions or load_instructions(),
+                             per_client=args.per_client, max_batch=args.max_batch,
+                             batch_wait_ms=args.batch_wait_ms, workers=args.workers, cache=cache,
+                             citations=load_or_build_citations())
+    host, port = await server.start(args.host, 0 if args.load_test else args.port)
+    if not args.load_test:
+        print("MW assistant on http://%s:%d (backend=%s, retriever=%s)" % (
+            host, port, backend.name, args.retriever))
+        print("  POST /ask | GET /health | GET /metrics  -- Ctrl+C to stop")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.close()
+        return
+
+    from question_bank import load_questions
+    bank = load_questions()
+    questions = [bank[i % len(bank)] for i in range(args.load_test)]
+    print("Load test: %d requests, concurrency %d, backend latency %.2fs%s" % (
+        len(questions), args.concurrency, args.latency, ", streaming" if args.stream else ""))
+    results = await run_load_test(host, port, questions, args.concurrency, args.stream)
+    print_metrics_report(build_metrics_report(results), title="LOAD TEST")
+    print("  retrieval batches: %d for %d lookups (mean batch %.1f) | rejected: %d" % (
+        server.batcher.batches, server.batcher.lookups,
+        float(server.batcher.lookups) / max(1, server.batcher.batches), server.rejected))
+    if server.cache is not None:
+        print("  answer cache: %d exact + %d semantic hits, %d misses (hit ratio %.1f%%)" % (
+            server.cache.stats["exact_hits"], server.cache.stats["semantic_hits"],
+            server.cache.stats["misses"], 100.0 * server.cache.hit_ratio()))
+    await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the MW Knowledge Assistant over HTTP")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--backend", help="offline (default), anthropic, azure or ollama")
+    parser.add_argument("--platform-config", metavar="PATH",
+                        help="Generated migration config to take backend settings and "
+                             "instructions from")
+    parser.add_argument("--retriever", choices=("bm25", "dense", "hybrid"), default="bm25")
+    parser.add_argument("--per-client", type=int, default=DEFAULT_PER_CLIENT,
+                        help="Max in-flight requests per client")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--batch-wait-ms", type=float, default=DEFAULT_BATCH_WAIT_MS)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Simulated offline-backend latency in seconds")
+    parser.add_argument("--answer-cache-size", type=int, default=1024,
+                        help="Semantic answer cache entries (0 disables the cache)")
+    parser.add_argument("--load-test", type=int, metavar="N", default=0,
+                        help="Run N requests against an in-process server and exit")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--stream", action="store_true", help="Load test with streaming")
+    add_hybrid_args(parser)
+    args = parser.parse_args()
+
+    instructions, options = _resolve_backend(args)
+    if args.load_test and args.backend != "offline":
+        print("ERROR: --load-test uses the offline backend (got %s)" % args.backend)
+        sys.exit(1)
+    try:
+        asyncio.run(_serve(args, instructions, options))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+"""
+Reliance Infrastructure Canon -- batched Merkle attestation of artifacts.
+
+Timestamping every document, PDF, signature file and manifest separately
+costs one anchor (and one confirmation wait) per file. Instead, build
+hashes every artifact (SHA3-512, as everywhere in the canon), folds the
+hashes into one SHA-256 Merkle tree and anchors only the root:
+
+    leaf  = SHA256(0x00 || path || 0x00 || SHA3-512(file))
+    node  = SHA256(0x01 || left || right)     (odd last node promoted)
+
+Outputs:
+
+    verification/batch-attestation.json   root, anchor digest, artifact
+                                          count and the SHA3-512 of every
+                                          artifact, by repository path
+    verification/merkle/<artifact>.json   compact inclusion proof per
+                                          artifact: leaf index, SHA3-512
+                                          and the sibling path ("L"/"R" +
+                                          hex per level); the root is kept
+                                          only in the batch manifest
+    verification/batch-attestation.ots    OpenTimestamps proof whose file
+                                          digest is the Merkle root
+                                          (written by submit)
+
+The root is the anchor-ready digest: submit posts it to OpenTimestamps
+calendars as a raw SHA-256 digest. Everything else is offline: verify
+recomputes each artifact hash, replays its proof path to the root, and
+replays the .ots proof against the root, checking Bitcoin attestations
+against a cached block-header file (verification/bitcoin-headers.json,
+height -> {"hash", "merkleroot", "time"}).
+
+The OpenTimestamps reader/serializer here is also what
+verification/verify-canon.py uses to check master-index.json.ots.
+
+Usage:
+    python canon_attestation.py build             # Hash artifacts, write root + proofs
+    python canon_attestation.py verify            # Offline: proofs, root, timestamp
+    python canon_attestation.py verify documents/01-constitutional-authorities/DOC-001_MW-CANON_v2.1.0.txt
+    python canon_attestation.py submit            # Anchor the root (network)
+
+Python 3.8+ compatible, standard library only.
+"""
+
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BATCH_FILE = os.path.join("verification", "batch-attestation.json")
+PROOF_FILE = os.path.join("verification", "batch-attestation.ots")
+HEADERS_FILE = os.path.join("verification", "bitcoin-headers.json")
+PROOF_DIR = os.path.join("verification", "merkle")
+BATCH_FORMAT = "mw-merkle-batch-v1"
+SIDECAR_FORMAT = "mw-merkle-v2"
+ARTIFACT_GLOBS = (
+    "documents/**/*.txt",
+    "pdf-reference/*.pdf",
+    "pdf-reference/PDF-HASH-MANIFEST.txt",
+    "verification/master-index.json",
+    "verification/hashes.json",
+    "verification/signatures.json",
+    "verification/reliance-signing-key.pub",
+    "checksums/SHA3-512-HASHES.txt",
+    "MANIFEST.json",
+)
+DEFAULT_CALENDARS = (
+    "https://alice.btc.calendar.opentimestamps.org",
+    "https://bob.btc.calendar.opentimestamps.org",
+    "https://finney.calendar.eternitywall.com",
+)
+
+
+# ═══════════════════════════════════════════════════════════════
+# MERKLE TREE
+# ═══════════════════════════════════════════════════════════════
+
+def sha3_file(path):
+    # type: (str) -> str
+    h = hashlib.sha3_512()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def leaf_hash(path, sha3_hex):
+    # type: (str, str) -> bytes
+    return hashlib.sha256(b"\x00" + path.encode("utf-8") + b"\x00"
+                          + bytes.fromhex(sha3_hex)).digest()
+
+
+def node_hash(left, right):
+    # type: (bytes, bytes) -> bytes
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def build_levels(leaves):
+    # type: (List[bytes]) -> List[List[bytes]]
+    """Every tree level, leaves first and [root] last."""
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+                       for i in range(0, len(level), 2)])
+    return levels
+
+
+def merkle_path(levels, index):
+    # type: (List[List[bytes]], int) -> List[str]
+    """Sibling hashes from leaf to root, "L<hex>" when the sibling is on
+    the left; levels where the node is promoted contribute nothing."""
+    path = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append(("L" if sibling < index else "R") + level[sibling].hex())
+        index //= 2
+    return path
+
+
+def root_from_path(leaf, path):
+    # type: (bytes, Sequence[str]) -> bytes
+    node = leaf
+    for step in path:
+        sibling = bytes.fromhex(step[1:])
+        node = node_hash(sibling, node) if step[0] == "L" else node_hash(node, sibling)
+    return node
+
+
+def collect_artifacts(root=SCRIPT_DIR, patterns=ARTIFACT_GLOBS):
+    # type: (str, Sequence[str]) -> List[str]
+    """Sorted repository-relative paths (forward slashes) of the artifacts."""
+    found = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(root, pattern), recursive=True):
+            if os.path.isfile(path):
+                found.add(os.path.relpath(path, root).replace(os.sep, "/"))
+    return sorted(found)
+
+
+def build_batch(root=SCRIPT_DIR, artifacts=None):
+    # type: (str, Optional[List[str]]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]
+    """(batch manifest, {artifact path: sidecar}) for the artifacts."""
+    paths = collect_artifacts(root) if artifacts is None else sorted(artifacts)
+    if not paths:
+        raise ValueError("no artifacts to attest under %s" % root)
+    hashes = [(p, sha3_file(os.path.join(root, p))) for p in paths]
+    levels = build_levels([leaf_hash(p, h) for p, h in hashes])
+    merkle_root = levels[-1][0].hex()
+    batch = {
+        "format": BATCH_FORMAT,
+        "hash_algorithm": "SHA3-512",
+        "tree": "SHA-256, leaf = H(0x00|path|0x00|sha3_512), node = H(0x01|left|right)",
+        "root": merkle_root,
+        "anchor_digest": merkle_root,
+        "artifact_count": len(paths),
+        "artifacts": dict(hashes),
+        "proof_file": PROOF_FILE.replace(os.sep, "/"),
+    }
+    sidecars = dict((p, {"format": SIDECAR_FORMAT, "index": i, "sha3_512": h,
+                         "path": merkle_path(levels, i)})
+                    for i, (p, h) in enumerate(hashes))
+    return batch, sidecars
+
+
+def _write_json(path, data, compact=False):
+    # type: (str, Any, bool) -> bool
+    """Write data unless the file already holds it; True if written."""
+    if compact:
+        text = json.dumps(data, sort_keys=True, separators=(",", ":")) + "\n"
+    else:
+        text = json.dumps(data, indent=2, sort_keys=True) + "\n"
+    if os.path.exists(path):
+        with io.open(path, "r", encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    with io.open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return True
+
+
+def sidecar_path(path, root=SCRIPT_DIR):
+    # type: (str, str) -> str
+    """Inclusion proof file of an artifact, kept under verification/merkle/
+    so that no proof sits next to (or shares a prefix with) a document."""
+    return os.path.join(root, PROOF_DIR, path.replace("/", os.sep) + ".json")
+
+
+def write_batch(batch, sidecars, root=SCRIPT_DIR):
+    # type: (Dict[str, Any], Dict[str, Dict[str, Any]], str) -> int
+    """Write the manifest (stamped with the time the root last changed) and
+    the proofs, removing proofs of artifacts no longer in the batch; the
+    number of files written."""
+    manifest_path = os.path.join(root, BATCH_FILE)
+    previous = load_json(manifest_path) if os.path.exists(manifest_path) else {}
+    if previous.get("root") == batch["root"] and "generated_utc" in previous:
+        batch = dict(batch, generated_utc=previous["generated_utc"])
+    else:
+        batch = dict(batch, generated_utc=datetime.now(timezone.utc).isoformat())
+    written = int(_write_json(manifest_path, batch))
+    keep = set()
+    for path, sidecar in sidecars.items():
+        target = sidecar_path(path, root)
+        keep.add(os.path.normpath(target))
+        if not os.path.isdir(os.path.dirname(target)):
+            os.makedirs(os.path.dirname(target))
+        written += int(_write_json(target, sidecar, True))
+    for old in glob.glob(os.path.join(root, PROOF_DIR, "**", "*.json"), recursive=True):
+        if os.path.normpath(old) not in keep:
+            os.remove(old)
+    return written
+
+
+def load_json(path):
+    # type: (str) -> Any
+    with io.open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def verify_artifact(path, root=SCRIPT_DIR, expected_root=None):
+    # type: (str, str, Optional[str]) -> Tuple[bool, str]
+    """(ok, reason) for one artifact against its proof and the batch root
+    (read from the batch manifest unless given)."""
+    proof = sidecar_path(path, root)
+    if not os.path.exists(os.path.join(root, path)):
+        return False, "missing"
+    if not os.path.exists(proof):
+        return False, "no proof in %s" % PROOF_DIR
+    if expected_root is None:
+        expected_root = load_json(os.path.join(root, BATCH_FILE))["root"]
+    sidecar = load_json(proof)
+    actual = sha3_file(os.path.join(root, path))
+    if actual != sidecar["sha3_512"]:
+        return False, "SHA3-512 mismatch"
+    computed = root_from_path(leaf_hash(path, actual), sidecar["path"]).hex()
+    if computed != expected_root:
+        return False, "stale proof (root %s, batch %s)" % (computed[:12], expected_root[:12])
+    return True, "ok"
+
+
+# ═══════════════════════════════════════════════════════════════
+# OPENTIMESTAMPS PROOFS
+# ═══════════════════════════════════════════════════════════════
+
+OTS_MAGIC = b"\x00OpenTimestamps\x00\x00Proof\x00\xbf\x89\xe2\xe8\x84\xe8\x92\x94"
+OTS_VERSION = 1
+OTS_FORK = 0xff
+OTS_ATTESTATION = 0x00
+OTS_UNARY = {0x08: "sha256", 0x02: "sha1", 0x03: "ripemd160", 0x67: "keccak256",
+             0xf2: "reverse", 0xf3: "hexlify"}
+OTS_BINARY = {0xf0: "append", 0xf1: "prepend"}
+OTS_DIGEST_SIZES = {"sha256": 32, "sha1": 20, "ripemd160": 20, "keccak256": 32}
+ATTESTATION_TAGS = {
+    bytes.fromhex("0588960d73d71901"): "bitcoin",
+    bytes.fromhex("06869a0d73d71b45"): "litecoin",
+    bytes.fromhex("30fe8087b5c7ead7"): "ethereum",
+    bytes.fromhex("83dfe30d2ef90c8e"): "pending",
+}
+ATTESTATION_NAMES = dict((v, k) for k, v in ATTESTATION_TAGS.items())
+MAX_OTS_DEPTH = 256
+
+
+class OTSError(ValueError):
+    """Malformed or unsupported OpenTimestamps proof."""
+
+
+class _Reader(object):
+    def __init__(self, data):
+        # type: (bytes) -> None
+        self.data = data
+        self.pos = 0
+
+    def read(self, n):
+        # type: (int) -> bytes
+        if self.pos + n > len(self.data):
+            raise OTSError("truncated proof at byte %d" % self.pos)
+        chunk = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return chunk
+
+    def byte(self):
+        # type: () -> int
+        return self.read(1)[0]
+
+    def varuint(self):
+        # type: () -> int
+        value, shift = 0, 0
+        while True:
+            b = self.byte()
+            value |= (b & 0x7f) << shift
+            if not b & 0x80:
+                return value
+            shift += 7
+
+    def varbytes(self):
+        # type: () -> bytes
+        return self.read(self.varuint())
+
+
+def _varuint(value):
+    # type: (int) -> bytes
+    out = bytearray()
+    while True:
+        b = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _parse_entry(reader, tag, depth):
+    # type: (_Reader, int, int) -> Dict[str, Any]
+    if tag == OTS_ATTESTATION:
+        kind = ATTESTATION_TAGS.get(reader.read(8), "unknown")
+        payload = _Reader(reader.varbytes())
+        entry = {"attestation": kind}  # type: Dict[str, Any]
+        if kind in ("bitcoin", "litecoin", "ethereum"):
+            entry["height"] = payload.varuint()
+        elif kind == "pending":
+            entry["uri"] = payload.varbytes().decode("utf-8", "replace")
+        return entry
+    if tag in OTS_UNARY:
+        entry = {"op": OTS_UNARY[tag]}
+    elif tag in OTS_BINARY:
+        entry = {"op": OTS_BINARY[tag], "arg": reader.varbytes()}
+    else:
+        raise OTSError("unknown operation 0x%02x at byte %d" % (tag, reader.pos - 1))
+    entry["timestamp"] = _parse_timestamp(reader, depth + 1)
+    return entry
+
+
+def _parse_timestamp(reader, depth=0):
+    # type: (_Reader, int) -> List[Dict[str, Any]]
+    if depth > MAX_OTS_DEPTH:
+        raise OTSError("proof nested deeper than %d operations" % MAX_OTS_DEPTH)
+    entries = []
+    tag = reader.byte()
+    while tag == OTS_FORK:
+        entries.append(_parse_entry(reader, reader.byte(), depth))
+        tag = reader.byte()
+    entries.append(_parse_entry(reader, tag, depth))
+    return entries
+
+
+def parse_ots(data):
+    # type: (bytes) -> Dict[str, Any]
+    """{"hash_op", "digest", "timestamp"} of a detached .ots proof."""
+    reader = _Reader(data)
+    if reader.read(len(OTS_MAGIC)) != OTS_MAGIC:
+        raise OTSError("not an OpenTimestamps proof")
+    version = reader.varuint()
+    if version != OTS_VERSION:
+        raise OTSError("unsupported proof version %d" % version)
+    tag = reader.byte()
+    hash_op = OTS_UNARY.get(tag)
+    if hash_op not in OTS_DIGEST_SIZES:
+        raise OTSError("unsupported file hash 0x%02x" % tag)
+    digest = reader.read(OTS_DIGEST_SIZES[hash_op])
+    timestamp = _parse_timestamp(reader)
+    if reader.pos != len(data):
+        raise OTSError("%d trailing bytes" % (len(data) - reader.pos))
+    return {"hash_op": hash_op, "digest": digest, "timestamp": timestamp}
+
+
+def serialize_timestamp(entries):
+    # type: (List[Dict[str, Any]]) -> bytes
+    out = bytearray()
+    for n, entry in enumerate(entries):
+        if n < len(entries) - 1:
+            out.append(OTS_FORK)
+        if "attestation" in entry:
+            kind = entry["attestation"]
+            if kind == "pending":
+                uri = entry["uri"].encode("utf-8")
+                payload = _varuint(len(uri)) + uri
+            else:
+                payload = _varuint(entry["height"])
+            out += bytes([OTS_ATTESTATION]) + ATTESTATION_NAMES[kind] + _varuint(len(payload)) + payload
+            continue
+        tag = dict((v, k) for k, v in list(OTS_UNARY.items()) + list(OTS_BINARY.items()))[entry["op"]]
+        out.append(tag)
+        if entry["op"] in OTS_BINARY.values():
+            out += _varuint(len(entry["arg"])) + entry["arg"]
+        out += serialize_timestamp(entry["timestamp"])
+    return bytes(out)
+
+
+def serialize_ots(digest, entries, hash_op="sha256"):
+    # type: (bytes, List[Dict[str, Any]], str) -> bytes
+    tag = dict((v, k) for k, v in OTS_UNARY.items())[hash_op]
+    return OTS_MAGIC + _varuint(OTS_VERSION) + bytes([tag]) + digest + serialize_timestamp(entries)
+
+
+def _apply(op, arg, msg):
+    # type: (str, Optional[bytes], bytes) -> bytes
+    if op == "append":
+        return msg + arg
+    if op == "prepend":
+        return arg + msg
+    if op == "reverse":
+        return msg[::-1]
+    if op == "hexlify":
+        return msg.hex().encode("ascii")
+    if op in ("sha256", "sha1"):
+        return hashlib.new(op, msg).digest()
+    if op == "ripemd160":
+        try:
+            return hashlib.new("ripemd160", msg).digest()
+        except ValueError:
+            raise OTSError("ripemd160 is not available in this Python build")
+    raise OTSError("%s is not supported offline" % op)
+
+
+def replay(digest, entries):
+    # type: (bytes, List[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], bytes]]
+    """(attestation entry, commitment it attests) for every leaf of the proof."""
+    for entry in entries:
+        if "attestation" in entry:
+            yield entry, digest
+        else:
+            for item in replay(_apply(entry["op"], entry.get("arg"), digest),
+                               entry["timestamp"]):
+                yield item
+
+
+def load_headers(path):
+    # type: (str) -> Dict[int, Dict[str, Any]]
+    """Cached Bitcoin block headers by height ({} if the file is absent)."""
+    if not os.path.exists(path):
+        return {}
+    return dict((int(height), header) for height, header in load_json(path).items())
+
+
+def verify_ots(data, expected_digest, headers=None):
+    # type: (bytes, bytes, Optional[Dict[int, Dict[str, Any]]]) -> Dict[str, Any]
+    """Offline verdict for a proof of expected_digest.
+
+    status: "verified" (a Bitcoin attestation matches a cached header),
+    "failed" (wrong digest, or an attestation contradicts its header),
+    "unverified" (Bitcoin attestations whose headers are not cached) or
+    "pending" (calendar promises only)."""
+    headers = headers or {}
+    proof = parse_ots(data)
+    result = {"digest": proof["digest"].hex(), "attestations": []}  # type: Dict[str, Any]
+    if proof["digest"] != expected_digest:
+        result.update(status="failed", reason="proof is for %s, expected %s" % (
+            proof["digest"].hex()[:16], expected_digest.hex()[:16]))
+        return result
+    verified = failed = unverified = 0
+    for entry, commitment in replay(proof["digest"], proof["timestamp"]):
+        row = dict(entry)
+        if entry["attestation"] == "bitcoin":
+            header = headers.get(entry["height"])
+            if header is None:
+                row["verified"] = None
+                unverified += 1
+            elif bytes.fromhex(header["merkleroot"])[::-1] == commitment:
+                row.update(verified=True, block=header.get("hash"), time=header.get("time"))
+                verified += 1
+            else:
+                row["verified"] = False
+                failed += 1
+        result["attestations"].append(row)
+    if failed:
+        result.update(status="failed", reason="attestation does not match the cached header")
+    elif verified:
+        earliest = min(a.get("time") or 0 for a in result["attestations"] if a.get("verified"))
+        result.update(status="verified", time=earliest)
+    elif unverified:
+        result.update(status="unverified", reason="block header not cached")
+    else:
+        result.update(status="pending", reason="calendar attestations only")
+    return result
+
+
+def submit_digest(digest, calendars=DEFAULT_CALENDARS, timeout=15.0):
+    # type: (bytes, Sequence[str], float) -> List[Dict[str, Any]]
+    """Pending timestamp entries from every calendar that accepted digest."""
+    from urllib.request import Request, urlopen
+
+    entries = []  # type: List[Dict[str, Any]]
+    for url in calendars:
+        request = Request(url.rstrip("/") + "/digest", data=digest,
+                          headers={"Accept": "application/vnd.opentimestamps.v1",
+                                   "User-Agent": "canon-attestation"})
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                entries.extend(_parse_timestamp(_Reader(response.read())))
+        except (IOError, OSError, OTSError) as e:
+            print("  calendar %s failed: %s" % (url, e))
+    return entries
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI
+# ═══════════════════════════════════════════════════════════════
+
+def _verify(args):
+    # type: (argparse.Namespace) -> bool
+    batch = load_json(os.path.join(args.root, BATCH_FILE))
+    paths = args.paths or sorted(batch["artifacts"])
+    failures = 0
+    for path in paths:
+        ok, reason = verify_artifact(path, args.root, batch["root"])
+        if not ok:
+            failures += 1
+            print("  FAIL  %s (%s)" % (path, reason))
+        elif args.paths:
+            print("  PASS  %s" % path)
+    leaves = [leaf_hash(p, h) for p, h in sorted(batch["artifacts"].items())]
+    if build_levels(leaves)[-1][0].hex() != batch["root"]:
+        failures += 1
+        print("  FAIL  %s: artifact hashes do not produce the recorded root" % BATCH_FILE)
+    print("Artifacts: %d checked, %d failed (root %s)" % (len(paths), failures,
+                                                          batch["root"][:16]))
+    proof_path = os.path.join(args.root, PROOF_FILE)
+    if os.path.exists(proof_path):
+        with open(proof_path, "rb") as f:
+            verdict = verify_ots(f.read(), bytes.fromhex(batch["anchor_digest"]),
+                                 load_headers(os.path.join(args.root, args.headers)))
+        print("Timestamp: %s%s" % (verdict["status"], " (%s)" % verdict["reason"]
+                                   if "reason" in verdict else ""))
+        failures += verdict["status"] == "failed"
+    else:
+        print("Timestamp: not submitted (python canon_attestation.py submit)")
+    return failures == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched Merkle attestation of canon artifacts")
+    parser.add_argument("--root", default=SCRIPT_DIR, help="Repository root")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("build", help="Hash artifacts, write the batch manifest and proofs")
+    v = sub.add_parser("verify", help="Verify artifacts, root and proof offline")
+    v.add_argument("paths", nargs="*", help="Artifact paths (default: all)")
+    v.add_argument("--headers", default=HEADERS_FILE, help="Cached Bitcoin block headers")
+    s = sub.add_parser("submit", help="Anchor the root on OpenTimestamps calendars")
+    s.add_argument("--calendar", action="append", help="Calendar URL (repeatable)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        batch, sidecars = build_batch(args.root)
+        written = write_batch(batch, sidecars, args.root)
+        print("%d artifacts, root %s" % (batch["artifact_count"], batch["root"]))
+        print("Anchor digest: %s" % batch["anchor_digest"])
+        print("%d files written (%s + proofs in %s)" % (written, BATCH_FILE, PROOF_DIR))
+    elif args.command == "verify":
+        sys.exit(0 if _verify(args) else 1)
+    elif args.command == "submit":
+        batch = load_json(os.path.join(args.root, BATCH_FILE))
+        digest = bytes.fromhex(batch["anchor_digest"])
+        entries = submit_digest(digest, args.calendar or DEFAULT_CALENDARS)
+        if not entries:
+            print("ERROR: no calendar accepted the digest")
+            sys.exit(1)
+        with open(os.path.join(args.root, PROOF_FILE), "wb") as f:
+            f.write(serialize_ots(digest, entries))
+        print("Submitted %s to %d calendars -> %s" % (batch["anchor_digest"][:16], len(entries),
+                                                      PROOF_FILE))
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
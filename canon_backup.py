@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Reliance Infrastructure Canon -- content-addressed, deduplicated backups.
+
+Each snapshot splits every file under the backed-up paths into chunks of
+up to CHUNK_SIZE bytes, keyed by the chunk's SHA3-512. A chunk is stored
+once, zlib-compressed, however many files and snapshots reference it, so
+a weekly snapshot of an unchanged canon adds only its manifest.
+
+Store layout (default .canon-backup/):
+
+    chunks/<h[:2]>/<h>           zlib-compressed chunk with SHA3-512 h
+    snapshots/<id>.json          snapshot manifest: every file's path, size,
+                                 mode, SHA3-512 and chunk list
+
+snapshot --check-hashes also checks each document against
+verification/hashes.json while hashing it (one pass, filename lookup),
+and refuses to snapshot a canon that does not verify.
+
+Usage:
+    python canon_backup.py snapshot --check-hashes      # documents/ verification/ metadata/ ...
+    python canon_backup.py list
+    python canon_backup.py verify [SNAPSHOT]            # Default: latest; --all for every one
+    python canon_backup.py restore SNAPSHOT DEST [--path documents/]
+    python canon_backup.py prune --keep 12              # Drop old snapshots + orphan chunks
+
+Python 3.8+ compatible, standard library only.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE = os.path.join(SCRIPT_DIR, ".canon-backup")
+DEFAULT_SOURCES = ("documents", "verification", "metadata", "LICENSE", "README.md")
+HASHES_FILE = os.path.join("verification", "hashes.json")
+SNAPSHOT_FORMAT = "mw-backup-v1"
+CHUNK_SIZE = 1 << 20
+COMPRESS_LEVEL = 6
+SKIP_DIRS = ("__pycache__", ".git")
+
+
+class BackupError(Exception):
+    """Missing or corrupt snapshot or chunk."""
+
+
+class BackupStore(object):
+    """Chunk and snapshot files under one store directory."""
+
+    def __init__(self, path=DEFAULT_STORE):
+        # type: (str) -> None
+        self.path = path
+        self.chunk_dir = os.path.join(path, "chunks")
+        self.snapshot_dir = os.path.join(path, "snapshots")
+
+    def chunk_path(self, digest):
+        # type: (str) -> str
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def put_chunk(self, digest, data):
+        # type: (str, bytes) -> int
+        """Store a chunk unless present; the compressed bytes written."""
+        path = self.chunk_path(digest)
+        if os.path.exists(path):
+            return 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        packed = zlib.compress(data, COMPRESS_LEVEL)
+        with open(path + ".tmp", "wb") as f:
+            f.write(packed)
+        os.replace(path + ".tmp", path)
+        return len(packed)
+
+    def get_chunk(self, digest):
+        # type: (str) -> bytes
+        """Chunk content, checked against its SHA3-512."""
+        try:
+            with open(self.chunk_path(digest), "rb") as f:
+                data = zlib.decompress(f.read())
+        except (IOError, OSError):
+            raise BackupError("missing chunk %s" % digest[:16])
+        except zlib.error:
+            raise BackupError("corrupt chunk %s" % digest[:16])
+        if hashlib.sha3_512(data).hexdigest() != digest:
+            raise BackupError("chunk %s does not match its hash" % digest[:16])
+        return data
+
+    def chunk_digests(self):
+        # type: () -> Set[str]
+        out = set()
+        if os.path.isdir(self.chunk_dir):
+            for sub in os.listdir(self.chunk_dir):
+                for name in os.listdir(os.path.join(self.chunk_dir, sub)):
+                    if not name.endswith(".tmp"):
+                        out.add(name)
+        return out
+
+    def snapshot_ids(self):
+        # type: () -> List[str]
+        """Snapshot ids, oldest first (ids sort by creation time)."""
+        if not os.path.isdir(self.snapshot_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.snapshot_dir)
+                      if name.endswith(".json"))
+
+    def load_snapshot(self, snapshot_id):
+        # type: (str) -> Dict[str, Any]
+        if snapshot_id == "latest":
+            ids = self.snapshot_ids()
+            if not ids:
+                raise BackupError("no snapshots in %s" % self.path)
+            snapshot_id = ids[-1]
+        path = os.path.join(self.snapshot_dir, snapshot_id + ".json")
+        if not os.path.exists(path):
+            raise BackupError("no snapshot %s" % snapshot_id)
+        with io.open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_snapshot(self, snapshot):
+        # type: (Dict[str, Any]) -> str
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = os.path.join(self.snapshot_dir, snapshot["id"] + ".json")
+        with io.open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=1, sort_keys=True)
+        os.replace(path + ".tmp", path)
+        return path
+
+
+# ═══════════════════════════════════════════════════════════════
+# SNAPSHOT
+# ═══════════════════════════════════════════════════════════════
+
+def iter_files(root, sources):
+    # type: (str, Iterable[str]) -> List[str]
+    """Sorted repository-relative paths (forward slashes) under sources."""
+    out = []
+    for source in sources:
+        top = os.path.join(root, source)
+        if os.path.isfile(top):
+            out.append(source.replace(os.sep, "/"))
+            continue
+        for dirpath, dirs, files in os.walk(top):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            for name in files:
+                out.append(os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/"))
+    return sorted(set(out))
+
+
+def backup_file(store, path):
+    # type: (BackupStore, str) -> Tuple[Dict[str, Any], int, int]
+    """(file entry, new chunks, new compressed bytes) for one file."""
+    whole = hashlib.sha3_512()
+    chunks = []
+    new_chunks = new_bytes = size = 0
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(CHUNK_SIZE), b""):
+            whole.update(data)
+            size += len(data)
+            digest = hashlib.sha3_512(data).hexdigest()
+            chunks.append(digest)
+            written = store.put_chunk(digest, data)
+            if written:
+                new_chunks += 1
+                new_bytes += written
+    entry = {"size": size, "mode": os.stat(path).st_mode & 0o777,
+             "sha3_512": whole.hexdigest(), "chunks": chunks}
+    return entry, new_chunks, new_bytes
+
+
+def load_expected_hashes(path):
+    # type: (str) -> Dict[str, str]
+    """verification/hashes.json: {document filename: SHA3-512}."""
+    with io.open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_hashes(files, expected):
+    # type: (Dict[str, Dict[str, Any]], Dict[str, str]) -> List[str]
+    """Problems with documents listed in expected, using the hashes just
+    computed for the snapshot instead of re-reading every file."""
+    by_name = dict((path.rsplit("/", 1)[-1], entry) for path, entry in files.items()
+                   if path.startswith("documents/"))
+    problems = []
+    for filename, digest in sorted(expected.items()):
+        entry = by_name.get(filename)
+        if entry is None:
+            problems.append("MISSING: %s" % filename)
+        elif entry["sha3_512"] != digest:
+            problems.append("MISMATCH: %s" % filename)
+    return problems
+
+
+def create_snapshot(store, root=SCRIPT_DIR, sources=DEFAULT_SOURCES, expected=None, label=""):
+    # type: (BackupStore, str, Iterable[str], Optional[Dict[str, str]], str) -> Dict[str, Any]
+    """Back up sources and save the manifest; BackupError (and no manifest)
+    if expected hashes are given and a document does not match."""
+    sources = list(sources)
+    files = {}  # type: Dict[str, Dict[str, Any]]
+    new_chunks = new_bytes = 0
+    for path in iter_files(root, sources):
+        entry, n, b = backup_file(store, os.path.join(root, path))
+        files[path] = entry
+        new_chunks += n
+        new_bytes += b
+    if expected is not None:
+        problems = check_hashes(files, expected)
+        if problems:
+            raise BackupError("%d hash problems: %s" % (len(problems), ", ".join(problems[:5])))
+    now = datetime.now(timezone.utc)
+    listing = "".join("%s %s\n" % (p, files[p]["sha3_512"]) for p in sorted(files))
+    snapshot = {
+        "format": SNAPSHOT_FORMAT,
+        "id": now.strftime("%Y%m%dT%H%M%S%fZ"),
+        "created_utc": now.isoformat(),
+        "label": label,
+        "sources": sources,
+        "root_sha3_512": hashlib.sha3_512(listing.encode("utf-8")).hexdigest(),
+        "file_count": len(files),
+        "bytes": sum(e["size"] for e in files.values()),
+        "chunk_count": len(set(c for e in files.values() for c in e["chunks"])),
+        "new_chunks": new_chunks,
+        "new_bytes_stored": new_bytes,
+        "hashes_checked": expected is not None,
+        "files": files,
+    }
+    store.save_snapshot(snapshot)
+    return snapshot
+
+
+# ═══════════════════════════════════════════════════════════════
+# VERIFY / RESTORE / PRUNE
+# ═══════════════════════════════════════════════════════════════
+
+def verify_snapshot(store, snapshot):
+    # type: (BackupStore, Dict[str, Any]) -> List[str]
+    """Problems found reading every file of snapshot back; a bad chunk is
+    reported once, for the first file that uses it."""
+    problems = []
+    bad = {}  # type: Dict[str, str]
+    for path, entry in sorted(snapshot["files"].items()):
+        whole = hashlib.sha3_512()
+        ok = True
+        for digest in entry["chunks"]:
+            if digest in bad:
+                ok = False
+                continue
+            try:
+                data = store.get_chunk(digest)
+            except BackupError as e:
+                bad[digest] = str(e)
+                problems.append("%s: %s" % (path, e))
+                ok = False
+                continue
+            whole.update(data)
+        if ok and whole.hexdigest() != entry["sha3_512"]:
+            problems.append("%s: reassembled file does not match its hash" % path)
+    return problems
+
+
+def restore_snapshot(store, snapshot, dest, prefix=""):
+    # type: (BackupStore, Dict[str, Any], str, str) -> int
+    """Write the snapshot's files (optionally only those under prefix) to
+    dest, verifying each; the number of files restored."""
+    restored = 0
+    for path, entry in sorted(snapshot["files"].items()):
+        if prefix and not path.startswith(prefix):
+            continue
+        target = os.path.join(dest, *path.split("/"))
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        whole = hashlib.sha3_512()
+        with open(target + ".tmp", "wb") as f:
+            for digest in entry["chunks"]:
+                data = store.get_chunk(digest)
+                whole.update(data)
+                f.write(data)
+        if whole.hexdigest() != entry["sha3_512"]:
+            os.remove(target + ".tmp")
+            raise BackupError("%s: restored file does not match its hash" % path)
+        os.replace(target + ".tmp", target)
+        os.chmod(target, entry.get("mode", 0o644))
+        restored += 1
+    return restored
+
+
+def prune(store, keep):
+    # type: (BackupStore, int) -> Tuple[int, int]
+    """Keep the newest `keep` snapshots and the chunks they reference;
+    (snapshots removed, chunks removed). keep must be at least 1."""
+    if keep < 1:
+        raise BackupError("prune needs --keep of at least 1 (got %d)" % keep)
+    ids = store.snapshot_ids()
+    drop = ids[:-keep]
+    for snapshot_id in drop:
+        os.remove(os.path.join(store.snapshot_dir, snapshot_id + ".json"))
+    referenced = set()  # type: Set[str]
+    for snapshot_id in store.snapshot_ids():
+        for entry in store.load_snapshot(snapshot_id)["files"].values():
+            referenced.update(entry["chunks"])
+    orphans = store.chunk_digests() - referenced
+    for digest in orphans:
+        os.remove(store.chunk_path(digest))
+    return len(drop), len(orphans)
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI
+# ═══════════════════════════════════════════════════════════════
+
+def _human(n):
+    # type: (float) -> str
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return "%.1f %s" % (n, unit) if unit != "B" else "%d B" % n
+        n /= 1024.0
+    return "%d B" % n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed canon backups")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="Backup store directory")
+    sub = parser.add_subparsers(dest="command")
+    s = sub.add_parser("snapshot", help="Back up the canon into a new snapshot")
+    s.add_argument("paths", nargs="*", default=list(DEFAULT_SOURCES))
+    s.add_argument("--root", default=SCRIPT_DIR, help="Repository root")
+    s.add_argument("--check-hashes", action="store_true",
+                   help="Refuse to snapshot unless documents match %s" % HASHES_FILE)
+    s.add_argument("--label", default="", help="Free-form snapshot label")
+    sub.add_parser("list", help="List snapshots")
+    v = sub.add_parser("verify", help="Read a snapshot back and check every hash")
+    v.add_argument("snapshot", nargs="?", default="latest")
+    v.add_argument("--all", action="store_true", help="Verify every snapshot")
+    r = sub.add_parser("restore", help="Restore a snapshot into a directory")
+    r.add_argument("snapshot")
+    r.add_argument("dest")
+    r.add_argument("--path", default="", help="Only files under this path prefix")
+    p = sub.add_parser("prune", help="Remove old snapshots and unreferenced chunks")
+    p.add_argument("--keep", type=int, required=True)
+    args = parser.parse_args()
+
+    store = BackupStore(args.store)
+    try:
+        if args.command == "snapshot":
+            expected = (load_expected_hashes(os.path.join(args.root, HASHES_FILE))
+                        if args.check_hashes else None)
+            snap = create_snapshot(store, args.root, args.paths, expected, args.label)
+            if expected is not None:
+                print("All %d document hashes verified." % len(expected))
+            print("Snapshot %s: %d files, %s, %d chunks (%d new, %s stored)" % (
+                snap["id"], snap["file_count"], _human(snap["bytes"]), snap["chunk_count"],
+                snap["new_chunks"], _human(snap["new_bytes_stored"])))
+        elif args.command == "list":
+            for snapshot_id in store.snapshot_ids():
+                snap = store.load_snapshot(snapshot_id)
+                print("%s  %5d files %10s  +%d chunks  %s" % (
+                    snapshot_id, snap["file_count"], _human(snap["bytes"]), snap["new_chunks"],
+                    snap.get("label", "")))
+        elif args.command == "verify":
+            ids = store.snapshot_ids() if args.all else [args.snapshot]
+            failed = 0
+            for snapshot_id in ids:
+                snap = store.load_snapshot(snapshot_id)
+                problems = verify_snapshot(store, snap)
+                failed += bool(problems)
+                print("%s  %s (%d files)" % (snap["id"], "FAIL" if problems else "OK",
+                                             snap["file_count"]))
+                for problem in problems:
+                    print("    %s" % problem)
+            if failed:
+                sys.exit(1)
+        elif args.command == "restore":
+            count = restore_snapshot(store, store.load_snapshot(args.snapshot), args.dest,
+                                     args.path)
+            print("Restored %d files to %s" % (count, args.dest))
+        elif args.command == "prune":
+            snapshots, chunks = prune(store, args.keep)
+            print("Removed %d snapshots and %d unreferenced chunks" % (snapshots, chunks))
+        else:
+            parser.print_help()
+            sys.exit(1)
+    except BackupError as e:
+        print("ERROR: %s" % e)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+MW Infrastructure Stack -- local BM25 retrieval over the canon.
+
+Builds a persistent inverted index over documents/ and
+assistant_portability/vector_store_files/ (chunked by section heading,
+see canon_text.py) and answers top-k queries in milliseconds with no
+external vector database. Chunk text is not duplicated into the index:
+hits are sliced from the memory-mapped chunk store (canon_store.py).
+
+Usage:
+    python canon_bm25.py build                       # (Re)build the index
+    python canon_bm25.py query "volume discounts?"   # Top-5 chunks
+    python canon_bm25.py query "arbitration seat" -k 10
+
+The index is a single JSON file (default
+assistant_portability/retrieval_index/bm25.json). When any corpus file's
+SHA3-512 changes, load_or_build() updates the chunk store incrementally
+and the index catches up by position: postings of tombstoned chunks are
+removed and only the new chunks are tokenized. A compacted store (new
+epoch) triggers a full rebuild.
+
+Python 3.8+ compatible, standard library only.
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from canon_store import DEFAULT_STORE_PATH, ChunkStore, load_or_build_store
+from canon_text import RETRIEVAL_DIR, tokenize
+
+DEFAULT_INDEX_PATH = os.path.join(RETRIEVAL_DIR, "bm25.json")
+INDEX_FORMAT = "mw-bm25-v2"
+K1 = 1.5
+B = 0.75
+
+
+def _term_counts(chunk):
+    # type: (Dict) -> Dict[str, int]
+    counts = {}  # type: Dict[str, int]
+    for term in tokenize(chunk["section"] + "\n" + chunk["text"]):
+        counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+class BM25Index(object):
+    """Okapi BM25 over canon chunks, with a term -> postings inverted index.
+
+    Chunks built in memory keep their text; a loaded index has metadata only
+    and resolves hit text through the attached ChunkStore. Chunk positions
+    match the store's; tombstoned positions (deleted) have no postings.
+    """
+
+    def __init__(self, chunks, postings, doc_lengths, signature="", k1=K1, b=B, store=None,
+                 deleted=None, store_epoch=""):
+        # type: (List[Dict], Dict[str, List[List[int]]], List[int], str, float, float, Optional[ChunkStore], Optional[Iterable[int]], str) -> None
+        self.chunks = chunks
+        self.store = store
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.signature = signature
+        self.k1 = k1
+        self.b = b
+        self.deleted = set(deleted or ())
+        self.store_epoch = store_epoch
+        self._refresh()
+
+    def _refresh(self):
+        # type: () -> None
+        n = len(self.doc_lengths) - len(self.deleted)
+        self.avgdl = float(sum(self.doc_lengths)) / n if n > 0 else 0.0
+        self.idf = dict(
+            (term, math.log(1.0 + (n - len(plist) + 0.5) / (len(plist) + 0.5)))
+            for term, plist in self.postings.items())
+
+    @classmethod
+    def build(cls, chunks, signature="", k1=K1, b=B, store=None, deleted=()):
+        # type: (List[Dict], str, float, float, Optional[ChunkStore], Iterable[int]) -> BM25Index
+        index = cls([], {}, [], signature, k1, b, store, deleted,
+                    store.epoch if store is not None else "")
+        for chunk in chunks:
+            index._append(chunk)
+        index._refresh()
+        return index
+
+    def _append(self, chunk):
+        # type: (Dict) -> None
+        idx = len(self.chunks)
+        self.chunks.append(chunk)
+        if idx in self.deleted:
+            self.doc_lengths.append(0)
+            return
+        counts = _term_counts(chunk)
+        self.doc_lengths.append(sum(counts.values()))
+        for term, tf in counts.items():
+            self.postings.setdefault(term, []).append([idx, tf])
+
+    def _remove(self, idx, chunk):
+        # type: (int, Dict) -> None
+        """Drop a chunk's postings; chunk must carry the text it was indexed with."""
+        for term in _term_counts(chunk):
+            plist = self.postings.get(term, [])
+            self.postings[term] = [p for p in plist if p[0] != idx]
+            if not self.postings[term]:
+                del self.postings[term]
+        self.doc_lengths[idx] = 0
+        self.deleted.add(idx)
+
+    def sync(self, store):
+        # type: (ChunkStore) -> bool
+        """Catch up with an incrementally updated store.
+
+        Work is proportional to the change: tombstoned chunks are re-read
+        from the pack (their bytes stay until compaction) to remove their
+        postings, and only appended chunks are tokenized. Returns False when
+        the store was rebuilt or compacted and the index must be rebuilt.
+        """
+        if store.epoch != self.store_epoch or len(self.chunks) > len(store):
+            return False
+        self.store = store
+        for idx in sorted(store.deleted):
+            if idx < len(self.chunks) and idx not in self.deleted:
+                self._remove(idx, store.chunk_with_text(idx))
+        for idx in range(len(self.chunks), len(store)):
+            if idx in store.deleted:
+                self.deleted.add(idx)
+                self.chunks.append(store.chunks[idx])
+                self.doc_lengths.append(0)
+            else:
+                self._append(store.chunk_with_text(idx))
+                self.chunks[idx] = store.chunks[idx]
+        self.signature = store.signature
+        self._refresh()
+        return True
+
+    def _resolve(self, idx):
+        # type: (int) -> Dict
+        chunk = self.chunks[idx]
+        if "text" in chunk or self.store is None:
+            return chunk
+        return self.store.chunk_with_text(chunk["id"])
+
+    def search(self, query, k=5):
+        # type: (str, int) -> List[Tuple[float, Dict]]
+        """Top-k (score, chunk) pairs for a free-text query."""
+        scores = {}  # type: Dict[int, float]
+        k1, b, avgdl = self.k1, self.b, self.avgdl or 1.0
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self.idf[term]
+            for idx, tf in plist:
+                norm = k1 * (1.0 - b + b * self.doc_lengths[idx] / avgdl)
+                scores[idx] = scores.get(idx, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(score, self._resolve(idx)) for idx, score in top]
+
+    def to_dict(self):
+        # type: () -> Dict[str, Any]
+        return {
+            "format": INDEX_FORMAT,
+            "signature": self.signature,
+            "k1": self.k1,
+            "b": self.b,
+            "chunks": [dict((k, v) for k, v in c.items() if k != "text") for c in self.chunks],
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings,
+            "deleted": sorted(self.deleted),
+            "store_epoch": self.store_epoch,
+        }
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        # type: (str) -> str
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH, store=None):
+        # type: (str, Optional[ChunkStore]) -> BM25Index
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") != INDEX_FORMAT:
+            raise ValueError("%s: not a %s index" % (path, INDEX_FORMAT))
+        return cls(data["chunks"], data["postings"], data["doc_lengths"],
+                   data.get("signature", ""), data.get("k1", K1), data.get("b", B), store,
+                   data.get("deleted"), data.get("store_epoch", ""))
+
+
+def build_index(path=DEFAULT_INDEX_PATH, store=None):
+    # type: (str, Optional[ChunkStore]) -> BM25Index
+    if store is None:
+        store = load_or_build_store()
+    chunks = [store.chunk_with_text(n) for n in range(len(store))]
+    index = BM25Index.build(chunks, signature=store.signature, store=store, deleted=store.deleted)
+    index.save(path)
+    return index
+
+
+def load_or_build(path=DEFAULT_INDEX_PATH, store_path=DEFAULT_STORE_PATH):
+    # type: (str, str) -> BM25Index
+    """Load the saved index, bringing it (and the store) up to date."""
+    store = load_or_build_store(store_path)
+    if os.path.exists(path):
+        try:
+            index = BM25Index.load(path, store)
+            if index.signature == store.signature and index.store_epoch == store.epoch:
+                return index
+            if index.sync(store):
+                index.save(path)
+                return index
+        except (ValueError, KeyError):
+            pass
+    return build_index(path, store)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local BM25 index over the MW canon")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Index file path")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("build", help="Build (or rebuild) the index")
+    q = sub.add_parser("query", help="Query the index")
+    q.add_argument("text")
+    q.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.time()
+        index = build_index(args.index)
+        print("Indexed %d chunks (%d terms) in %.2fs -> %s (%s bytes)" % (
+            len(index.chunks), len(index.postings), time.time() - start,
+            args.index, "{:,}".format(os.path.getsize(args.index))))
+    elif args.command == "query":
+        index = load_or_build(args.index)
+        start = time.time()
+        hits = index.search(args.text, k=args.k)
+        elapsed_ms = (time.time() - start) * 1000
+        for score, chunk in hits:
+            print("%7.3f  %-8s %s" % (score, chunk["doc_id"], chunk["section"][:70]))
+        print("(%d results in %.2f ms)" % (len(hits), elapsed_ms))
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
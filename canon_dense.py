@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+MW Infrastructure Stack -- offline dense-embedding index over the canon.
+
+An in-repo alternative to running ChromaDB: chunk embeddings live in a
+float32 .npy matrix (memory-mapped on load) next to a JSON metadata file,
+and search is plain NumPy:
+
+  - exact: one matrix multiplication per batch of queries, then a
+    partial sort for the top-k;
+  - IVF (--nlist N): vectors are partitioned by spherical k-means and a
+    query only scores the vectors in its nprobe closest partitions, for
+    corpora where the exact scan gets too slow.
+
+The embedder is pluggable. The default, "hashing", is a deterministic
+hashing-trick embedder (signed feature hashing of unigrams and bigrams,
+sublinear tf, L2-normalized): no model download, identical vectors on
+every machine. Any other embedder is given as "package.module:factory",
+where factory() returns an object with .name, .dim and .embed(texts)
+returning an (n, dim) float32 array.
+
+Usage:
+    python canon_dense.py build                        # Exact index, hashing embedder
+    python canon_dense.py build --nlist 32             # IVF-partitioned index
+    python canon_dense.py query "volume discounts" -k 5 --nprobe 4
+
+Like the BM25 index, a saved dense index catches up with incremental chunk
+store updates (canon_store.update_store): only appended chunks are
+embedded, tombstoned rows are excluded from search, and new vectors join
+the IVF list of their nearest existing centroid. A compacted store
+triggers a full rebuild (and a fresh k-means).
+
+Python 3.8+ compatible. Requires numpy (pip install numpy).
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import math
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from canon_store import DEFAULT_STORE_PATH, ChunkStore, load_or_build_store
+from canon_text import RETRIEVAL_DIR, tokenize
+
+DEFAULT_DENSE_PATH = os.path.join(RETRIEVAL_DIR, "dense")
+DENSE_FORMAT = "mw-dense-v1"
+DEFAULT_EMBEDDER = "hashing"
+DEFAULT_DIM = 512
+DEFAULT_NPROBE = 4
+KMEANS_ITERATIONS = 20
+
+
+def _require_numpy():
+    if not HAS_NUMPY:
+        raise ImportError("The dense index needs NumPy: pip install numpy")
+
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+# ═══════════════════════════════════════════════════════════════
+# EMBEDDERS
+# ═══════════════════════════════════════════════════════════════
+
+class HashingEmbedder(object):
+    """Deterministic signed feature hashing of unigrams (+ bigrams)."""
+
+    def __init__(self, dim=DEFAULT_DIM, bigrams=True):
+        # type: (int, bool) -> None
+        self.dim = dim
+        self.bigrams = bigrams
+        self.name = "hashing-%d%s-v1" % (dim, "-bigram" if bigrams else "")
+        self._slots = {}  # type: Dict[str, Tuple[int, float]]
+
+    def _slot(self, feature):
+        # type: (str) -> Tuple[int, float]
+        slot = self._slots.get(feature)
+        if slot is None:
+            h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+            slot = (h % self.dim, 1.0 if h >> 63 else -1.0)
+            self._slots[feature] = slot
+        return slot
+
+    def embed(self, texts):
+        # type: (List[str]) -> Any
+        _require_numpy()
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            terms = tokenize(text)
+            features = list(terms)
+            if self.bigrams:
+                features.extend("%s %s" % pair for pair in zip(terms, terms[1:]))
+            counts = {}  # type: Dict[str, int]
+            for feature in features:
+                counts[feature] = counts.get(feature, 0) + 1
+            for feature, tf in counts.items():
+                slot, sign = self._slot(feature)
+                out[row, slot] += sign * (1.0 + math.log(tf))
+        return normalize_rows(out)
+
+
+def load_embedder(spec=DEFAULT_EMBEDDER):
+    # type: (str) -> Any
+    """"hashing", "hashing:<dim>", or "package.module:factory"."""
+    if spec == "hashing" or spec.startswith("hashing:"):
+        dim = int(spec.split(":", 1)[1]) if ":" in spec else DEFAULT_DIM
+        return HashingEmbedder(dim)
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError("Embedder must be 'hashing[:dim]' or 'module:factory', got %r" % spec)
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+# ═══════════════════════════════════════════════════════════════
+# IVF
+# ═══════════════════════════════════════════════════════════════
+
+def kmeans(vectors, nlist, iterations=KMEANS_ITERATIONS, seed=0):
+    # type: (Any, int, int, int) -> Tuple[Any, Any]
+    """Spherical k-means; returns (centroids, assignment). Deterministic per seed."""
+    rng = np.random.default_rng(seed)
+    nlist = min(nlist, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        empty = np.bincount(assign, minlength=nlist) == 0
+        sums[empty] = vectors[rng.integers(len(vectors), size=int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+def _ivf_lists(ids, assign, nlist):
+    # type: (Any, Any, int) -> Tuple[Any, Any]
+    """(order, offsets): ids grouped by partition, and each group's start."""
+    order = ids[np.argsort(assign, kind="stable")].astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))])
+    return order, offsets
+
+
+def _top_k(scores, ids, k):
+    # type: (Any, Any, int) -> List[Tuple[int, float]]
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(len(scores))
+    order = part[np.argsort(-scores[part], kind="stable")]
+    return [(int(ids[i]), float(scores[i])) for i in order]
+
+
+# ═══════════════════════════════════════════════════════════════
+# INDEX
+# ═══════════════════════════════════════════════════════════════
+
+class DenseIndex(object):
+    """Chunk embeddings with exact or IVF top-k search.
+
+    Like BM25Index, a loaded index keeps chunk metadata only and resolves
+    hit text through the attached ChunkStore. Rows of tombstoned chunks
+    (deleted) are zero and never returned.
+    """
+
+    def __init__(self, vectors, chunks, embedder, signature="", centroids=None,
+                 order=None, offsets=None, store=None, deleted=None, store_epoch="",
+                 requested_nlist=None):
+        # type: (Any, List[Dict], Any, str, Any, Any, Any, Optional[ChunkStore], Optional[Iterable[int]], str, Optional[int]) -> None
+        _require_numpy()
+        self.vectors = vectors
+        self.chunks = chunks
+        self.embedder = embedder
+        self.signature = signature
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.store = store
+        self.deleted = set(deleted or ())
+        self.store_epoch = store_epoch
+        # kmeans caps the partitions at the number of vectors, so the nlist
+        # asked for is kept separately to recognise the index on reload
+        self.requested_nlist = self.nlist if requested_nlist is None else requested_nlist
+
+    def _live_ids(self):
+        # type: () -> Any
+        if not self.deleted:
+            return np.arange(len(self.chunks))
+        return np.array([n for n in range(len(self.chunks)) if n not in self.deleted],
+                        dtype=np.int64)
+
+    @property
+    def nlist(self):
+        # type: () -> int
+        return 0 if self.centroids is None else len(self.centroids)
+
+    @classmethod
+    def build(cls, chunks, embedder, signature="", nlist=0, store=None, seed=0, deleted=()):
+        # type: (List[Dict], Any, str, int, Optional[ChunkStore], int, Iterable[int]) -> DenseIndex
+        index = cls(None, chunks, embedder, signature, store=store, deleted=deleted,
+                    store_epoch=store.epoch if store is not None else "", requested_nlist=nlist)
+        live = index._live_ids()
+        vectors = np.zeros((len(chunks), embedder.dim), dtype=np.float32)
+        if len(live):
+            vectors[live] = embedder.embed([chunks[n]["section"] + "\n" + chunks[n]["text"]
+                                            for n in live])
+        index.vectors = vectors
+        if nlist and len(live):
+            index.centroids, assign = kmeans(vectors[live], nlist, seed=seed)
+            index.order, index.offsets = _ivf_lists(live, assign, len(index.centroids))
+        return index
+
+    def sync(self, store):
+        # type: (ChunkStore) -> bool
+        """Catch up with an incrementally updated store (see BM25Index.sync).
+
+        Only appended live chunks are embedded. Returns False when the
+        store was rebuilt or compacted and the index must be rebuilt.
+        """
+        if store.epoch != self.store_epoch or len(self.chunks) > len(store):
+            return False
+        old = len(self.chunks)
+        new_live = [n for n in range(old, len(store)) if n not in store.deleted]
+        added = np.zeros((len(store) - old, self.vectors.shape[1]), dtype=np.float32)
+        if new_live:
+            texts = [store.chunks[n]["section"] + "\n" + store.chunk_text(n) for n in new_live]
+            added[[n - old for n in new_live]] = self.embedder.embed(texts)
+        assign = None
+        if self.centroids is not None:
+            assign = np.zeros(len(store), dtype=np.int64)
+            for c in range(self.nlist):
+                assign[self.order[self.offsets[c]:self.offsets[c + 1]]] = c
+        self.vectors = np.concatenate([np.asarray(self.vectors), added])
+        self.chunks = self.chunks + store.chunks[old:]
+        self.deleted = set(store.deleted)
+        if assign is not None:
+            if new_live:
+                assign[new_live] = np.argmax(self.vectors[new_live] @ self.centroids.T, axis=1)
+            live = self._live_ids()
+            self.order, self.offsets = _ivf_lists(live, assign[live], self.nlist)
+        self.store = store
+        self.signature = store.signature
+        return True
+
+    def search_vectors(self, queries, k=5, nprobe=DEFAULT_NPROBE):
+        # type: (Any, int, int) -> List[List[Tuple[int, float]]]
+        """Top-k (chunk index, cosine) per query row."""
+        if nprobe < 1:
+            raise ValueError("nprobe must be at least 1, got %d" % nprobe)
+        if not len(self.chunks):
+            return [[] for _ in range(len(queries))]
+        if self.centroids is None:
+            ids = self._live_ids()
+            scores = queries @ self.vectors.T
+            if self.deleted:
+                scores = scores[:, ids]
+            return [_top_k(row, ids, k) for row in scores]
+        results = []
+        probe = min(nprobe, self.nlist)
+        for q in queries:
+            nearest = np.argpartition(-(self.centroids @ q), probe - 1)[:probe]
+            candidates = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]]
+                                         for c in nearest])
+            results.append(_top_k(self.vectors[candidates] @ q, candidates, k))
+        return results
+
+    def search_batch(self, queries, k=5, nprobe=DEFAULT_NPROBE):
+        # type: (List[str], int, int) -> List[List[Tuple[float, Dict]]]
+        hits = self.search_vectors(self.embedder.embed(queries), k, nprobe)
+        return [[(score, self._resolve(idx)) for idx, score in row] for row in hits]
+
+    def search(self, query, k=5, nprobe=DEFAULT_NPROBE):
+        # type: (str, int, int) -> List[Tuple[float, Dict]]
+        return self.search_batch([query], k, nprobe)[0]
+
+    def _resolve(self, idx):
+        # type: (int) -> Dict
+        chunk = self.chunks[idx]
+        if "text" in chunk or self.store is None:
+            return chunk
+        return self.store.chunk_with_text(chunk["id"])
+
+    def save(self, path=DEFAULT_DENSE_PATH):
+        # type: (str) -> str
+        """Write <path>.npy, <path>.json and, for IVF, <path>_ivf.npz."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.save(path + ".npy", np.ascontiguousarray(self.vectors, dtype=np.float32))
+        if self.centroids is not None:
+            np.savez(path + "_ivf.npz", centroids=self.centroids, order=self.order,
+                     offsets=self.offsets)
+        elif os.path.exists(path + "_ivf.npz"):
+            os.remove(path + "_ivf.npz")
+        meta = {
+            "format": DENSE_FORMAT,
+            "signature": self.signature,
+            "embedder": self.embedder.name,
+            "dim": int(self.vectors.shape[1]),
+            "nlist": self.nlist,
+            "requested_nlist": self.requested_nlist,
+            "chunks": [dict((k, v) for k, v in c.items() if k != "text") for c in self.chunks],
+            "deleted": sorted(self.deleted),
+            "store_epoch": self.store_epoch,
+        }
+        with open(path + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, separators=(",", ":"))
+        return path
+
+    @classmethod
+    def load(cls, path=DEFAULT_DENSE_PATH, embedder=None, store=None):
+        # type: (str, Any, Optional[ChunkStore]) -> DenseIndex
+        _require_numpy()
+        with open(path + ".json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != DENSE_FORMAT:
+            raise ValueError("%s: not a %s index" % (path, DENSE_FORMAT))
+        if embedder is None:
+            embedder = load_embedder()
+        if embedder.name != meta["embedder"]:
+            raise ValueError("%s was built with %s, not %s" % (path, meta["embedder"], embedder.name))
+        vectors = np.load(path + ".npy", mmap_mode="r")
+        centroids = order = offsets = None
+        if meta.get("nlist"):
+            with np.load(path + "_ivf.npz") as ivf:
+                centroids, order, offsets = ivf["centroids"], ivf["order"], ivf["offsets"]
+        return cls(vectors, meta["chunks"], embedder, meta.get("signature", ""),
+                   centroids, order, offsets, store, meta.get("deleted"),
+                   meta.get("store_epoch", ""), meta.get("requested_nlist"))
+
+
+def build_dense(path=DEFAULT_DENSE_PATH, embedder=None, nlist=0, store=None):
+    # type: (str, Any, int, Optional[ChunkStore]) -> DenseIndex
+    if embedder is None:
+        embedder = load_embedder()
+    if store is None:
+        store = load_or_build_store()
+    chunks = [store.chunk_with_text(n) for n in range(len(store))]
+    index = DenseIndex.build(chunks, embedder, store.signature, nlist, store,
+                             deleted=store.deleted)
+    index.save(path)
+    return index
+
+
+def load_or_build_dense(path=DEFAULT_DENSE_PATH, embedder=None, nlist=0,
+                        store_path=DEFAULT_STORE_PATH):
+    # type: (str, Any, int, str) -> DenseIndex
+    """Load the saved index, catching up with corpus changes; rebuild it if
+    the embedder or nlist changed or the store was compacted."""
+    if embedder is None:
+        embedder = load_embedder()
+    store = load_or_build_store(store_path)
+    if os.path.exists(path + ".json") and os.path.exists(path + ".npy"):
+        try:
+            index = DenseIndex.load(path, embedder, store)
+            if index.requested_nlist == nlist:
+                if index.signature == store.signature and index.store_epoch == store.epoch:
+                    return index
+                if index.sync(store):
+                    index.save(path)
+                    return index
+        except (ValueError, KeyError, OSError):
+            pass
+    return build_dense(path, embedder, nlist, store)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline dense-embedding index over the MW canon")
+    parser.add_argument("--index", default=DEFAULT_DENSE_PATH, help="Index path prefix")
+    parser.add_argument("--embedder", default=DEFAULT_EMBEDDER,
+                        help="'hashing', 'hashing:<dim>' or 'module:factory'")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF partitions (0 = exact search)")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("build", help="Build (or rebuild) the index")
+    q = sub.add_parser("query", help="Query the index")
+    q.add_argument("text")
+    q.add_argument("-k", type=int, default=5)
+    q.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE)
+    args = parser.parse_args()
+
+    if not HAS_NUMPY:
+        print("ERROR: numpy required. pip install numpy")
+        sys.exit(1)
+    embedder = load_embedder(args.embedder)
+    if args.command == "build":
+        start = time.time()
+        index = build_dense(args.index, embedder, args.nlist)
+        print("Embedded %d chunks (%s, nlist=%d) in %.2fs -> %s.npy (%s bytes)" % (
+            len(index.chunks), embedder.name, index.nlist, time.time() - start,
+            args.index, "{:,}".format(os.path.getsize(args.index + ".npy"))))
+    elif args.command == "query":
+        index = load_or_build_dense(args.index, embedder, args.nlist)
+        start = time.time()
+        hits = index.search(args.text, k=args.k, nprobe=args.nprobe)
+        elapsed_ms = (time.time() - start) * 1000
+        for score, chunk in hits:
+            print("%7.4f  %-8s %s" % (score, chunk["doc_id"], chunk["section"][:70]))
+        print("(%d results in %.2f ms)" % (len(hits), elapsed_ms))
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
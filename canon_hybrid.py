@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+MW Infrastructure Stack -- hybrid lexical + dense retrieval.
+
+Cross-document questions (the attorney persona's DOC-017 / DOC-035 /
+DOC-036 ones) need exact term hits and semantic matches at once, so the
+hybrid retriever runs three stages per query:
+
+  1. lexical  BM25 top-N (canon_bm25.py)           } run concurrently
+  2. dense    embedding top-N (canon_dense.py)     }
+     fused with reciprocal rank fusion: score = sum w / (rrf_k + rank),
+     w being the per-retriever weight (1.0 each by default)
+  3. rerank   optional pluggable reranker over the fused candidates
+
+Every stage has its own latency budget in milliseconds and its own worker
+pool, and the budget is counted from when the stage starts running, so a
+slow call that overruns (it cannot be interrupted) delays only later calls
+of that stage instead of eating into every query's budget. A call still
+queued after QUEUE_TIMEOUT_MS is cancelled and counted as a timeout. A
+retrieval stage that misses its budget is left out of the fusion (the
+query is answered from the other one); if both miss it the query raises
+RetrievalTimeout. A reranker that misses it leaves the fused order in
+place. Per-stage timings and timeouts are kept for /metrics
+(assistant_server.py) and stage_summary().
+
+Rerankers are "terms" (built in: share of distinct query terms in the
+chunk, fused score as tie-break) or "package.module:factory", where
+factory() returns a callable (query, [(score, chunk)]) -> [(score, chunk)].
+
+Usage:
+    python canon_hybrid.py query "arbitration between authorities" -k 5
+    python canon_hybrid.py --reranker terms --budget-dense 20 query "..."
+    python canon_hybrid.py --dense-weight 0.2 query "..."
+
+Python 3.8+ compatible. Requires numpy (pip install numpy) for the dense stage.
+"""
+
+import argparse
+import collections
+import importlib
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from canon_text import tokenize
+from qa_metrics import percentile
+
+DEFAULT_RRF_K = 60
+DEFAULT_CANDIDATES = 50
+DEFAULT_BUDGETS_MS = {"lexical": 50.0, "dense": 50.0, "rerank": 20.0}
+DEFAULT_WEIGHTS = {"lexical": 1.0, "dense": 1.0}
+STAGES = ("lexical", "dense", "rerank")
+STAGE_WORKERS = 4
+QUEUE_TIMEOUT_MS = 1000.0
+TIMING_HISTORY = 1024
+
+
+class RetrievalTimeout(RuntimeError):
+    """Every retrieval stage missed its budget; there was nothing to fuse."""
+
+
+# ═══════════════════════════════════════════════════════════════
+# FUSION / RERANKING
+# ═══════════════════════════════════════════════════════════════
+
+def reciprocal_rank_fusion(rankings, rrf_k=DEFAULT_RRF_K, weights=None):
+    # type: (List[List[Tuple[float, Dict]]], int, Optional[List[float]]) -> List[Tuple[float, Dict]]
+    """Fuse ranked (score, chunk) lists by chunk id; best fused score first."""
+    scores = {}  # type: Dict[str, float]
+    chunks = {}  # type: Dict[str, Dict]
+    for n, ranking in enumerate(rankings):
+        weight = weights[n] if weights else 1.0
+        for rank, (_, chunk) in enumerate(ranking, 1):
+            scores[chunk["id"]] = scores.get(chunk["id"], 0.0) + weight / (rrf_k + rank)
+            chunks.setdefault(chunk["id"], chunk)
+    ordered = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [(score, chunks[chunk_id]) for chunk_id, score in ordered]
+
+
+class TermOverlapReranker(object):
+    """Order candidates by the share of distinct query terms they contain."""
+
+    name = "terms"
+
+    def __call__(self, query, candidates):
+        # type: (str, List[Tuple[float, Dict]]) -> List[Tuple[float, Dict]]
+        terms = set(tokenize(query))
+        if not terms:
+            return candidates
+        scored = []
+        for score, chunk in candidates:
+            present = set(tokenize(chunk["section"] + "\n" + chunk["text"]))
+            scored.append((float(len(terms & present)) / len(terms), score, chunk))
+        scored.sort(key=lambda item: (-item[0], -item[1]))
+        return [(score, chunk) for _, score, chunk in scored]
+
+
+def load_reranker(spec):
+    # type: (Optional[str]) -> Optional[Callable]
+    """None/"none", "terms", or "package.module:factory"."""
+    if not spec or spec == "none":
+        return None
+    if spec == "terms":
+        return TermOverlapReranker()
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError("Reranker must be 'none', 'terms' or 'module:factory', got %r" % spec)
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+# ═══════════════════════════════════════════════════════════════
+# RETRIEVER
+# ═══════════════════════════════════════════════════════════════
+
+class _StageClock(object):
+    """Set by the worker when a stage call starts running."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.started = 0.0
+
+    def start(self):
+        # type: () -> None
+        self.started = time.perf_counter()
+        self.event.set()
+
+
+class HybridIndex(object):
+    """BM25 + dense retrieval fused with RRF, with per-stage latency budgets.
+
+    Exposes the search()/chunks/signature interface of the single indexes,
+    so canon_rag.select_context and assistant_server use it unchanged.
+    """
+
+    def __init__(self, lexical, dense, reranker=None, rrf_k=DEFAULT_RRF_K,
+                 candidates=DEFAULT_CANDIDATES, budgets_ms=None, weights=None,
+                 workers=STAGE_WORKERS, queue_timeout_ms=QUEUE_TIMEOUT_MS):
+        # type: (Any, Any, Optional[Callable], int, int, Optional[Dict[str, float]], Optional[Dict[str, float]], int, float) -> None
+        self.lexical = lexical
+        self.dense = dense
+        self.reranker = reranker
+        self.rrf_k = rrf_k
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.weights.update(weights or {})
+        self.candidates = candidates
+        self.budgets_ms = dict(DEFAULT_BUDGETS_MS)
+        self.budgets_ms.update(budgets_ms or {})
+        self.executors = dict((stage, ThreadPoolExecutor(max_workers=workers))
+                              for stage in STAGES)
+        self.queue_timeout = queue_timeout_ms / 1000.0
+        self.timings = dict((stage, collections.deque(maxlen=TIMING_HISTORY)) for stage in STAGES)
+        self.timeouts = dict((stage, 0) for stage in STAGES)
+
+    @property
+    def chunks(self):
+        # type: () -> List[Dict]
+        return self.lexical.chunks
+
+    @property
+    def signature(self):
+        # type: () -> str
+        return self.lexical.signature
+
+    def _budget(self, stage):
+        # type: (str) -> Optional[float]
+        budget = self.budgets_ms.get(stage)
+        return budget / 1000.0 if budget else None
+
+    def _submit(self, stage, fn, *args):
+        # type: (str, Callable, Any) -> Tuple[Any, _StageClock]
+        clock = _StageClock()
+        return self.executors[stage].submit(self._timed, stage, clock, fn, *args), clock
+
+    def _await(self, stage, submitted):
+        # type: (str, Tuple[Any, _StageClock]) -> Optional[Tuple[Any, float]]
+        """Wait for a stage's (result, seconds) until its budget, counted
+        from when the call started running, runs out; None on timeout."""
+        future, clock = submitted
+        budget = self._budget(stage)
+        if budget is None:
+            return future.result()
+        if not clock.event.wait(self.queue_timeout) and future.cancel():
+            self.timeouts[stage] += 1
+            return None
+        clock.event.wait()
+        try:
+            result = future.result(timeout=max(0.0, clock.started + budget - time.perf_counter()))
+        except FutureTimeout:
+            self.timeouts[stage] += 1
+            return None
+        return result
+
+    def _timed(self, stage, clock, fn, *args):
+        # type: (str, _StageClock, Callable, Any) -> Tuple[Any, float]
+        clock.start()
+        start = clock.started
+        try:
+            result = fn(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[stage].append(elapsed)
+        return result, elapsed
+
+    def search_with_timings(self, query, k=5):
+        # type: (str, int) -> Tuple[List[Tuple[float, Dict]], Dict[str, Any]]
+        """Top-k fused hits plus {stage: seconds or "timeout"/"skipped"}.
+
+        Raises RetrievalTimeout when both retrieval stages time out.
+        """
+        depth = max(k, self.candidates)
+        submitted = {
+            "lexical": self._submit("lexical", self.lexical.search, query, depth),
+            "dense": self._submit("dense", self.dense.search, query, depth),
+        }
+        rankings = []
+        weights = []
+        report = {}  # type: Dict[str, Any]
+        for stage in ("lexical", "dense"):
+            done = self._await(stage, submitted[stage])
+            if done is None:
+                report[stage] = "timeout"
+                continue
+            hits, report[stage] = done
+            rankings.append(hits)
+            weights.append(self.weights[stage])
+        if not rankings:
+            raise RetrievalTimeout("lexical (%s ms) and dense (%s ms) retrieval both missed "
+                                   "their budgets" % (self.budgets_ms.get("lexical"),
+                                                      self.budgets_ms.get("dense")))
+        fused = reciprocal_rank_fusion(rankings, self.rrf_k, weights)
+        if self.reranker is None or not fused:
+            report["rerank"] = "skipped"
+            return fused[:k], report
+        done = self._await("rerank", self._submit("rerank", self.reranker, query, fused))
+        if done is None:
+            report["rerank"] = "timeout"
+            return fused[:k], report
+        reranked, report["rerank"] = done
+        return reranked[:k], report
+
+    def search(self, query, k=5):
+        # type: (str, int) -> List[Tuple[float, Dict]]
+        return self.search_with_timings(query, k)[0]
+
+    def stage_summary(self):
+        # type: () -> Dict[str, Dict[str, Any]]
+        """Latency percentiles (ms), budget and timeout count per stage."""
+        out = {}
+        for stage in STAGES:
+            values = [t * 1000.0 for t in self.timings[stage]]
+            out[stage] = {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 0.5), 3),
+                "p90_ms": round(percentile(values, 0.9), 3),
+                "p99_ms": round(percentile(values, 0.99), 3),
+                "timeouts": self.timeouts[stage],
+                "budget_ms": self.budgets_ms.get(stage),
+            }
+        return out
+
+    def close(self):
+        # type: () -> None
+        for executor in self.executors.values():
+            executor.shutdown(wait=False)
+
+
+def load_or_build_hybrid(reranker=None, budgets_ms=None, weights=None, nlist=0):
+    # type: (Optional[str], Optional[Dict[str, float]], Optional[Dict[str, float]], int) -> HybridIndex
+    """Hybrid retriever over the cached BM25 and dense indexes."""
+    from canon_bm25 import load_or_build
+    from canon_dense import load_or_build_dense
+    return HybridIndex(load_or_build(), load_or_build_dense(nlist=nlist),
+                       reranker=load_reranker(reranker), budgets_ms=budgets_ms, weights=weights)
+
+
+def add_hybrid_args(parser, budgets_ms=None):
+    # type: (argparse.ArgumentParser, Optional[Dict[str, float]]) -> None
+    """--reranker, --dense-weight and one --budget-<stage> per stage
+    (defaults: budgets_ms, else DEFAULT_BUDGETS_MS)."""
+    budgets = dict(DEFAULT_BUDGETS_MS, **(budgets_ms or {}))
+    parser.add_argument("--reranker", default="none", help="'none', 'terms' or 'module:factory'")
+    parser.add_argument("--dense-weight", type=float, default=DEFAULT_WEIGHTS["dense"],
+                        help="RRF weight of the dense ranking (lexical is 1.0)")
+    for stage in STAGES:
+        parser.add_argument("--budget-%s" % stage, type=float, default=budgets[stage],
+                            help="%s stage latency budget in ms (0 = unlimited)" % stage)
+
+
+def hybrid_options(args):
+    # type: (argparse.Namespace) -> Dict[str, Any]
+    """load_or_build_hybrid() keyword arguments from add_hybrid_args() flags."""
+    return {
+        "reranker": args.reranker,
+        "budgets_ms": {"lexical": args.budget_lexical, "dense": args.budget_dense,
+                       "rerank": args.budget_rerank},
+        "weights": {"lexical": 1.0, "dense": args.dense_weight},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hybrid BM25 + dense retrieval over the MW canon")
+    add_hybrid_args(parser)
+    sub = parser.add_subparsers(dest="command")
+    q = sub.add_parser("query", help="Query the hybrid retriever")
+    q.add_argument("text")
+    q.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command != "query":
+        parser.print_help()
+        sys.exit(1)
+    index = load_or_build_hybrid(**hybrid_options(args))
+    try:
+        hits, timings = index.search_with_timings(args.text, k=args.k)
+    finally:
+        index.close()
+    for score, chunk in hits:
+        print("%7.4f  %-8s %s" % (score, chunk["doc_id"], chunk["section"][:70]))
+    print("(%d results; %s)" % (len(hits), ", ".join(
+        "%s %s" % (stage, value if isinstance(value, str) else "%.2f ms" % (value * 1000))
+        for stage, value in timings.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+MW Infrastructure Stack -- retrieval-augmented prompt assembly.
+
+Instead of pasting the instructions plus every FAQ file into the system
+prompt on every call, retrieve the top-k canon chunks for the question
+(canon_bm25.py), drop duplicate/overlapping chunks, and keep adding them
+in rank order until the context token budget is spent.
+
+Usage:
+    python canon_rag.py                          # Savings over golden_qa_pairs.json
+    python canon_rag.py -k 8 --budget 3000       # Different retrieval settings
+    python canon_rag.py --out rag_savings.json   # Also save the per-question report
+
+Token counts are estimates (characters / 4), used consistently for the
+baseline and the retrieved prompt, so the savings ratio is meaningful even
+though absolute counts are approximate.
+
+Python 3.8+ compatible, standard library only.
+"""
+
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+from typing import Any, Dict, List, Tuple
+
+from canon_bm25 import BM25Index, DEFAULT_INDEX_PATH, load_or_build
+from canon_text import SCRIPT_DIR
+
+DEFAULT_TOP_K = 6
+DEFAULT_TOKEN_BUDGET = 1500
+CHARS_PER_TOKEN = 4
+CANDIDATE_FACTOR = 3
+ASSISTANT_CONFIG = os.path.join(SCRIPT_DIR, "assistant_portability", "assistant_config.json")
+GOLDEN_QA_FILE = os.path.join(SCRIPT_DIR, "assistant_portability", "golden_qa_pairs.json")
+CONTEXT_HEADER = "\n\n## RETRIEVED CANON EXCERPTS\n"
+CITED_DOC_RE = re.compile(r"\b(?:DOC-|Document\s+)0*(\d{1,3})\b")
+
+
+def estimate_tokens(text):
+    # type: (str) -> int
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+# ═══════════════════════════════════════════════════════════════
+# CONTEXT SELECTION
+# ═══════════════════════════════════════════════════════════════
+
+def dedupe_chunks(chunks):
+    # type: (List[Dict]) -> List[Dict]
+    """Drop chunks whose text was already seen or whose byte range overlaps
+    an earlier (higher-ranked) chunk from the same file."""
+    seen_text = set()
+    ranges = {}  # type: Dict[str, List[Tuple[int, int]]]
+    out = []
+    for chunk in chunks:
+        digest = hashlib.sha256(chunk["text"].strip().encode("utf-8")).digest()
+        if digest in seen_text:
+            continue
+        taken = ranges.setdefault(chunk["path"], [])
+        if any(chunk["start"] < end and start < chunk["end"] for start, end in taken):
+            continue
+        seen_text.add(digest)
+        taken.append((chunk["start"], chunk["end"]))
+        out.append(chunk)
+    return out
+
+
+def format_chunk(chunk):
+    # type: (Dict) -> str
+    return "--- %s | %s ---\n%s" % (chunk["doc_id"], chunk["section"], chunk["text"].strip())
+
+
+def fit_context(chunks, k=DEFAULT_TOP_K, token_budget=DEFAULT_TOKEN_BUDGET):
+    # type: (List[Dict], int, int) -> List[Dict]
+    """Up to k deduplicated chunks, in rank order, fitting token_budget."""
+    selected = []
+    used = 0
+    for chunk in dedupe_chunks(chunks):
+        cost = estimate_tokens(format_chunk(chunk)) + 1
+        if used + cost > token_budget:
+            continue
+        selected.append(chunk)
+        used += cost
+        if len(selected) >= k:
+            break
+    return selected
+
+
+def select_context(index, question, k=DEFAULT_TOP_K, token_budget=DEFAULT_TOKEN_BUDGET):
+    # type: (BM25Index, str, int, int) -> List[Dict]
+    """Retrieve candidates for one question and fit them to the budget."""
+    hits = index.search(question, k=k * CANDIDATE_FACTOR)
+    return fit_context([chunk for _, chunk in hits], k, token_budget)
+
+
+def select_context_batch(index, requests):
+    # type: (Any, List[Tuple[str, int, int]]) -> List[List[Dict]]
+    """select_context() for many (question, k, token_budget) requests at once.
+
+    Indexes with search_batch() (canon_dense.DenseIndex) embed and score the
+    whole batch in one matrix product; others are searched per question.
+    """
+    if not requests:
+        return []
+    depth = max(k for _, k, _ in requests) * CANDIDATE_FACTOR
+    questions = [question for question, _, _ in requests]
+    if hasattr(index, "search_batch"):
+        rows = index.search_batch(questions, k=depth)
+    else:
+        rows = [index.search(question, k=depth) for question in questions]
+    return [fit_context([chunk for _, chunk in row], k, budget)
+            for row, (_, k, budget) in zip(rows, requests)]
+
+
+def build_system_prompt(instructions, chunks):
+    # type: (str, List[Dict]) -> str
+    if not chunks:
+        return instructions
+    return instructions + CONTEXT_HEADER + "\n\n".join(format_chunk(c) for c in chunks)
+
+
+def full_prompt_baseline(instructions, root=SCRIPT_DIR):
+    # type: (str, str) -> str
+    """The system prompt the original migration script sent on every call:
+    instructions plus every FAQ file, regardless of the question."""
+    faq_content = ""
+    faq_files = glob.glob(os.path.join(root, "assistant_portability/vector_store_files/*.txt")) + \
+        glob.glob(os.path.join(root, "assistant_portability/vector_store_files/*.md")) + \
+        glob.glob(os.path.join(root, "outreach/MW-PROSPECT-FAQ-SUPPLEMENT.txt"))
+    for faq_path in faq_files:
+        if os.path.exists(faq_path) and "FAQ" in faq_path.upper():
+            with io.open(faq_path, encoding="utf-8") as f:
+                faq_content += "\n\n--- %s ---\n" % os.path.basename(faq_path) + f.read()
+    return instructions + "\n\n## SUPPLEMENTARY FAQ\n" + faq_content
+
+
+# ═══════════════════════════════════════════════════════════════
+# SAVINGS REPORT
+# ═══════════════════════════════════════════════════════════════
+
+def cited_docs(text):
+    # type: (str) -> List[str]
+    return sorted(set("DOC-%03d" % int(n) for n in CITED_DOC_RE.findall(text)))
+
+
+def savings_report(index, instructions, pairs, k=DEFAULT_TOP_K, token_budget=DEFAULT_TOKEN_BUDGET):
+    # type: (BM25Index, str, List[Dict], int, int) -> Dict
+    """Compare retrieved-prompt tokens with the full-prompt baseline per question.
+
+    Also records how many of the documents cited in each golden answer the
+    retrieved context covers, so savings are not bought with lost recall.
+    """
+    baseline_tokens = estimate_tokens(full_prompt_baseline(instructions))
+    rows = []
+    for pair in pairs:
+        chunks = select_context(index, pair["question"], k, token_budget)
+        prompt_tokens = estimate_tokens(build_system_prompt(instructions, chunks))
+        expected = cited_docs(pair.get("ideal_response", ""))
+        retrieved = sorted(set(c["doc_id"] for c in chunks))
+        rows.append({
+            "question": pair["question"],
+            "persona": pair.get("persona"),
+            "baseline_tokens": baseline_tokens,
+            "rag_tokens": prompt_tokens,
+            "saved_tokens": baseline_tokens - prompt_tokens,
+            "chunks": [c["id"] for c in chunks],
+            "cited_docs": expected,
+            "cited_docs_retrieved": [d for d in expected if d in retrieved],
+        })
+    n = len(rows)
+    total_baseline = baseline_tokens * n
+    total_rag = sum(r["rag_tokens"] for r in rows)
+    cited = sum(len(r["cited_docs"]) for r in rows)
+    return {
+        "top_k": k,
+        "token_budget": token_budget,
+        "questions": n,
+        "baseline_tokens_per_question": baseline_tokens,
+        "mean_rag_tokens": round(float(total_rag) / n, 1) if n else 0.0,
+        "total_saved_tokens": total_baseline - total_rag,
+        "saved_pct": round(100.0 * (total_baseline - total_rag) / total_baseline, 1) if n else 0.0,
+        "cited_doc_coverage_pct": round(
+            100.0 * sum(len(r["cited_docs_retrieved"]) for r in rows) / cited, 1) if cited else None,
+        "results": rows,
+    }
+
+
+def load_instructions(path=ASSISTANT_CONFIG):
+    # type: (str) -> str
+    with io.open(path, encoding="utf-8") as f:
+        return json.load(f)["instructions"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token savings of retrieval-augmented prompts")
+    parser.add_argument("--golden", default=GOLDEN_QA_FILE, help="Golden QA pairs JSON")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="BM25 index path")
+    parser.add_argument("-k", type=int, default=DEFAULT_TOP_K, help="Max chunks per question")
+    parser.add_argument("--budget", type=int, default=DEFAULT_TOKEN_BUDGET,
+                        help="Context token budget per question")
+    parser.add_argument("--out", help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    with io.open(args.golden, encoding="utf-8") as f:
+        pairs = json.load(f)
+    report = savings_report(load_or_build(args.index), load_instructions(), pairs,
+                            args.k, args.budget)
+
+    print("Questions:            %d" % report["questions"])
+    print("Baseline prompt:      %d tokens/question" % report["baseline_tokens_per_question"])
+    print("Retrieved prompt:     %.1f tokens/question (k=%d, budget=%d)" % (
+        report["mean_rag_tokens"], args.k, args.budget))
+    print("Saved:                %d tokens (%.1f%%)" % (
+        report["total_saved_tokens"], report["saved_pct"]))
+    if report["cited_doc_coverage_pct"] is not None:
+        print("Cited-doc coverage:   %.1f%%" % report["cited_doc_coverage_pct"])
+    if args.out:
+        with io.open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print("Report: %s" % args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+MW Infrastructure Stack -- incremental re-indexing after canon changes.
+
+Run after generate_manifest.py records a change. The current corpus
+listing (path + SHA3-512 per file, the same records MANIFEST.json holds)
+is diffed against the listing the chunk store was last built from:
+
+  - documents whose SHA3-512 changed, and new documents, are re-chunked,
+    appended to the pack and indexed;
+  - changed and removed documents are tombstoned in the store and their
+    chunks dropped from the BM25 postings and the dense index;
+  - when tombstoned bytes pass canon_store.COMPACT_DEAD_RATIO of the pack
+    (or after COMPACT_EVERY updates, or with --compact) the pack is
+    rewritten and every index rebuilt from scratch.
+
+So re-indexing time follows the size of the change, not of the corpus.
+The dense index is only updated if it has been built before.
+
+Usage:
+    python canon_reindex.py              # Apply corpus changes
+    python canon_reindex.py --compact    # Force compaction + full rebuild
+    python canon_reindex.py --dry-run    # Show what would change
+
+Python 3.8+ compatible. Updating the dense index needs numpy.
+"""
+
+import argparse
+import os
+import time
+from typing import Any, Dict, Optional
+
+from canon_bm25 import DEFAULT_INDEX_PATH, BM25Index, build_index
+from canon_dense import DEFAULT_DENSE_PATH, HAS_NUMPY
+from canon_store import (DEFAULT_STORE_PATH, ChunkStore, build_store, diff_listing,
+                         index_path_for, update_store)
+from canon_text import iter_corpus_files
+
+
+def _sync_index(load, save, build, store):
+    # type: (Any, Any, Any, Any) -> str
+    """Catch an index up with the store: "current", "synced" or "rebuilt"."""
+    try:
+        index = load()
+    except (IOError, OSError, ValueError, KeyError):
+        build()
+        return "rebuilt"
+    if index.signature == store.signature and index.store_epoch == store.epoch:
+        return "current"
+    if index.sync(store):
+        save(index)
+        return "synced"
+    build()
+    return "rebuilt"
+
+
+def reindex(store_path=DEFAULT_STORE_PATH, bm25_path=DEFAULT_INDEX_PATH, dense_path=None,
+            compact=None):
+    # type: (str, str, Optional[str], Optional[bool]) -> Dict[str, Any]
+    """Update the store, then the BM25 (and, if given, dense) index."""
+    report = {}  # type: Dict[str, Any]
+    start = time.time()
+    files = iter_corpus_files()
+    if os.path.exists(index_path_for(store_path)):
+        try:
+            store, changes = update_store(store_path, files, compact)
+        except (ValueError, KeyError):
+            store, changes = build_store(store_path, files), {"compacted": True}
+    else:
+        store, changes = build_store(store_path, files), {"compacted": True}
+    report["store"] = changes
+    report["store_seconds"] = round(time.time() - start, 3)
+
+    start = time.time()
+    report["bm25"] = _sync_index(lambda: BM25Index.load(bm25_path, store),
+                                 lambda idx: idx.save(bm25_path),
+                                 lambda: build_index(bm25_path, store), store)
+    report["bm25_seconds"] = round(time.time() - start, 3)
+
+    if dense_path is not None and os.path.exists(dense_path + ".json"):
+        from canon_dense import DenseIndex, build_dense, load_embedder
+        start = time.time()
+        embedder = load_embedder()
+        holder = {}  # type: Dict[str, Any]
+
+        def load_dense():
+            holder["index"] = DenseIndex.load(dense_path, embedder, store)
+            return holder["index"]
+
+        report["dense"] = _sync_index(
+            load_dense, lambda idx: idx.save(dense_path),
+            lambda: build_dense(dense_path, embedder,
+                                holder["index"].nlist if "index" in holder else 0, store),
+            store)
+        report["dense_seconds"] = round(time.time() - start, 3)
+    store.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally re-index the MW canon")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="Chunk store pack path")
+    parser.add_argument("--bm25", default=DEFAULT_INDEX_PATH, help="BM25 index path")
+    parser.add_argument("--dense", default=None,
+                        help="Dense index path prefix (default: canon_dense.py's, if built)")
+    parser.add_argument("--compact", action="store_true",
+                        help="Rewrite the pack and rebuild every index")
+    parser.add_argument("--dry-run", action="store_true", help="Only list changed documents")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        if not os.path.exists(index_path_for(args.store)):
+            print("No chunk store at %s: a full build is needed" % args.store)
+            return
+        with ChunkStore(args.store) as store:
+            added, removed = diff_listing(store.documents, iter_corpus_files())
+            for n in removed:
+                print("  - %s" % store.documents[n]["path"])
+        for entry in added:
+            print("  + %s" % entry["path"])
+        print("%d to index, %d to tombstone" % (len(added), len(removed)))
+        return
+
+    dense_path = args.dense
+    if dense_path is None and HAS_NUMPY:
+        dense_path = DEFAULT_DENSE_PATH
+    report = reindex(args.store, args.bm25, dense_path, True if args.compact else None)
+
+    changes = report["store"]
+    if changes.get("compacted"):
+        print("Store rebuilt (compacted) in %.2fs" % report["store_seconds"])
+    else:
+        print("Store: +%d -%d documents, +%d -%d chunks in %.2fs" % (
+            len(changes["documents_added"]), len(changes["documents_removed"]),
+            changes["chunks_added"], changes["chunks_removed"], report["store_seconds"]))
+        for path in changes["documents_removed"]:
+            print("  - %s" % path)
+        for path in changes["documents_added"]:
+            print("  + %s" % path)
+    print("BM25:  %s in %.2fs" % (report["bm25"], report["bm25_seconds"]))
+    if "dense" in report:
+        print("Dense: %s in %.2fs" % (report["dense"], report["dense_seconds"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+MW Infrastructure Stack -- memory-mapped canon chunk store.
+
+Packs every corpus document (canon_text.iter_corpus_files) into a single
+file, back to back as raw bytes, with a JSON sidecar listing each
+document's offset, length and SHA3-512 and each chunk's section, byte
+range and SHA3-512:
+
+    assistant_portability/retrieval_index/canon_chunks.pack
+    assistant_portability/retrieval_index/canon_chunks.pack.json
+
+Readers mmap the pack read-only and slice chunks as memoryviews, so
+nothing is decoded until it is needed and every worker process shares the
+same page-cached copy.
+
+Updates are incremental: the corpus listing (path + SHA3-512, the records
+generate_manifest.py writes to MANIFEST.json) is diffed against the
+listing the pack was built from. Changed and new documents are appended
+to the pack and re-chunked; changed and removed documents are tombstoned
+(their bytes stay in place, their chunks keep their positions but are
+marked deleted). Indexes built over the store catch up by position (see
+canon_bm25.BM25Index.sync). Once tombstoned bytes exceed COMPACT_DEAD_RATIO
+of the pack, or after COMPACT_EVERY updates, the pack is rewritten from
+scratch under a new epoch, which tells dependent indexes to rebuild.
+
+Usage:
+    python canon_store.py build             # (Re)build the pack
+    python canon_store.py update            # Apply corpus changes incrementally
+    python canon_store.py verify            # Re-hash every document and chunk
+    python canon_store.py show DOC-005:3    # Print one chunk
+
+Python 3.8+ compatible, standard library only.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from canon_text import (RETRIEVAL_DIR, chunk_document, corpus_signature, iter_corpus_files,
+                        read_corpus_file, sha3_512_hex)
+
+DEFAULT_STORE_PATH = os.path.join(RETRIEVAL_DIR, "canon_chunks.pack")
+STORE_FORMAT = "mw-chunk-store-v1"
+COMPACT_DEAD_RATIO = 0.3
+COMPACT_EVERY = 50
+
+
+def index_path_for(pack_path):
+    # type: (str) -> str
+    return pack_path + ".json"
+
+
+# ═══════════════════════════════════════════════════════════════
+# BUILD
+# ═══════════════════════════════════════════════════════════════
+
+def _pack_document(pack, entry, offset, docs, chunks):
+    # type: (Any, Dict[str, str], int, List[Dict], List[Dict]) -> int
+    """Append one document and its chunk entries; return its length."""
+    data = read_corpus_file(entry["path"])
+    pack.write(data)
+    docs.append({
+        "doc_id": entry["doc_id"],
+        "path": entry["path"],
+        "sha3_512": entry["sha3_512"],
+        "offset": offset,
+        "length": len(data),
+    })
+    for chunk in chunk_document(entry["doc_id"], entry["path"], data):
+        chunks.append({
+            "id": chunk["id"],
+            "doc": len(docs) - 1,
+            "section": chunk["section"],
+            "start": chunk["start"],
+            "end": chunk["end"],
+            "sha3_512": sha3_512_hex(data[chunk["start"]:chunk["end"]]),
+        })
+    return len(data)
+
+
+def _write_index(pack_path, index):
+    # type: (str, Dict[str, Any]) -> None
+    with open(index_path_for(pack_path) + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(index_path_for(pack_path) + ".tmp", index_path_for(pack_path))
+
+
+def build_store(pack_path=DEFAULT_STORE_PATH, files=None):
+    # type: (str, Optional[List[Dict[str, str]]]) -> ChunkStore
+    """Write the pack and its index atomically, then open it."""
+    if files is None:
+        files = iter_corpus_files()
+    os.makedirs(os.path.dirname(os.path.abspath(pack_path)), exist_ok=True)
+    docs = []  # type: List[Dict]
+    chunks = []  # type: List[Dict]
+    offset = 0
+    with open(pack_path + ".tmp", "wb") as pack:
+        for entry in files:
+            offset += _pack_document(pack, entry, offset, docs, chunks)
+    index = {
+        "format": STORE_FORMAT,
+        "signature": corpus_signature(files),
+        "epoch": uuid.uuid4().hex,
+        "generation": 0,
+        "pack_bytes": offset,
+        "dead_bytes": 0,
+        "documents": docs,
+        "chunks": chunks,
+    }
+    os.replace(pack_path + ".tmp", pack_path)
+    _write_index(pack_path, index)
+    return ChunkStore(pack_path)
+
+
+def diff_listing(documents, files):
+    # type: (List[Dict[str, Any]], List[Dict[str, str]]) -> Tuple[List[Dict], List[int]]
+    """(entries to pack, live document positions to tombstone).
+
+    documents is the store's document list, files the current listing.
+    """
+    live = dict((d["path"], n) for n, d in enumerate(documents) if not d.get("deleted"))
+    current = dict((f["path"], f) for f in files)
+    added = [f for f in files
+             if f["path"] not in live or documents[live[f["path"]]]["sha3_512"] != f["sha3_512"]]
+    removed = sorted(n for path, n in live.items()
+                     if path not in current or current[path]["sha3_512"] != documents[n]["sha3_512"])
+    return added, removed
+
+
+def update_store(pack_path=DEFAULT_STORE_PATH, files=None, compact=None):
+    # type: (str, Optional[List[Dict[str, str]]], Optional[bool]) -> Tuple[ChunkStore, Dict[str, Any]]
+    """Bring an existing pack up to date with the corpus listing.
+
+    Only changed documents are read and chunked. compact=None compacts
+    when the thresholds are reached, True forces it, False never does.
+    Returns the reopened store and a change summary.
+    """
+    if files is None:
+        files = iter_corpus_files()
+    with open(index_path_for(pack_path), "r", encoding="utf-8") as f:
+        index = json.load(f)
+    if index.get("format") != STORE_FORMAT:
+        raise ValueError("%s: not a %s index" % (pack_path, STORE_FORMAT))
+    docs, chunks = index["documents"], index["chunks"]
+    added, removed = diff_listing(docs, files)
+    changes = {
+        "documents_added": [f["path"] for f in added],
+        "documents_removed": [docs[n]["path"] for n in removed],
+        "chunks_added": 0,
+        "chunks_removed": 0,
+        "compacted": False,
+    }  # type: Dict[str, Any]
+    dead_bytes = index.get("dead_bytes", 0) + sum(docs[n]["length"] for n in removed)
+    generation = index.get("generation", 0) + (1 if added or removed else 0)
+    if compact is None:
+        compact = (dead_bytes > COMPACT_DEAD_RATIO * max(1, index["pack_bytes"]) or
+                   generation >= COMPACT_EVERY)
+    if compact:
+        changes["chunks_removed"] = len(chunks)
+        store = build_store(pack_path, files)
+        changes["chunks_added"] = len(store)
+        changes["compacted"] = True
+        return store, changes
+    if not added and not removed:
+        return ChunkStore(pack_path), changes
+
+    dead = set(removed)
+    for n in removed:
+        docs[n]["deleted"] = True
+    for chunk in chunks:
+        if chunk["doc"] in dead:
+            chunk["deleted"] = True
+            changes["chunks_removed"] += 1
+    offset = index["pack_bytes"]
+    before = len(chunks)
+    with open(pack_path, "r+b") as pack:
+        pack.truncate(offset)  # drop bytes of an update that never committed its index
+        pack.seek(offset)
+        for entry in added:
+            offset += _pack_document(pack, entry, offset, docs, chunks)
+    changes["chunks_added"] = len(chunks) - before
+    index.update(signature=corpus_signature(files), generation=generation, pack_bytes=offset,
+                 dead_bytes=dead_bytes)
+    _write_index(pack_path, index)
+    return ChunkStore(pack_path), changes
+
+
+def load_or_build_store(pack_path=DEFAULT_STORE_PATH):
+    # type: (str) -> ChunkStore
+    """Open the pack, updating it incrementally (or rebuilding it if
+    missing or unreadable) when the corpus changed."""
+    files = iter_corpus_files()
+    if os.path.exists(pack_path) and os.path.exists(index_path_for(pack_path)):
+        try:
+            store = ChunkStore(pack_path)
+            if store.signature == corpus_signature(files):
+                return store
+            store.close()
+            return update_store(pack_path, files)[0]
+        except (ValueError, KeyError):
+            pass
+    return build_store(pack_path, files)
+
+
+# ═══════════════════════════════════════════════════════════════
+# READ
+# ═══════════════════════════════════════════════════════════════
+
+class ChunkStore(object):
+    """Read-only view of a chunk pack. Chunks are addressed by index or id.
+
+    Chunk metadata dicts carry doc-relative byte offsets (start/end), so
+    they line up with the source .txt files. Positions of tombstoned chunks
+    are listed in .deleted; ids and paths resolve to live entries only.
+    """
+
+    def __init__(self, pack_path=DEFAULT_STORE_PATH):
+        # type: (str) -> None
+        with open(index_path_for(pack_path), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("format") != STORE_FORMAT:
+            raise ValueError("%s: not a %s index" % (pack_path, STORE_FORMAT))
+        self.path = pack_path
+        self.signature = index["signature"]
+        self.epoch = index.get("epoch", "")
+        self.generation = index.get("generation", 0)
+        self.dead_bytes = index.get("dead_bytes", 0)
+        self.documents = index["documents"]  # type: List[Dict[str, Any]]
+        self.chunks = []  # type: List[Dict[str, Any]]
+        self.deleted = set()  # type: Set[int]
+        for raw in index["chunks"]:
+            if raw.get("deleted"):
+                self.deleted.add(len(self.chunks))
+            doc = self.documents[raw["doc"]]
+            self.chunks.append({
+                "id": raw["id"],
+                "doc_id": doc["doc_id"],
+                "path": doc["path"],
+                "section": raw["section"],
+                "start": raw["start"],
+                "end": raw["end"],
+                "sha3_512": raw["sha3_512"],
+                "offset": doc["offset"] + raw["start"],
+            })
+        self._by_id = dict((c["id"], n) for n, c in enumerate(self.chunks)
+                           if n not in self.deleted)
+        self._by_path = dict((d["path"], d) for d in self.documents if not d.get("deleted"))
+        self._file = open(pack_path, "rb")
+        if index["pack_bytes"] != os.fstat(self._file.fileno()).st_size:
+            self._file.close()
+            raise ValueError("%s: pack size does not match its index" % pack_path)
+        if index["pack_bytes"]:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._map)  # type: memoryview
+        else:
+            self._map = None
+            self._view = memoryview(b"")
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def live_documents(self):
+        # type: () -> List[Dict[str, Any]]
+        return [d for d in self.documents if not d.get("deleted")]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # type: () -> None
+        if self._map is not None:
+            try:
+                self._view.release()
+                self._map.close()
+            except BufferError:
+                pass  # chunk views still alive; the map closes when they go
+            self._map = None
+        self._file.close()
+
+    def _chunk(self, key):
+        # type: (Union[int, str]) -> Dict[str, Any]
+        if isinstance(key, str):
+            return self.chunks[self._by_id[key]]
+        return self.chunks[key]
+
+    def chunk_view(self, key):
+        # type: (Union[int, str]) -> memoryview
+        """Zero-copy view of a chunk's bytes."""
+        chunk = self._chunk(key)
+        return self._view[chunk["offset"]:chunk["offset"] + chunk["end"] - chunk["start"]]
+
+    def chunk_text(self, key):
+        # type: (Union[int, str]) -> str
+        return str(self.chunk_view(key), "utf-8", "replace")
+
+    def chunk_with_text(self, key):
+        # type: (Union[int, str]) -> Dict[str, Any]
+        chunk = dict(self._chunk(key))
+        chunk["text"] = self.chunk_text(key)
+        return chunk
+
+    def document(self, path):
+        # type: (str) -> Optional[Dict[str, Any]]
+        """Document entry for a repo-relative path, or None if not packed."""
+        return self._by_path.get(path.replace("\\", "/"))
+
+    def document_view(self, doc):
+        # type: (Dict[str, Any]) -> memoryview
+        return self._view[doc["offset"]:doc["offset"] + doc["length"]]
+
+    def document_text(self, doc):
+        # type: (Dict[str, Any]) -> str
+        return str(self.document_view(doc), "utf-8", "replace")
+
+    def verify(self):
+        # type: () -> List[str]
+        """Re-hash every document and chunk; return the ids/paths that differ."""
+        bad = [d["path"] for d in self.documents
+               if sha3_512_hex(self.document_view(d)) != d["sha3_512"]]
+        bad.extend(c["id"] for n, c in enumerate(self.chunks)
+                   if sha3_512_hex(self.chunk_view(n)) != c["sha3_512"])
+        return bad
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mapped canon chunk store")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="Pack file path")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("build", help="Build (or rebuild) the pack")
+    update = sub.add_parser("update", help="Apply corpus changes incrementally")
+    update.add_argument("--compact", action="store_true", help="Rewrite the pack from scratch")
+    sub.add_parser("verify", help="Re-hash every document and chunk")
+    show = sub.add_parser("show", help="Print one chunk")
+    show.add_argument("chunk_id")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.time()
+        with build_store(args.store) as store:
+            print("Packed %d documents, %d chunks in %.2fs -> %s (%s bytes)" % (
+                len(store.documents), len(store), time.time() - start,
+                args.store, "{:,}".format(os.path.getsize(args.store))))
+    elif args.command == "update":
+        if not os.path.exists(index_path_for(args.store)):
+            print("No pack at %s; run build first" % args.store)
+            sys.exit(1)
+        start = time.time()
+        store, changes = update_store(args.store, compact=True if args.compact else None)
+        with store:
+            print("+%d -%d documents, +%d -%d chunks%s in %.2fs (%d live chunks, %s dead bytes)" % (
+                len(changes["documents_added"]), len(changes["documents_removed"]),
+                changes["chunks_added"], changes["chunks_removed"],
+                ", compacted" if changes["compacted"] else "", time.time() - start,
+                len(store) - len(store.deleted), "{:,}".format(store.dead_bytes)))
+    elif args.command == "verify":
+        with load_or_build_store(args.store) as store:
+            bad = store.verify()
+            for item in bad:
+                print("  MISMATCH: %s" % item)
+            print("%d documents, %d chunks: %s" % (
+                len(store.documents), len(store), "FAIL" if bad else "OK"))
+        sys.exit(1 if bad else 0)
+    elif args.command == "show":
+        with load_or_build_store(args.store) as store:
+            chunk = store.chunk_with_text(args.chunk_id)
+            print("%s | %s | %s [%d:%d]" % (chunk["id"], chunk["section"], chunk["path"],
+                                            chunk["start"], chunk["end"]))
+            print(chunk["text"])
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
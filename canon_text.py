@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+MW Infrastructure Stack -- shared canon text handling.
+
+Section detection, corpus discovery and chunking used by the PDF
+generator and by the local retrieval tooling (canon_bm25.py and friends).
+
+Chunks are byte ranges of the source .txt files: a chunk never spans two
+sections, and sections longer than max_chunk_bytes are split on blank
+lines. Offsets are bytes (not characters) so they can be used directly
+for seeking, slicing a memory map, or hashing.
+
+Python 3.8+ compatible, standard library only.
+"""
+
+import hashlib
+import os
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DOCUMENTS_DIR = os.path.join(SCRIPT_DIR, "documents")
+VECTOR_STORE_DIR = os.path.join(SCRIPT_DIR, "assistant_portability", "vector_store_files")
+CORPUS_DIRS = (DOCUMENTS_DIR, VECTOR_STORE_DIR)
+RETRIEVAL_DIR = os.path.join(SCRIPT_DIR, "assistant_portability", "retrieval_index")
+MAX_CHUNK_BYTES = 2400
+
+DOC_ID_RE = re.compile(r"^(DOC-\d{3})")
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be by can does do for from has have how i if in into is it its
+of on or our such that the their then there these this to was what when where which
+who why will with within without would you your
+""".split())
+
+
+# ═══════════════════════════════════════════════════════════════
+# SECTION HEADINGS
+# ═══════════════════════════════════════════════════════════════
+
+def is_section_heading(stripped):
+    # type: (str) -> bool
+    """Section header rule used by generate_pdfs.generate_pdf().
+
+    Roman-numeral articles ("IV. ..."), lettered subsections ("B. ..."),
+    "DOCUMENT ..."/"Section ..." lines, and ALL CAPS lines.
+    """
+    if re.match(r'^[IVX]+\.', stripped):
+        return True
+    if re.match(r'^[A-Z]\.\s', stripped):
+        return True
+    if stripped.startswith('DOCUMENT ') or stripped.startswith('Section '):
+        return True
+    if stripped == stripped.upper() and len(stripped) > 3 and not stripped.startswith('_'):
+        return True
+    return False
+
+
+def split_sections(data, is_heading=is_section_heading):
+    # type: (bytes, Callable[[str], Any]) -> List[Tuple[str, int, int]]
+    """Split a document into (heading, start, end) byte ranges.
+
+    Text before the first heading is returned with an empty heading. Each
+    range starts at its heading line.
+    """
+    sections = []  # type: List[Tuple[str, int, int]]
+    heading = ""
+    start = 0
+    offset = 0
+    for line in data.splitlines(True):
+        stripped = line.decode("utf-8", "replace").strip()
+        if stripped and is_heading(stripped):
+            if offset > start:
+                sections.append((heading, start, offset))
+            heading = stripped[:200]
+            start = offset
+        offset += len(line)
+    if offset > start:
+        sections.append((heading, start, offset))
+    return sections
+
+
+# ═══════════════════════════════════════════════════════════════
+# CORPUS
+# ═══════════════════════════════════════════════════════════════
+
+def doc_id_from_filename(filename):
+    # type: (str) -> str
+    """DOC-NNN for canonical files, otherwise the upper-cased file stem."""
+    m = DOC_ID_RE.match(filename)
+    if m:
+        return m.group(1)
+    return os.path.splitext(filename)[0].upper()
+
+
+def sha3_512_hex(data):
+    # type: (bytes) -> str
+    return hashlib.sha3_512(data).hexdigest()
+
+
+def iter_corpus_files(roots=CORPUS_DIRS):
+    # type: (Iterable[str]) -> List[Dict[str, str]]
+    """List corpus .txt files as {doc_id, path, sha3_512}, sorted.
+
+    Files with identical content are indexed once (vector_store_files/
+    mirrors documents/); the first root wins. Paths are repo-relative with
+    forward slashes, matching MANIFEST.json.
+    """
+    seen = set()
+    out = []
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        for dirpath, dirs, files in os.walk(root):
+            dirs.sort()
+            for fname in sorted(files):
+                if not fname.endswith(".txt"):
+                    continue
+                path = os.path.join(dirpath, fname)
+                with open(path, "rb") as f:
+                    digest = sha3_512_hex(f.read())
+                if digest in seen:
+                    continue
+                seen.add(digest)
+                out.append({
+                    "doc_id": doc_id_from_filename(fname),
+                    "path": os.path.relpath(path, SCRIPT_DIR).replace("\\", "/"),
+                    "sha3_512": digest,
+                })
+    return out
+
+
+def corpus_signature(files):
+    # type: (List[Dict[str, str]]) -> str
+    """Hash of (path, sha3_512) for every corpus file."""
+    h = hashlib.sha256()
+    for entry in files:
+        h.update(("%s\0%s\n" % (entry["path"], entry["sha3_512"])).encode("utf-8"))
+    return h.hexdigest()
+
+
+def read_corpus_file(relpath):
+    # type: (str) -> bytes
+    with open(os.path.join(SCRIPT_DIR, relpath), "rb") as f:
+        return f.read()
+
+
+# ═══════════════════════════════════════════════════════════════
+# CHUNKING
+# ═══════════════════════════════════════════════════════════════
+
+def _split_long(data, start, end, max_bytes):
+    # type: (bytes, int, int, int) -> List[Tuple[int, int]]
+    """Split [start, end) on blank lines into pieces of at most ~max_bytes."""
+    if end - start <= max_bytes:
+        return [(start, end)]
+    pieces = []
+    piece_start = start
+    cursor = start
+    while cursor < end:
+        brk = data.find(b"\n\n", cursor, end)
+        para_end = end if brk < 0 else brk + 2
+        if para_end - piece_start > max_bytes and cursor > piece_start:
+            pieces.append((piece_start, cursor))
+            piece_start = cursor
+        cursor = para_end
+    pieces.append((piece_start, end))
+    return pieces
+
+
+def chunk_document(doc_id, path, data, max_chunk_bytes=MAX_CHUNK_BYTES):
+    # type: (str, str, bytes, int) -> List[Dict]
+    """Chunk one document into section-bounded byte ranges.
+
+    Each chunk: {id, doc_id, path, section, start, end, text}. The id is
+    "<doc_id>:<n>", stable as long as the document is unchanged.
+    """
+    chunks = []
+    for heading, sec_start, sec_end in split_sections(data):
+        for start, end in _split_long(data, sec_start, sec_end, max_chunk_bytes):
+            text = data[start:end].decode("utf-8", "replace")
+            if not text.strip():
+                continue
+            chunks.append({
+                "id": "%s:%d" % (doc_id, len(chunks)),
+                "doc_id": doc_id,
+                "path": path,
+                "section": heading,
+                "start": start,
+                "end": end,
+                "text": text,
+            })
+    return chunks
+
+
+def chunk_corpus(files=None, max_chunk_bytes=MAX_CHUNK_BYTES):
+    # type: (Optional[List[Dict[str, str]]], int) -> List[Dict]
+    if files is None:
+        files = iter_corpus_files()
+    chunks = []
+    for entry in files:
+        data = read_corpus_file(entry["path"])
+        chunks.extend(chunk_document(entry["doc_id"], entry["path"], data, max_chunk_bytes))
+    return chunks
+
+
+# ═══════════════════════════════════════════════════════════════
+# TOKENIZATION
+# ═══════════════════════════════════════════════════════════════
+
+def tokenize(text):
+    # type: (str) -> List[str]
+    """Lower-cased alphanumeric terms with English stopwords removed."""
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+MW Infrastructure Stack -- citation resolution index.
+
+Maps every document in verification/master-index.json to its section
+headings (the generate_pdfs heading rule from canon_text.py, plus
+"ARTICLE N" lines) with byte offsets and line numbers, so a citation such
+as "DOC-017, Section IV" or "Document 5 Article II" resolves in O(1) to:
+
+    documents/.../DOC-017_....txt  bytes 10234-18877  line 212
+
+Section labels: Roman-numeral and ARTICLE headings ("IV"), lettered
+subsections ("B", also qualified as "IV.B"), and numbered headings ("5"). Arabic
+article numbers ("Section 4") fall back to the Roman article ("IV"), and
+dotted numbers ("4.2") fall back to their leading part. Citations match
+case-insensitively ("section ii"), but a lettered label only counts when it
+is a well-formed Roman numeral or a single capital, so prose such as
+"Section civil disputes" cites the document, not a section "CIVIL".
+
+Documents missing from the master index (DOC-040..042 are in documents/
+but not in the 39-document index) resolve as "unindexed"; numbers that
+exist nowhere resolve as "unknown".
+
+Usage:
+    python citation_index.py build
+    python citation_index.py check "Per DOC-017, Section IV and DOC-041 ..."
+
+The index is cached as JSON and rebuilt when the master index's SHA-256
+changes.
+
+Python 3.8+ compatible, standard library only.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional
+
+from canon_text import (RETRIEVAL_DIR, SCRIPT_DIR, is_section_heading, iter_corpus_files,
+                        read_corpus_file, split_sections)
+
+MASTER_INDEX = os.path.join(SCRIPT_DIR, "verification", "master-index.json")
+DEFAULT_CITATION_INDEX = os.path.join(RETRIEVAL_DIR, "citations.json")
+CITATION_FORMAT = "mw-citations-v1"
+MAX_DOC_NUMBER = 999
+
+CITATION_RE = re.compile(
+    r"\b(?:DOC[-\s]?|Document\s+)0*(\d{1,3})\b"
+    r"(?:[\s,:;(]*(?:Section|Article|Art\.|§)\s*([IVXLC]+|\d+(?:\.\d+)*|[A-Z])\b)?",
+    re.IGNORECASE)
+ARTICLE_RE = re.compile(r"^ARTICLE\s+([IVXLC]+|\d{1,2})\b")
+ROMAN_LABEL_RE = re.compile(r"^([IVXLC]+)\.")
+LETTER_LABEL_RE = re.compile(r"^([A-Z])\.\s")
+NUMBER_LABEL_RE = re.compile(r"^(?:Section\s+(\d{1,2}(?:\.\d+)*)|(\d{1,2}(?:\.\d+)*)\.\s)")
+ROMAN_VALUES = (("M", 1000), ("CM", 900), ("D", 500), ("CD", 400), ("C", 100), ("XC", 90),
+                ("L", 50), ("XL", 40), ("X", 10), ("IX", 9), ("V", 5), ("IV", 4), ("I", 1))
+
+
+def to_roman(n):
+    # type: (int) -> str
+    out = []
+    for numeral, value in ROMAN_VALUES:
+        while n >= value:
+            out.append(numeral)
+            n -= value
+    return "".join(out)
+
+
+def from_roman(label):
+    # type: (str) -> int
+    """Integer value of a Roman numeral (no validation; see citation_section)."""
+    values = dict(ROMAN_VALUES)
+    total = 0
+    for i, ch in enumerate(label):
+        value = values.get(ch, 0)
+        if i + 1 < len(label) and values.get(label[i + 1], 0) > value:
+            total -= value
+        else:
+            total += value
+    return total
+
+
+def citation_section(raw):
+    # type: (Optional[str]) -> Optional[str]
+    """Normalised section label of a citation match, or None when the
+    case-folded match is prose rather than a label."""
+    if not raw:
+        return None
+    label = raw.upper()
+    if label[0].isdigit():
+        return label
+    if to_roman(from_roman(label)) == label:
+        return label
+    if len(raw) == 1 and raw.isupper():
+        return label
+    return None
+
+
+def is_citable_heading(stripped):
+    # type: (str) -> bool
+    """The generate_pdf heading rule, plus "ARTICLE IV ..." lines that the
+    rule misses when the title contains mojibake."""
+    return is_section_heading(stripped) or bool(ARTICLE_RE.match(stripped))
+
+
+def article_label(heading):
+    # type: (str) -> str
+    m = ARTICLE_RE.match(heading) or ROMAN_LABEL_RE.match(heading)
+    if not m:
+        return ""
+    label = m.group(1)
+    return to_roman(int(label)) if label.isdigit() else label
+
+
+def section_labels(heading, article):
+    # type: (str, str) -> List[str]
+    """Labels a heading can be cited by; article is the enclosing Roman label."""
+    label = article_label(heading)
+    if label:
+        return [label]
+    m = LETTER_LABEL_RE.match(heading)
+    if m:
+        labels = [m.group(1)]
+        if article:
+            labels.insert(0, "%s.%s" % (article, m.group(1)))
+        return labels
+    m = NUMBER_LABEL_RE.match(heading)
+    if m:
+        return [m.group(1) or m.group(2)]
+    return []
+
+
+# ═══════════════════════════════════════════════════════════════
+# BUILD
+# ═══════════════════════════════════════════════════════════════
+
+def _sha256_file(path):
+    # type: (str) -> str
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def build_citation_index(master_index=MASTER_INDEX):
+    # type: (str) -> Dict[str, Any]
+    with open(master_index, "r", encoding="utf-8") as f:
+        master = json.load(f)
+    documents = {}
+    for doc_id, meta in sorted(master["documents"].items()):
+        path = meta["filepath"].replace("\\", "/")
+        try:
+            data = read_corpus_file(path)
+        except (IOError, OSError):
+            continue
+        sections = []
+        labels = {}
+        article = ""
+        line = 1
+        offset = 0
+        for heading, start, end in split_sections(data, is_citable_heading):
+            line += data.count(b"\n", offset, start)
+            offset = start
+            article = article_label(heading) or article
+            for label in section_labels(heading, article):
+                labels.setdefault(label, len(sections))
+            sections.append({"heading": heading, "start": start, "end": end, "line": line})
+        documents[doc_id] = {
+            "title": meta.get("title", ""),
+            "path": path,
+            "bytes": len(data),
+            "sections": sections,
+            "labels": labels,
+        }
+    unindexed = sorted(set(f["doc_id"] for f in iter_corpus_files()
+                           if f["doc_id"].startswith("DOC-")) - set(documents))
+    return {
+        "format": CITATION_FORMAT,
+        "master_index_sha256": _sha256_file(master_index),
+        "documents": documents,
+        "unindexed": unindexed,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+# RESOLVE
+# ═══════════════════════════════════════════════════════════════
+
+class CitationIndex(object):
+    """O(1) resolution of (doc id, section label) citations."""
+
+    def __init__(self, data):
+        # type: (Dict[str, Any]) -> None
+        self.data = data
+        self.documents = data["documents"]  # type: Dict[str, Dict[str, Any]]
+        self.unindexed = set(data.get("unindexed", []))
+        self.master_index_sha256 = data.get("master_index_sha256", "")
+
+    def save(self, path=DEFAULT_CITATION_INDEX):
+        # type: (str) -> str
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+        return path
+
+    @classmethod
+    def load(cls, path=DEFAULT_CITATION_INDEX):
+        # type: (str) -> CitationIndex
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") != CITATION_FORMAT:
+            raise ValueError("%s: not a %s index" % (path, CITATION_FORMAT))
+        return cls(data)
+
+    def _section_index(self, doc, label):
+        # type: (Dict[str, Any], str) -> Optional[int]
+        labels = doc["labels"]
+        label = label.upper()
+        if label in labels:
+            return labels[label]
+        head = label.split(".")[0]
+        if head in labels:
+            return labels[head]
+        if head.isdigit() and 0 < int(head) <= 3999:
+            return labels.get(to_roman(int(head)))
+        return None
+
+    def resolve(self, doc_id, section=None):
+        # type: (str, Optional[str]) -> Dict[str, Any]
+        """Resolve one citation. status: ok, unknown_section, unindexed, unknown."""
+        out = {"doc_id": doc_id, "section": section}  # type: Dict[str, Any]
+        doc = self.documents.get(doc_id)
+        if doc is None:
+            out["status"] = "unindexed" if doc_id in self.unindexed else "unknown"
+            return out
+        out["path"] = doc["path"]
+        out["title"] = doc["title"]
+        if section is None:
+            out.update(status="ok", start=0, end=doc["bytes"], link=doc["path"])
+            return out
+        idx = self._section_index(doc, section)
+        if idx is None:
+            out.update(status="unknown_section", link=doc["path"])
+            return out
+        sec = doc["sections"][idx]
+        out.update(status="ok", heading=sec["heading"], start=sec["start"], end=sec["end"],
+                   line=sec["line"], link="%s#L%d" % (doc["path"], sec["line"]))
+        return out
+
+    def validate(self, text):
+        # type: (str) -> Dict[str, Any]
+        """Resolve every citation in text (deduplicated, in order of appearance)."""
+        seen = set()
+        citations = []
+        for m in CITATION_RE.finditer(text or ""):
+            number = int(m.group(1))
+            if not 0 < number <= MAX_DOC_NUMBER:
+                continue
+            key = ("DOC-%03d" % number, citation_section(m.group(2)))
+            if key in seen:
+                continue
+            seen.add(key)
+            citations.append(self.resolve(*key))
+        return {
+            "citations": citations,
+            "unindexed": sorted(set(c["doc_id"] for c in citations if c["status"] == "unindexed")),
+            "invalid": ["%s%s" % (c["doc_id"], " " + c["section"] if c["section"] else "")
+                        for c in citations if c["status"] in ("unknown", "unknown_section")],
+        }
+
+
+def load_or_build_citations(path=DEFAULT_CITATION_INDEX, master_index=MASTER_INDEX):
+    # type: (str, str) -> CitationIndex
+    """Load the cached index, rebuilding it when the master index changed."""
+    if os.path.exists(path):
+        try:
+            index = CitationIndex.load(path)
+            if index.master_index_sha256 == _sha256_file(master_index):
+                return index
+        except (ValueError, KeyError):
+            pass
+    index = CitationIndex(build_citation_index(master_index))
+    index.save(path)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Citation resolution index for the MW canon")
+    parser.add_argument("--index", default=DEFAULT_CITATION_INDEX, help="Index file path")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("build", help="Build (or rebuild) the index")
+    check = sub.add_parser("check", help="Resolve the citations in a text")
+    check.add_argument("text")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = CitationIndex(build_citation_index())
+        index.save(args.index)
+        print("Indexed %d documents, %d sections -> %s" % (
+            len(index.documents), sum(len(d["sections"]) for d in index.documents.values()),
+            args.index))
+        if index.unindexed:
+            print("Not in master index: %s" % ", ".join(sorted(index.unindexed)))
+    elif args.command == "check":
+        report = load_or_build_citations(args.index).validate(args.text)
+        for c in report["citations"]:
+            print("  %-8s %-6s %-16s %s" % (c["doc_id"], c["section"] or "-", c["status"],
+                                           c.get("link", "")))
+        sys.exit(1 if report["invalid"] else 0)
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,23 +2,53 @@
 """
 PHASE 1: FULL STATE EXTRACTION
 Exports everything from OpenAI assistant into local repo.
+
+Outputs are only rewritten when their content changed, vector-store files
+only downloaded when new or changed, and every change is appended to
+assistant_portability/extraction_journal.jsonl (extraction_journal.py).
+--incremental trusts remote created_at/byte counts against the previous
+vector_store_manifest.json instead of re-hashing local copies, which makes
+frequent scheduled runs cheap.
+
+Usage:
+    python extract_assistant_state.py                 # Hash-verified extraction
+    python extract_assistant_state.py --incremental   # Metadata-only change check
 """
+import argparse
 import json
 import os
-import io
 import time
 import re
 from datetime import datetime
 from openai import OpenAI
 
+from extraction_journal import (ChangeJournal, file_changes, without_keys, without_lines,
+                                write_if_changed)
+from golden_qa_store import GoldenQAStore, load_bank, merge_result_files
+from vector_store_download import download_vector_store, previous_files, print_download_report
+
+parser = argparse.ArgumentParser(description="Extract the OpenAI assistant state")
+parser.add_argument("--incremental", action="store_true",
+                    help="Fetch only files whose created_at/bytes differ from the last manifest")
+args = parser.parse_args()
+
 client = OpenAI()
 ASSISTANT_ID = "asst_xRQJW7WDpbx9luIOpsPqvb94"
 OUTPUT_DIR = "assistant_portability"
+VS_FILES_DIR = os.path.join(OUTPUT_DIR, "vector_store_files")
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
-os.makedirs(os.path.join(OUTPUT_DIR, "vector_store_files"), exist_ok=True)
+os.makedirs(VS_FILES_DIR, exist_ok=True)
 os.makedirs(os.path.join(OUTPUT_DIR, "migration_configs"), exist_ok=True)
 os.makedirs(os.path.join(OUTPUT_DIR, "analytics"), exist_ok=True)
+journal = ChangeJournal(os.path.join(OUTPUT_DIR, "extraction_journal.jsonl"),
+                        "incremental" if args.incremental else "full")
+
+
+def save_output(path, text, normalize=None):
+    action = write_if_changed(path, text, normalize)
+    journal.record("output", action, path=path)
+    return action
 
 print("=" * 60)
 print("PHASE 1: FULL STATE EXTRACTION")
@@ -51,28 +81,35 @@ if asst.tool_resources and asst.tool_resources.file_search:
 else:
     vs_ids = []
 
-with io.open(os.path.join(OUTPUT_DIR, "assistant_config.json"), "w", encoding="utf-8") as f:
-    json.dump(assistant_config, f, indent=2, ensure_ascii=False)
-print("  -> Config saved (%d char instructions, model: %s)" % (len(asst.instructions), asst.model))
+action = save_output(os.path.join(OUTPUT_DIR, "assistant_config.json"),
+                     json.dumps(assistant_config, indent=2, ensure_ascii=False),
+                     without_keys("extracted_at"))
+print("  -> Config %s (%d char instructions, model: %s)" % (
+    action, len(asst.instructions), asst.model))
 
 # ─────────────────────────────────────────────
 # 1B. Export system instructions as standalone file
 # ─────────────────────────────────────────────
 print("\n[1B] Extracting system instructions...")
-with io.open(os.path.join(OUTPUT_DIR, "SYSTEM_INSTRUCTIONS.md"), "w", encoding="utf-8") as f:
-    f.write("# MW Knowledge Assistant - System Instructions\n")
-    f.write("# Extracted: %s\n" % datetime.now().isoformat())
-    f.write("# Source: OpenAI Assistant %s\n" % ASSISTANT_ID)
-    f.write("# Model: %s\n" % asst.model)
-    f.write("# Temperature: %s\n\n" % getattr(asst, "temperature", 0))
-    f.write(asst.instructions)
-print("  -> Instructions saved as markdown")
+instructions_md = "".join([
+    "# MW Knowledge Assistant - System Instructions\n",
+    "# Extracted: %s\n" % datetime.now().isoformat(),
+    "# Source: OpenAI Assistant %s\n" % ASSISTANT_ID,
+    "# Model: %s\n" % asst.model,
+    "# Temperature: %s\n\n" % getattr(asst, "temperature", 0),
+    asst.instructions,
+])
+action = save_output(os.path.join(OUTPUT_DIR, "SYSTEM_INSTRUCTIONS.md"), instructions_md,
+                     without_lines("# Extracted: "))
+print("  -> Instructions markdown %s" % action)
 
 # ─────────────────────────────────────────────
 # 1C. Export vector store contents
 # ─────────────────────────────────────────────
 print("\n[1C] Extracting vector store contents...")
 vs_manifest = []
+known_files = previous_files(os.path.join(OUTPUT_DIR, "vector_store_manifest.json"))
+file_reports = []
 
 for vs_id in vs_ids:
     print("  Vector store: %s" % vs_id)
@@ -86,109 +123,55 @@ for vs_id in vs_ids:
         "files": []
     }
 
-    # List all files in vector store
-    vs_files = client.beta.vector_stores.files.list(vs_id)
-    for vsf in vs_files.data:
-        try:
-            file_obj = client.files.retrieve(vsf.id)
-            file_info = {
-                "id": file_obj.id,
-                "filename": file_obj.filename,
-                "bytes": file_obj.bytes,
-                "purpose": file_obj.purpose,
-                "created_at": file_obj.created_at,
-                "status": vsf.status
-            }
-
-            # Download file content
-            try:
-                content = client.files.content(file_obj.id)
-                local_path = os.path.join(OUTPUT_DIR, "vector_store_files", file_obj.filename)
-                with open(local_path, "wb") as dl:
-                    dl.write(content.read())
-                file_info["local_path"] = local_path
-                file_info["downloaded"] = True
-                print("    -> Downloaded: %s (%d bytes)" % (file_obj.filename, file_obj.bytes))
-            except Exception as e:
-                file_info["downloaded"] = False
-                file_info["download_error"] = str(e)
-                print("    -> Download failed for %s: %s" % (file_obj.filename, e))
-
-            vs_info["files"].append(file_info)
-        except Exception as e:
-            print("    -> Error retrieving file %s: %s" % (vsf.id, e))
-
-    # Handle pagination
-    while vs_files.has_more:
-        vs_files = client.beta.vector_stores.files.list(vs_id, after=vs_files.data[-1].id)
-        for vsf in vs_files.data:
-            try:
-                file_obj = client.files.retrieve(vsf.id)
-                file_info = {
-                    "id": file_obj.id,
-                    "filename": file_obj.filename,
-                    "bytes": file_obj.bytes,
-                    "purpose": file_obj.purpose,
-                    "created_at": file_obj.created_at,
-                    "status": vsf.status
-                }
-                try:
-                    content = client.files.content(file_obj.id)
-                    local_path = os.path.join(OUTPUT_DIR, "vector_store_files", file_obj.filename)
-                    with open(local_path, "wb") as dl:
-                        dl.write(content.read())
-                    file_info["local_path"] = local_path
-                    file_info["downloaded"] = True
-                    print("    -> Downloaded: %s (%d bytes)" % (file_obj.filename, file_obj.bytes))
-                except Exception as e:
-                    file_info["downloaded"] = False
-                    file_info["download_error"] = str(e)
-                    print("    -> Download failed for %s: %s" % (file_obj.filename, e))
-                vs_info["files"].append(file_info)
-            except Exception as e:
-                print("    -> Error retrieving file %s: %s" % (vsf.id, e))
+    # Download every file (all pages) concurrently; unchanged local copies are skipped
+    started = time.time()
+    reports = download_vector_store(client, vs_id, VS_FILES_DIR, known_files,
+                                    trust_metadata=args.incremental)
+    file_reports.extend(reports)
+    for report in reports:
+        if "error" in report:
+            print("    -> Error retrieving file %s: %s" % (report["id"], report["error"]))
+            continue
+        if not report["downloaded"]:
+            print("    -> Download failed for %s: %s" % (report["filename"], report["download_error"]))
+        elif not report["skipped"]:
+            print("    -> Downloaded: %s (%d bytes)" % (report["filename"], report["bytes"]))
+        vs_info["files"].append(dict((k, v) for k, v in report.items()
+                                     if k not in ("skipped", "download_seconds")))
+    print_download_report(reports, time.time() - started)
 
     vs_manifest.append(vs_info)
 
-with io.open(os.path.join(OUTPUT_DIR, "vector_store_manifest.json"), "w", encoding="utf-8") as f:
-    json.dump(vs_manifest, f, indent=2, ensure_ascii=False)
-print("  -> Vector store manifest saved")
+for change in file_changes(known_files, file_reports):
+    journal.record("file", change.pop("action"), **change)
+action = save_output(os.path.join(OUTPUT_DIR, "vector_store_manifest.json"),
+                     json.dumps(vs_manifest, indent=2, ensure_ascii=False), without_keys())
+print("  -> Vector store manifest %s" % action)
 
 # ─────────────────────────────────────────────
 # 1D. Export QA test results as training data
 # ─────────────────────────────────────────────
 print("\n[1D] Extracting QA results as training data...")
-training_pairs = []
-
-# Load graded QA results
-for qa_file in ["qa_graded_results.json", "qa_retest_results.json"]:
-    if os.path.exists(qa_file):
-        with io.open(qa_file, "r", encoding="utf-8") as f:
-            qa_data = json.load(f)
-
-        # Handle both formats: list of items or dict with "results" key
-        items = qa_data if isinstance(qa_data, list) else qa_data.get("results", [])
-
-        for item in items:
-            # Get the best available response
-            resp = item.get("response", "")
-            grading = item.get("grading", {})
-            score = grading.get("score", 0) if grading else item.get("score", 0)
-            grade = grading.get("grade", "") if grading else item.get("grade", "")
-
-            if resp and score >= 80:
-                training_pairs.append({
-                    "persona": item.get("persona", "unknown"),
-                    "question": item.get("question", ""),
-                    "ideal_response": resp,
-                    "score": score,
-                    "grade": grade,
-                    "source": qa_file
-                })
-
-with io.open(os.path.join(OUTPUT_DIR, "golden_qa_pairs.json"), "w", encoding="utf-8") as f:
-    json.dump(training_pairs, f, indent=2, ensure_ascii=False)
-print("  -> %d golden Q&A pairs extracted as training data" % len(training_pairs))
+# One pair per question (best score wins), merged into the indexed store
+golden = GoldenQAStore(os.path.join(OUTPUT_DIR, "golden_qa_pairs.jsonl"))
+counts = merge_result_files(golden, ["qa_graded_results.json", "qa_retest_results.json"],
+                            load_bank())
+golden.save()
+if counts["added"]:
+    journal.record("golden_qa", "added", count=counts["added"])
+if counts["improved"]:
+    journal.record("golden_qa", "changed", count=counts["improved"])
+print("  -> Golden store: %d pairs (%d added, %d improved, %d duplicates)" % (
+    len(golden), counts["added"], counts["improved"], counts["duplicate"]))
+
+training_pairs = golden.to_list()
+action = save_output(os.path.join(OUTPUT_DIR, "golden_qa_pairs.json"),
+                     json.dumps(training_pairs, indent=2, ensure_ascii=False), without_keys())
+print("  -> %d golden Q&A pairs extracted as training data (%s)" % (len(training_pairs), action))
+
+summary = journal.close()
+print("\n  Journal: %s (%s)" % (journal.path, ", ".join(
+    "%s %d" % (k, v) for k, v in sorted(summary["counts"].items()))))
 
 print("\n" + "=" * 60)
 print("PHASE 1 COMPLETE: All state extracted to %s/" % OUTPUT_DIR)
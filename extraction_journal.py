@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- change journal for state extraction.
+
+extract_assistant_state.py records what each run changed in an
+append-only JSONL journal (assistant_portability/extraction_journal.jsonl),
+one object per line:
+
+  {"run": "<run id>", "at": "<ISO time>", "kind": "file", "action": "added",
+   "id": "file-...", "filename": "DOC-005_...txt", "bytes": 41233,
+   "sha256": "..."}
+  {"run": "<run id>", "at": "<ISO time>", "kind": "output", "action": "changed",
+   "path": "assistant_portability/assistant_config.json"}
+  {"run": "<run id>", "at": "<ISO time>", "kind": "run", "action": "completed",
+   "mode": "incremental", "counts": {"added": 1, "unchanged": 42}, "seconds": 3.1}
+
+Actions are "added", "changed", "removed" and "failed"; unchanged objects
+are only counted in the closing "run" record, so a scheduled extraction
+that found nothing new adds a single line.
+
+Outputs are written through write_if_changed(), which leaves a file
+untouched when its content (minus volatile fields such as extraction
+timestamps) is the same as on disk.
+
+Usage:
+    python extraction_journal.py                  # Summarise every run
+    python extraction_journal.py --last 5         # Summarise the last 5 runs
+    python extraction_journal.py --changes        # List changed objects too
+
+Python 3.8+ compatible, standard library only.
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+DEFAULT_JOURNAL_PATH = os.path.join("assistant_portability", "extraction_journal.jsonl")
+
+
+class ChangeJournal(object):
+    """Collects one run's change records and appends them on close()."""
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, mode="full"):
+        # type: (str, str) -> None
+        self.path = path
+        self.mode = mode
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = time.time()
+        self.records = []  # type: List[Dict[str, Any]]
+        self.counts = {}  # type: Dict[str, int]
+
+    def record(self, kind, action, **fields):
+        # type: (str, str, Any) -> None
+        """Count an action; keep a journal line unless it is "unchanged"."""
+        self.counts[action] = self.counts.get(action, 0) + 1
+        if action == "unchanged":
+            return
+        entry = {"run": self.run_id, "at": datetime.now().isoformat(), "kind": kind,
+                 "action": action}
+        entry.update(fields)
+        self.records.append(entry)
+
+    def close(self):
+        # type: () -> Dict[str, Any]
+        """Append this run's records plus its summary line; return the summary."""
+        summary = {"run": self.run_id, "at": datetime.now().isoformat(), "kind": "run",
+                   "action": "completed", "mode": self.mode, "counts": self.counts,
+                   "seconds": round(time.time() - self.started, 3)}
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with io.open(self.path, "a", encoding="utf-8") as f:
+            for entry in self.records + [summary]:
+                f.write(json.dumps(entry, ensure_ascii=False, sort_keys=True) + "\n")
+        return summary
+
+
+def read_journal(path=DEFAULT_JOURNAL_PATH):
+    # type: (str) -> List[Dict[str, Any]]
+    """Every journal record, oldest first; a torn last line is ignored."""
+    if not os.path.exists(path):
+        return []
+    out = []  # type: List[Dict[str, Any]]
+    with io.open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                continue
+    return out
+
+
+def write_if_changed(path, text, normalize=None):
+    # type: (str, str, Optional[Callable[[str], Any]]) -> str
+    """Write text to path unless it matches the current content after
+    normalize(); return "added", "changed" or "unchanged"."""
+    normalize = normalize or (lambda value: value)
+    if os.path.exists(path):
+        with io.open(path, "r", encoding="utf-8") as f:
+            current = f.read()
+        try:
+            if normalize(current) == normalize(text):
+                return "unchanged"
+        except ValueError:
+            pass
+        action = "changed"
+    else:
+        action = "added"
+    with io.open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return action
+
+
+def without_keys(*keys):
+    # type: (str) -> Callable[[str], Any]
+    """normalize() for JSON documents that ignores top-level keys."""
+    def normalize(text):
+        data = json.loads(text)
+        if isinstance(data, dict):
+            for key in keys:
+                data.pop(key, None)
+        return data
+    return normalize
+
+
+def without_lines(prefix):
+    # type: (str) -> Callable[[str], Any]
+    """normalize() for text that ignores lines starting with prefix."""
+    def normalize(text):
+        return [line for line in text.splitlines() if not line.startswith(prefix)]
+    return normalize
+
+
+def file_changes(known, reports):
+    # type: (Dict[str, Dict[str, Any]], Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]
+    """Journal fields for each vector-store file report, compared with the
+    previous manifest entries in known, plus "removed" for files gone since."""
+    out = []  # type: List[Dict[str, Any]]
+    seen = set()
+    for r in reports:
+        seen.add(r["id"])
+        if "error" in r or not r.get("downloaded"):
+            out.append({"action": "failed", "id": r["id"], "filename": r.get("filename"),
+                        "error": r.get("error") or r.get("download_error")})
+        elif r.get("skipped"):
+            out.append({"action": "unchanged", "id": r["id"]})
+        else:
+            out.append({"action": "changed" if r["id"] in known else "added", "id": r["id"],
+                        "filename": r["filename"], "bytes": r["bytes"], "sha256": r["sha256"]})
+    for file_id in sorted(set(known) - seen):
+        out.append({"action": "removed", "id": file_id, "filename": known[file_id].get("filename")})
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise the state extraction change journal")
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL_PATH, help="Journal path")
+    parser.add_argument("--last", type=int, default=0, help="Only the last N runs")
+    parser.add_argument("--changes", action="store_true", help="List changed objects per run")
+    args = parser.parse_args()
+
+    records = read_journal(args.journal)
+    runs = [r for r in records if r.get("kind") == "run"]
+    if args.last:
+        runs = runs[-args.last:]
+    by_run = {}  # type: Dict[str, List[Dict[str, Any]]]
+    for r in records:
+        if r.get("kind") != "run":
+            by_run.setdefault(r["run"], []).append(r)
+    for run in runs:
+        counts = ", ".join("%s %d" % (k, v) for k, v in sorted(run["counts"].items()))
+        print("%s  %s  %-11s %6.1fs  %s" % (run["at"][:19], run["run"], run["mode"],
+                                            run["seconds"], counts or "no objects"))
+        if args.changes:
+            for r in by_run.get(run["run"], []):
+                print("    %-8s %-6s %s" % (r["action"], r["kind"],
+                                            r.get("path") or r.get("filename") or r.get("id")))
+    if not runs:
+        print("No extraction runs recorded in %s" % args.journal)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,11 @@ import os
 import sys
 import json
 import hashlib
-import re
 from pathlib import Path
 
+from canon_store import load_or_build_store
+from canon_text import is_section_heading
+
 # Force UTF-8 output
 if sys.platform == 'win32':
     sys.stdout = open(sys.stdout.fileno(), mode='w', encoding='utf-8', buffering=1)
@@ -190,15 +192,7 @@ def generate_pdf(doc_num, title, content, src_hash, filepath, out_path):
             continue
 
         # Detect section headers (Roman numerals, ALL CAPS, or starting with letter + period)
-        is_heading = False
-        if re.match(r'^[IVX]+\.', stripped):
-            is_heading = True
-        elif re.match(r'^[A-Z]\.\s', stripped):
-            is_heading = True
-        elif stripped.startswith('DOCUMENT ') or stripped.startswith('Section '):
-            is_heading = True
-        elif stripped == stripped.upper() and len(stripped) > 3 and not stripped.startswith('_'):
-            is_heading = True
+        is_heading = is_section_heading(stripped)
 
         if is_heading:
             # Flush buffer first
@@ -248,6 +242,7 @@ def main():
         master = json.load(f)
 
     documents = master['documents']
+    store = load_or_build_store()
     manifest_lines = []
     manifest_lines.append("PDF-HASH-MANIFEST")
     manifest_lines.append("=" * 60)
@@ -270,16 +265,20 @@ def main():
             print("WARNING: {} not found at {}".format(doc_id, filepath))
             continue
 
-        # Read and clean content
-        with open(str(filepath), 'r', encoding='utf-8', errors='replace') as f:
-            raw = f.read()
+        # Read and clean content (from the chunk store when packed; it
+        # already holds the source SHA3-512)
+        packed = store.document(meta['filepath'])
+        if packed:
+            raw = store.document_text(packed)
+            src_hash = packed['sha3_512']
+        else:
+            with open(str(filepath), 'r', encoding='utf-8', errors='replace') as f:
+                raw = f.read()
+            src_hash = compute_sha3_512(str(filepath))
         content = clean_text(raw)
         title = meta.get('title', extract_title(content))
         title = clean_text(title)
 
-        # Compute source hash
-        src_hash = compute_sha3_512(str(filepath))
-
         # Output PDF path
         pdf_name = "MW-CANON-DOC-{:02d}.pdf".format(i)
         pdf_path = OUT_DIR / pdf_name
@@ -302,6 +301,8 @@ def main():
 
         print("  OK - {} bytes".format(pdf_path.stat().st_size))
 
+    store.close()
+
     # Write manifest
     manifest_path = OUT_DIR / "PDF-HASH-MANIFEST.txt"
     with open(str(manifest_path), 'w', encoding='utf-8') as f:
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- deduplicated golden QA pair store.
+
+Golden pairs (graded responses scoring >= GOLDEN_MIN_SCORE) are kept once
+per question, keyed by question_key(): the SHA-256 of the question
+normalized to lower-case alphanumeric words (answer_cache.normalize_text),
+so re-runs of qa_stress_test.py and Phase E retests never duplicate a
+question. When the same question is seen again the better-scoring answer
+is kept (ties keep the existing one) and the sighting is added to the
+pair's provenance list.
+
+Two files, written atomically:
+
+    assistant_portability/golden_qa_pairs.jsonl        one pair per line,
+                                                       sorted by key
+    assistant_portability/golden_qa_pairs.jsonl.json   index: key -> (offset,
+                                                       length, score), plus
+                                                       persona -> keys and
+                                                       target doc -> keys
+
+Opening a store reads only the index; pairs are read by seeking to their
+offset, so sampling a few pairs for one persona or target document out of
+thousands never parses the rest.
+
+Usage:
+    python golden_qa_store.py build                    # Merge QA result files into the store
+    python golden_qa_store.py build assistant_portability/golden_qa_pairs.json
+    python golden_qa_store.py stats                    # Pairs per persona / target
+    python golden_qa_store.py sample -n 5 --persona cfo --target DOC-005
+
+Python 3.8+ compatible, standard library only.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from answer_cache import normalize_text
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_PATH = os.path.join(SCRIPT_DIR, "assistant_portability", "golden_qa_pairs.jsonl")
+DEFAULT_RESULT_FILES = ("qa_graded_results.json", "qa_retest_results.json")
+STORE_FORMAT = "mw-golden-qa-v1"
+GOLDEN_MIN_SCORE = 80
+
+
+def question_key(text):
+    # type: (str) -> str
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()[:16]
+
+
+def index_path_for(path):
+    # type: (str) -> str
+    return path + ".json"
+
+
+def golden_pairs(data, source, bank=None, min_score=GOLDEN_MIN_SCORE):
+    # type: (Any, str, Optional[Dict[str, Dict[str, Any]]], int) -> List[Dict[str, Any]]
+    """Golden pairs from a QA results file (a list of results, a dict with
+    "results", or an old golden_qa_pairs.json list); bank maps question ids
+    and question keys to question-bank entries and fills in the targets
+    older files do not carry."""
+    items = data if isinstance(data, list) else data.get("results", [])
+    timestamp = "" if isinstance(data, list) else str(data.get("timestamp", ""))
+    bank = bank or {}
+    out = []  # type: List[Dict[str, Any]]
+    for item in items:
+        resp = item.get("response") or item.get("ideal_response", "")
+        grading = item.get("grading", {})
+        score = grading.get("score", 0) if grading else item.get("score", 0)
+        grade = grading.get("grade", "") if grading else item.get("grade", "")
+        if not resp or score < min_score:
+            continue
+        question_id = item.get("question_id", "")
+        entry = bank.get(question_id) or bank.get(question_key(item.get("question", ""))) or {}
+        targets = item.get("target_docs") or entry.get("targets", [])
+        out.append({
+            "question_id": question_id or entry.get("id", ""),
+            "persona": item.get("persona", "unknown"),
+            "question": item.get("question", ""),
+            "targets": list(targets),
+            "ideal_response": resp,
+            "score": score,
+            "grade": grade,
+            "source": item.get("source") or source,
+            "timestamp": timestamp,
+        })
+    return out
+
+
+class GoldenQAStore(object):
+    """Golden pairs keyed by question hash, read lazily through the index."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        # type: (str) -> None
+        self.path = path
+        self.records = {}  # type: Dict[str, List[Any]]
+        self.personas = {}  # type: Dict[str, List[str]]
+        self.targets = {}  # type: Dict[str, List[str]]
+        self.pending = {}  # type: Dict[str, Dict[str, Any]]
+        if os.path.exists(index_path_for(path)) and os.path.exists(path):
+            with io.open(index_path_for(path), "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("format") != STORE_FORMAT:
+                raise ValueError("%s: unknown golden QA store format %r"
+                                 % (path, index.get("format")))
+            self.records = index["records"]
+            self.personas = index["personas"]
+            self.targets = index["targets"]
+
+    def __len__(self):
+        # type: () -> int
+        return len(self.records)
+
+    def __contains__(self, key):
+        # type: (str) -> bool
+        return key in self.records
+
+    def _read(self, key):
+        # type: (str) -> Dict[str, Any]
+        offset, length = self.records[key][:2]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length).decode("utf-8"))
+
+    def get(self, key):
+        # type: (str) -> Optional[Dict[str, Any]]
+        if key in self.pending:
+            return self.pending[key]
+        if key not in self.records:
+            return None
+        return self._read(key)
+
+    def keys(self, persona=None, target=None):
+        # type: (Optional[str], Optional[str]) -> List[str]
+        """Sorted keys, optionally only one persona's and/or one target's."""
+        keys = set(self.records)
+        if persona:
+            keys &= set(self.personas.get(persona, []))
+        if target:
+            keys &= set(self.targets.get(target, []))
+        return sorted(keys)
+
+    def iter_pairs(self, keys=None):
+        # type: (Optional[Iterable[str]]) -> Iterator[Dict[str, Any]]
+        """Pairs for keys (default: all) with one open file handle."""
+        keys = sorted(self.records) if keys is None else list(keys)
+        with open(self.path, "rb") if os.path.exists(self.path) else io.BytesIO() as f:
+            for key in keys:
+                if key in self.pending:
+                    yield self.pending[key]
+                    continue
+                offset, length = self.records[key][:2]
+                f.seek(offset)
+                yield json.loads(f.read(length).decode("utf-8"))
+
+    def sample(self, n, persona=None, target=None, seed=None):
+        # type: (int, Optional[str], Optional[str], Optional[int]) -> List[Dict[str, Any]]
+        keys = self.keys(persona, target)
+        chosen = random.Random(seed).sample(keys, min(n, len(keys)))
+        return list(self.iter_pairs(sorted(chosen)))
+
+    def add(self, pair):
+        # type: (Dict[str, Any]) -> str
+        """Merge one pair: "added", "improved" (better score replaced the
+        stored answer) or "duplicate" (provenance recorded only)."""
+        key = question_key(pair["question"])
+        sighting = dict((k, pair.get(k)) for k in ("source", "timestamp", "question_id",
+                                                   "score", "grade"))
+        current = self.get(key)
+        if current is None:
+            record = dict(pair, key=key, provenance=[sighting])
+            action = "added"
+        else:
+            provenance = current.get("provenance", [])
+            if sighting not in provenance:
+                provenance = provenance + [sighting]
+            if pair["score"] > current["score"]:
+                record = dict(pair, key=key, provenance=provenance)
+                action = "improved"
+            else:
+                record = dict(current, provenance=provenance)
+                if not record.get("targets") and pair.get("targets"):
+                    record["targets"] = pair["targets"]
+                action = "duplicate"
+                if record == current:
+                    return action
+        self.pending[key] = record
+        self.records[key] = [0, 0, record["score"]]
+        for groups, names in ((self.personas, [record["persona"]]),
+                              (self.targets, record.get("targets") or [])):
+            for name in names:
+                if key not in groups.setdefault(name, []):
+                    groups[name].append(key)
+        return action
+
+    def save(self):
+        # type: () -> None
+        """Rewrite data file and index (sorted by key) if anything changed."""
+        if not self.pending:
+            return
+        records = {}  # type: Dict[str, List[Any]]
+        personas = {}  # type: Dict[str, List[str]]
+        targets = {}  # type: Dict[str, List[str]]
+        tmp = self.path + ".tmp"
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with open(tmp, "wb") as out:
+            for pair in self.iter_pairs():
+                line = json.dumps(pair, ensure_ascii=False, sort_keys=True).encode("utf-8")
+                records[pair["key"]] = [out.tell(), len(line), pair["score"]]
+                out.write(line + b"\n")
+                personas.setdefault(pair["persona"], []).append(pair["key"])
+                for doc in pair.get("targets") or []:
+                    targets.setdefault(doc, []).append(pair["key"])
+        os.replace(tmp, self.path)
+        index = {"format": STORE_FORMAT, "updated": datetime.now().isoformat(),
+                 "count": len(records), "records": records, "personas": personas,
+                 "targets": targets}
+        with io.open(index_path_for(self.path) + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f, sort_keys=True)
+        os.replace(index_path_for(self.path) + ".tmp", index_path_for(self.path))
+        self.records, self.personas, self.targets = records, personas, targets
+        self.pending = {}
+
+    def to_list(self):
+        # type: () -> List[Dict[str, Any]]
+        """Every pair in the flat golden_qa_pairs.json layout."""
+        fields = ("persona", "question", "targets", "ideal_response", "score", "grade", "source")
+        return [dict((k, pair.get(k)) for k in fields) for pair in self.iter_pairs()]
+
+
+def merge_result_files(store, paths, bank=None):
+    # type: (GoldenQAStore, Iterable[str], Optional[Dict[str, Dict[str, Any]]]) -> Dict[str, int]
+    """Add the golden pairs of every existing QA results file; action counts."""
+    counts = {"added": 0, "improved": 0, "duplicate": 0}
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with io.open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for pair in golden_pairs(data, os.path.basename(path), bank):
+            counts[store.add(pair)] += 1
+    return counts
+
+
+def load_bank():
+    # type: () -> Dict[str, Dict[str, Any]]
+    """Question bank by id and by question_key(), or {} if it cannot be read."""
+    try:
+        from question_bank import load_questions
+        questions = load_questions()
+    except (IOError, OSError, ValueError):
+        return {}
+    bank = dict((q["id"], q) for q in questions)
+    bank.update((question_key(q["text"]), q) for q in questions)
+    return bank
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicated golden QA pair store")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="Store data file path")
+    sub = parser.add_subparsers(dest="command")
+    b = sub.add_parser("build", help="Merge QA result files into the store")
+    b.add_argument("files", nargs="*", default=[os.path.join(SCRIPT_DIR, name)
+                                                for name in DEFAULT_RESULT_FILES])
+    sub.add_parser("stats", help="Pairs per persona and target document")
+    s = sub.add_parser("sample", help="Print a random sample of pairs")
+    s.add_argument("-n", type=int, default=5)
+    s.add_argument("--persona")
+    s.add_argument("--target")
+    s.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    store = GoldenQAStore(args.store)
+    if args.command == "build":
+        counts = merge_result_files(store, args.files, load_bank())
+        store.save()
+        print("%d pairs (%d added, %d improved, %d duplicates)" % (
+            len(store), counts["added"], counts["improved"], counts["duplicate"]))
+    elif args.command == "stats":
+        print("%d pairs" % len(store))
+        for persona in sorted(store.personas):
+            print("  persona %-14s %d" % (persona, len(store.personas[persona])))
+        for doc in sorted(store.targets):
+            print("  target  %-14s %d" % (doc, len(store.targets[doc])))
+    elif args.command == "sample":
+        for pair in store.sample(args.n, args.persona, args.target, args.seed):
+            print("[%s] %s %s (%d)\n  %s" % (pair["key"], pair["persona"],
+                                            ",".join(pair.get("targets") or []),
+                                            pair["score"], pair["question"][:100]))
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- data-driven migration config generator.
+
+Each target platform is one JSON file in migration_platforms/:
+
+  key                 short name ("anthropic"), also names the serving stub
+  title               human-readable platform name
+  output              config file written to assistant_portability/migration_configs/
+  backend             assistant_backends.py backend that serves this platform
+  backend_options     keyword arguments for that backend (model, deployment...)
+  instructions_field  config field that references the system instructions
+  port                default port of the serving stub
+  templates           optional {template name: output file} rendered per platform
+  config              the platform config itself
+
+migration_platforms/comparison.json holds the platform comparison matrix.
+
+The instructions are not copied into every config. They are written once
+to migration_configs/instructions-<sha256[:12]>.md and each config's
+instructions_field holds {"path", "sha256"}; resolve_instructions() reads
+the file back and checks the hash. Files no config references any more
+are removed.
+
+Templates (migration_platforms/templates/) are string.Template files
+filled from the platform definition and its backend_options. Every
+platform gets serve_<key>.py from serve_stub.py.tmpl, which runs
+assistant_server.py with the platform's backend and --platform-config.
+
+Outputs are written with extraction_journal.write_if_changed(), so
+regenerating unchanged platforms rewrites nothing and adding a platform
+is a new JSON file with no code change.
+
+Usage:
+    python build_migration_configs.py             # Regenerate every platform
+    python migration_generator.py                 # List platform definitions
+
+Python 3.8+ compatible, standard library only.
+"""
+
+import glob
+import hashlib
+import io
+import json
+import os
+from collections import OrderedDict
+from string import Template
+from typing import Any, Dict, List
+
+from extraction_journal import write_if_changed
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PLATFORM_DIR = os.path.join(SCRIPT_DIR, "migration_platforms")
+TEMPLATE_DIR = os.path.join(PLATFORM_DIR, "templates")
+DEFAULT_OUTPUT_DIR = os.path.join(SCRIPT_DIR, "assistant_portability", "migration_configs")
+COMPARISON_FILE = "comparison.json"
+STUB_TEMPLATE = "serve_stub.py.tmpl"
+INSTRUCTIONS_PREFIX = "instructions-"
+REQUIRED_FIELDS = ("key", "title", "output", "backend", "instructions_field", "config")
+
+
+# ═══════════════════════════════════════════════════════════════
+# PLATFORM DEFINITIONS
+# ═══════════════════════════════════════════════════════════════
+
+def _load_json(path):
+    # type: (str) -> Any
+    with io.open(path, "r", encoding="utf-8") as f:
+        return json.load(f, object_pairs_hook=OrderedDict)
+
+
+def load_platforms(platform_dir=PLATFORM_DIR):
+    # type: (str) -> List[Dict[str, Any]]
+    """Platform definitions sorted by key; ValueError on a malformed one."""
+    platforms = []  # type: List[Dict[str, Any]]
+    for path in sorted(glob.glob(os.path.join(platform_dir, "*.json"))):
+        if os.path.basename(path) == COMPARISON_FILE:
+            continue
+        platform = _load_json(path)
+        missing = [field for field in REQUIRED_FIELDS if field not in platform]
+        if missing:
+            raise ValueError("%s: missing %s" % (path, ", ".join(missing)))
+        platforms.append(platform)
+    return sorted(platforms, key=lambda p: p["key"])
+
+
+def load_comparison(platform_dir=PLATFORM_DIR):
+    # type: (str) -> Dict[str, Any]
+    return _load_json(os.path.join(platform_dir, COMPARISON_FILE))
+
+
+# ═══════════════════════════════════════════════════════════════
+# CONTENT-ADDRESSED INSTRUCTIONS
+# ═══════════════════════════════════════════════════════════════
+
+def instructions_ref(instructions):
+    # type: (str) -> Dict[str, str]
+    digest = hashlib.sha256(instructions.encode("utf-8")).hexdigest()
+    return OrderedDict([("path", "%s%s.md" % (INSTRUCTIONS_PREFIX, digest[:12])),
+                        ("sha256", digest)])
+
+
+def resolve_instructions(ref, base_dir=DEFAULT_OUTPUT_DIR):
+    # type: (Any, str) -> str
+    """Instructions text for a config field: a {"path", "sha256"} reference
+    (relative to base_dir) or, for older configs, the text itself."""
+    if isinstance(ref, str):
+        return ref
+    with io.open(os.path.join(base_dir, ref["path"]), "r", encoding="utf-8") as f:
+        text = f.read()
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    if digest != ref["sha256"]:
+        raise ValueError("%s: sha256 %s does not match the referenced %s"
+                         % (ref["path"], digest[:12], ref["sha256"][:12]))
+    return text
+
+
+def prune_instructions(out_dir, keep):
+    # type: (str, str) -> List[str]
+    """Remove instruction files other than keep; the removed names."""
+    removed = []
+    for path in sorted(glob.glob(os.path.join(out_dir, INSTRUCTIONS_PREFIX + "*.md"))):
+        if os.path.basename(path) != keep:
+            os.remove(path)
+            removed.append(os.path.basename(path))
+    return removed
+
+
+# ═══════════════════════════════════════════════════════════════
+# RENDERING
+# ═══════════════════════════════════════════════════════════════
+
+def template_values(platform):
+    # type: (Dict[str, Any]) -> Dict[str, Any]
+    values = dict(platform.get("backend_options") or {})
+    values.update((k, platform[k]) for k in ("key", "title", "output", "backend",
+                                             "instructions_field"))
+    values["port"] = platform.get("port", 8765)
+    return values
+
+
+def render_template(name, values, template_dir=TEMPLATE_DIR):
+    # type: (str, Dict[str, Any], str) -> str
+    with io.open(os.path.join(template_dir, name), "r", encoding="utf-8") as f:
+        return Template(f.read()).substitute(values)
+
+
+def render_config(platform, ref):
+    # type: (Dict[str, Any], Dict[str, str]) -> Dict[str, Any]
+    """The platform config with its instructions reference and the serving
+    settings the stub reads back through --platform-config."""
+    config = OrderedDict(platform["config"])
+    config[platform["instructions_field"]] = ref
+    config["serving"] = OrderedDict([
+        ("backend", platform["backend"]),
+        ("backend_options", platform.get("backend_options") or {}),
+        ("instructions_field", platform["instructions_field"]),
+        ("stub", "serve_%s.py" % platform["key"]),
+    ])
+    return config
+
+
+def dump_json(data):
+    # type: (Any) -> str
+    return json.dumps(data, indent=2, ensure_ascii=False) + "\n"
+
+
+def generate(instructions, platforms, out_dir=DEFAULT_OUTPUT_DIR, template_dir=TEMPLATE_DIR):
+    # type: (str, List[Dict[str, Any]], str, str) -> Dict[str, str]
+    """Write every platform's outputs; {file name: write action}, including
+    "removed" for pruned instruction files."""
+    os.makedirs(out_dir, exist_ok=True)
+    ref = instructions_ref(instructions)
+    actions = OrderedDict()  # type: Dict[str, str]
+    actions[ref["path"]] = write_if_changed(os.path.join(out_dir, ref["path"]), instructions)
+    for platform in platforms:
+        values = template_values(platform)
+        outputs = [(platform["output"], dump_json(render_config(platform, ref))),
+                   ("serve_%s.py" % platform["key"], render_template(STUB_TEMPLATE, values,
+                                                                     template_dir))]
+        for name, output in (platform.get("templates") or {}).items():
+            outputs.append((output, render_template(name, values, template_dir)))
+        for name, text in outputs:
+            actions[name] = write_if_changed(os.path.join(out_dir, name), text)
+    for name in prune_instructions(out_dir, ref["path"]):
+        actions[name] = "removed"
+    return actions
+
+
+def serving_settings(config_path):
+    # type: (str) -> Dict[str, Any]
+    """{"backend", "backend_options", "instructions"} of a generated config."""
+    config = _load_json(config_path)
+    serving = config.get("serving")
+    if not serving:
+        raise ValueError("%s: no serving settings (regenerate with build_migration_configs.py)"
+                         % config_path)
+    return {
+        "backend": serving["backend"],
+        "backend_options": dict(serving.get("backend_options") or {}),
+        "instructions": resolve_instructions(config[serving["instructions_field"]],
+                                             os.path.dirname(os.path.abspath(config_path))),
+    }
+
+
+def main():
+    for platform in load_platforms():
+        print("%-12s %-42s backend=%-9s -> %s" % (platform["key"], platform["title"],
+                                                  platform["backend"], platform["output"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- repeated latency/throughput benchmark per platform.
+
+A single timed answer per question says little: platform latency varies by
+seconds from call to call. run_platform() instead asks every question
+`repeats` times at each concurrency level, after `warmup` unrecorded
+rounds, and reports per level:
+
+  latency     mean with a 95% Student-t confidence interval, stdev,
+              p50/p90/p99 (qa_metrics.percentile), min/max
+  throughput  answered questions per second over the level's wall time
+  errors      count and rate
+
+so throughput can be read against latency as concurrency grows. The
+defaults are deliberately light -- one measured round at concurrency 1,
+no warm-up, `pause` seconds between sequential calls -- so a routine run
+costs one API call per question; repeats, warm-up and higher concurrency
+are opt-in (--repeats 5 --warmup 1 --concurrency 1,4). Runs are
+appended to assistant_portability/analytics/benchmark_history.json, and
+switching_evidence() turns the history into the evidence behind the
+platform_comparison.json switching triggers: a baseline slowdown counts
+only when its confidence interval clears the previous run's, and an
+alternative is "faster" only when its interval lies entirely below the
+baseline's. Runs are only compared when they asked the same question set
+the same number of times.
+
+Platforms are callables ask(question) -> {"status", "response", ...};
+backend_asker() builds one for any assistant_backends.py backend over the
+retrieval-augmented prompt, competitive_intelligence.py adds the OpenAI
+assistant.
+
+Usage:
+    python competitive_intelligence.py --repeats 5 --warmup 1 --concurrency 1,4
+    python competitive_intelligence.py --platforms openai,offline --no-cache
+
+Python 3.8+ compatible, standard library only (plus the chosen backends).
+"""
+
+import hashlib
+import io
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from qa_metrics import percentile
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HISTORY = os.path.join(SCRIPT_DIR, "assistant_portability", "analytics",
+                               "benchmark_history.json")
+HISTORY_LIMIT = 200
+DEFAULT_REPEATS = 1
+DEFAULT_WARMUP = 0
+DEFAULT_LEVELS = (1,)
+DEFAULT_PAUSE_SECONDS = 2.0
+BASELINE_PLATFORM = "openai-assistants"
+DEGRADED_ERROR_RATE_PCT = 10.0
+
+# Two-sided 95% Student-t critical values by degrees of freedom; 1.96 beyond 30.
+T_95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+
+# ═══════════════════════════════════════════════════════════════
+# STATISTICS
+# ═══════════════════════════════════════════════════════════════
+
+def mean_confidence_interval(values):
+    # type: (Sequence[float]) -> Tuple[float, float, float]
+    """(mean, low, high) of the 95% confidence interval for the mean."""
+    n = len(values)
+    if not n:
+        return 0.0, 0.0, 0.0
+    mean = float(sum(values)) / n
+    if n == 1:
+        return mean, mean, mean
+    stdev = math.sqrt(sum((v - mean) ** 2 for v in values) / (n - 1))
+    t = T_95[n - 2] if n - 1 <= len(T_95) else 1.96
+    half = t * stdev / math.sqrt(n)
+    return mean, mean - half, mean + half
+
+
+def latency_stats(values):
+    # type: (Sequence[float]) -> Dict[str, Any]
+    """Mean, 95% CI, stdev and percentiles of latencies (seconds)."""
+    n = len(values)
+    mean, low, high = mean_confidence_interval(values)
+    stdev = math.sqrt(sum((v - mean) ** 2 for v in values) / (n - 1)) if n > 1 else 0.0
+    return {
+        "count": n,
+        "mean": round(mean, 4),
+        "ci95": [round(low, 4), round(high, 4)],
+        "stdev": round(stdev, 4),
+        "p50": round(percentile(values, 0.5), 4),
+        "p90": round(percentile(values, 0.9), 4),
+        "p99": round(percentile(values, 0.99), 4),
+        "min": round(min(values), 4) if n else 0.0,
+        "max": round(max(values), 4) if n else 0.0,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+# RUNNER
+# ═══════════════════════════════════════════════════════════════
+
+def _timed_ask(ask, question):
+    # type: (Callable[[str], Dict[str, Any]], str) -> Dict[str, Any]
+    start = time.perf_counter()
+    try:
+        answer = ask(question)
+        ok = answer.get("status", "completed") == "completed"
+    except Exception as e:
+        answer, ok = {"error": str(e)}, False
+    return {"question": question, "ok": ok, "seconds": time.perf_counter() - start,
+            "answer": answer}
+
+
+def _ask_all(pool, ask, questions, concurrency, pause):
+    # type: (ThreadPoolExecutor, Callable[[str], Dict[str, Any]], List[str], int, float) -> Tuple[List[Dict[str, Any]], float]
+    """Timed samples for questions, and the seconds spent pausing. At
+    concurrency 1 calls are paced `pause` seconds apart (untimed)."""
+    if concurrency > 1 or pause <= 0:
+        return list(pool.map(lambda q: _timed_ask(ask, q), questions)), 0.0
+    samples = []
+    for i, question in enumerate(questions):
+        if i:
+            time.sleep(pause)
+        samples.append(_timed_ask(ask, question))
+    return samples, pause * max(0, len(questions) - 1)
+
+
+def run_level(ask, questions, repeats=DEFAULT_REPEATS, warmup=DEFAULT_WARMUP, concurrency=1,
+              pause=0.0):
+    # type: (Callable[[str], Dict[str, Any]], List[str], int, int, int, float) -> Dict[str, Any]
+    """Every question `repeats` times with `concurrency` in flight, after
+    `warmup` unrecorded rounds. Pauses are left out of the wall time."""
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        _ask_all(pool, ask, list(questions) * warmup, concurrency, pause)
+        start = time.perf_counter()
+        samples, paused = _ask_all(pool, ask, list(questions) * repeats, concurrency, pause)
+        wall = time.perf_counter() - start - paused
+    ok = [s["seconds"] for s in samples if s["ok"]]
+    errors = len(samples) - len(ok)
+    return {
+        "concurrency": concurrency,
+        "samples": len(samples),
+        "errors": errors,
+        "error_rate_pct": round(100.0 * errors / len(samples), 1) if samples else 0.0,
+        "wall_seconds": round(wall, 3),
+        "throughput_qps": round(len(ok) / wall, 3) if wall > 0 else 0.0,
+        "latency": latency_stats(ok),
+        "first_samples": dict((s["question"], s) for s in reversed(samples)),
+    }
+
+
+def question_set_id(questions):
+    # type: (Sequence[str]) -> str
+    """Short digest identifying a question set (order-insensitive)."""
+    digest = hashlib.sha256("\n".join(sorted(questions)).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def run_platform(name, ask, questions, repeats=DEFAULT_REPEATS, warmup=DEFAULT_WARMUP,
+                 levels=DEFAULT_LEVELS, pause=0.0):
+    # type: (str, Callable[[str], Dict[str, Any]], List[str], int, int, Sequence[int], float) -> Dict[str, Any]
+    """One run_level() per concurrency level. "samples" holds the first
+    recorded sample per question (answer and seconds); drop it before
+    storing the result in the history."""
+    rows = []
+    samples = {}  # type: Dict[str, Dict[str, Any]]
+    for level in levels:
+        row = run_level(ask, questions, repeats, warmup, level, pause)
+        first = row.pop("first_samples")
+        for question in questions:
+            samples.setdefault(question, first.get(question))
+        rows.append(row)
+    return {"platform": name, "repeats": repeats, "warmup": warmup,
+            "questions": len(questions), "question_set": question_set_id(questions),
+            "levels": rows, "samples": samples}
+
+
+def backend_asker(name, **kwargs):
+    # type: (str, Any) -> Callable[[str], Dict[str, Any]]
+    """ask() for an assistant_backends.py backend over the retrieved context."""
+    from assistant_backends import load_backend
+    from canon_bm25 import load_or_build
+    from canon_rag import build_system_prompt, load_instructions, select_context
+
+    backend = load_backend(name, **kwargs)
+    index = load_or_build()
+    instructions = load_instructions()
+
+    def ask(question):
+        chunks = select_context(index, question)
+        answer = backend.generate(build_system_prompt(instructions, chunks), question, chunks)
+        return {"status": "completed", "response": answer}
+    return ask
+
+
+# ═══════════════════════════════════════════════════════════════
+# HISTORY / SWITCHING EVIDENCE
+# ═══════════════════════════════════════════════════════════════
+
+def load_history(path=DEFAULT_HISTORY):
+    # type: (str) -> List[Dict]
+    if not os.path.exists(path):
+        return []
+    with io.open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def append_history(run, path=DEFAULT_HISTORY, limit=HISTORY_LIMIT):
+    # type: (Dict, str, int) -> List[Dict]
+    history = load_history(path)
+    history.append(run)
+    history = history[-limit:]
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with io.open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+    return history
+
+
+def _level(result, concurrency):
+    # type: (Optional[Dict], int) -> Optional[Dict]
+    for row in (result or {}).get("levels", []):
+        if row["concurrency"] == concurrency and row["latency"]["count"]:
+            return row
+    return None
+
+
+def _comparable(result, other):
+    # type: (Dict, Dict) -> bool
+    """Same question set asked the same number of times."""
+    return all(result.get(key) == other.get(key)
+               for key in ("question_set", "questions", "repeats"))
+
+
+def _latest(history, platform, skip=0, like=None):
+    # type: (List[Dict], str, int, Optional[Dict]) -> Tuple[Optional[Dict], Optional[Dict]]
+    """(run, platform result) of the latest run measuring platform, after
+    skipping `skip` newer ones; only results comparable to `like` count."""
+    for run in reversed(history):
+        result = run.get("platforms", {}).get(platform)
+        if result is not None and (like is None or _comparable(result, like)):
+            if skip == 0:
+                return run, result
+            skip -= 1
+    return None, None
+
+
+def switching_evidence(history, baseline=BASELINE_PLATFORM, concurrency=1):
+    # type: (List[Dict], str, int) -> Dict[str, Dict[str, Any]]
+    """Statistical evidence for the latency-driven switching triggers."""
+    evidence = {}  # type: Dict[str, Dict[str, Any]]
+    run, current = _latest(history, baseline)
+    now = _level(current, concurrency)
+    if now is None:
+        return {"openai_api_degradation": {"fired": False,
+                                           "evidence": "no %s benchmark recorded" % baseline}}
+    _, previous = _latest(history, baseline, skip=1, like=current)
+    before = _level(previous, concurrency)
+    ci = now["latency"]["ci95"]
+    if now["error_rate_pct"] >= DEGRADED_ERROR_RATE_PCT:
+        fired, why = True, "error rate %.1f%%" % now["error_rate_pct"]
+    elif before is not None and ci[0] > before["latency"]["ci95"][1]:
+        fired, why = True, "mean latency CI [%.2f, %.2f]s above previous [%.2f, %.2f]s" % (
+            ci[0], ci[1], before["latency"]["ci95"][0], before["latency"]["ci95"][1])
+    elif before is None:
+        fired, why = False, "no earlier comparable %s run (same questions and repeats)" % baseline
+    else:
+        fired, why = False, "mean latency CI [%.2f, %.2f]s overlaps previous [%.2f, %.2f]s" % (
+            ci[0], ci[1], before["latency"]["ci95"][0], before["latency"]["ci95"][1])
+    evidence["openai_api_degradation"] = {"fired": fired, "evidence": why,
+                                          "run": run["generated"]}
+
+    for name, result in sorted(run["platforms"].items()):
+        other = _level(result, concurrency)
+        if name == baseline or other is None:
+            continue
+        other_ci = other["latency"]["ci95"]
+        evidence["%s_faster_than_%s" % (name, baseline)] = {
+            "fired": other_ci[1] < ci[0],
+            "evidence": "mean latency CI [%.2f, %.2f]s vs [%.2f, %.2f]s at concurrency %d" % (
+                other_ci[0], other_ci[1], ci[0], ci[1], concurrency),
+            "run": run["generated"],
+        }
+    return evidence
+
+
+def new_run(platform_results):
+    # type: (List[Dict[str, Any]]) -> Dict[str, Any]
+    """History entry for one benchmark run (per-question samples dropped)."""
+    return {"generated": datetime.now().isoformat(),
+            "platforms": dict((r["platform"], dict((k, v) for k, v in r.items() if k != "samples"))
+                              for r in platform_results)}
+
+
+def print_benchmark(result):
+    # type: (Dict[str, Any]) -> None
+    print("  %s (%d questions x %d repeats, %d warm-up)" % (
+        result["platform"], result["questions"], result["repeats"], result["warmup"]))
+    print("    %5s %9s %19s %8s %8s %8s %8s %6s" % (
+        "conc", "mean", "95% CI", "p50", "p90", "p99", "q/s", "err"))
+    for row in result["levels"]:
+        lat = row["latency"]
+        print("    %5d %8.3fs  [%7.3f, %7.3f] %7.3fs %7.3fs %7.3fs %8.2f %5.1f%%" % (
+            row["concurrency"], lat["mean"], lat["ci95"][0], lat["ci95"][1], lat["p50"],
+            lat["p90"], lat["p99"], row["throughput_qps"], row["error_rate_pct"]))
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- golden QA replay against migrated backends.
+
+verify_portability.py --benchmark replays golden_qa_pairs.json through
+each configured backend (assistant_backends.py) with the same
+retrieval-augmented prompt assistant_server.py builds (canon_rag.py), N
+questions in flight at a time, and grades every answer with
+qa_grading.grade_response(). The golden answers were produced and graded
+on the OpenAI assistant, so per platform the report gives:
+
+  quality     mean score, pass rate, parity (mean score as % of the golden
+              mean) and cited-document agreement with the golden answer
+  latency     p50/p90/p99 per question (qa_metrics.summarize)
+  throughput  questions per minute over the wall-clock span of the run
+
+Retrieval plays the role of file search for these backends: an answer
+counts as file-search backed when chunks were retrieved, and its
+annotations are the documents it cites that were among those chunks.
+
+The offline backend is always replayed (no network, deterministic) as the
+local stand-in; anthropic is replayed when ANTHROPIC_API_KEY is set.
+
+Usage:
+    python verify_portability.py --benchmark
+    python verify_portability.py --benchmark --backends offline,anthropic --concurrency 8
+
+Python 3.8+ compatible, standard library only (plus the chosen backends).
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from assistant_backends import load_backend
+from canon_rag import (DEFAULT_TOKEN_BUDGET, DEFAULT_TOP_K, build_system_prompt, cited_docs,
+                       select_context)
+from qa_grading import grade_response
+from qa_metrics import summarize
+
+DEFAULT_CONCURRENCY = 4
+
+
+def configured_backends():
+    # type: () -> List[str]
+    """Backends that can be replayed here: offline, plus anthropic with a key."""
+    names = ["offline"]
+    if os.environ.get("ANTHROPIC_API_KEY"):
+        names.append("anthropic")
+    return names
+
+
+def _replay_one(backend, index, instructions, pair, k, token_budget, citations):
+    # type: (Any, Any, str, Dict[str, Any], int, int, Any) -> Dict[str, Any]
+    result = {
+        "persona": pair.get("persona", "unknown"),
+        "question": pair["question"],
+        "target_docs": pair.get("targets") or [],
+        "backend": backend.name,
+        "model": getattr(backend, "model", ""),
+        "status": "error",
+        "response": "",
+        "response_length": 0,
+        "file_search_used": False,
+        "annotation_count": 0,
+        "elapsed_seconds": 0,
+        "started_at": round(time.time(), 3),
+    }  # type: Dict[str, Any]
+    start = time.time()
+    try:
+        chunks = select_context(index, pair["question"], k, token_budget)
+        answer = backend.generate(build_system_prompt(instructions, chunks), pair["question"],
+                                  chunks)
+        retrieved = set(c["doc_id"] for c in chunks)
+        result.update(status="completed", response=answer, response_length=len(answer),
+                      file_search_used=bool(chunks),
+                      annotation_count=len([d for d in cited_docs(answer) if d in retrieved]))
+    except Exception as e:
+        result["error"] = str(e)
+    result["elapsed_seconds"] = round(time.time() - start, 3)
+    result["finished_at"] = round(time.time(), 3)
+    result["grading"] = grade_response(result, citations)
+    return result
+
+
+def replay_backend(backend, pairs, index, instructions, concurrency=DEFAULT_CONCURRENCY,
+                   k=DEFAULT_TOP_K, token_budget=DEFAULT_TOKEN_BUDGET, citations=None):
+    # type: (Any, List[Dict[str, Any]], Any, str, int, int, int, Any) -> List[Dict[str, Any]]
+    """Graded replay results for pairs, in pair order."""
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        return list(pool.map(
+            lambda pair: _replay_one(backend, index, instructions, pair, k, token_budget,
+                                     citations), pairs))
+
+
+def answer_quality(pairs, results):
+    # type: (List[Dict[str, Any]], List[Dict[str, Any]]) -> Dict[str, Any]
+    """Replay scores against the golden answers they replay."""
+    n = len(results)
+    if not n:
+        return {"questions": 0, "mean_score": 0.0, "golden_mean_score": 0.0, "parity_pct": 0.0,
+                "pass_rate_pct": 0.0, "doc_agreement_pct": None}
+    scores = [r["grading"]["score"] for r in results]
+    golden = [p.get("score", 0) for p in pairs]
+    mean, golden_mean = float(sum(scores)) / n, float(sum(golden)) / n
+    expected = found = 0
+    for pair, r in zip(pairs, results):
+        docs = cited_docs(pair.get("ideal_response", ""))
+        expected += len(docs)
+        found += len(set(docs) & set(cited_docs(r["response"])))
+    return {
+        "questions": n,
+        "mean_score": round(mean, 1),
+        "golden_mean_score": round(golden_mean, 1),
+        "parity_pct": round(100.0 * mean / golden_mean, 1) if golden_mean else 0.0,
+        "pass_rate_pct": round(100.0 * sum(1 for r in results
+                                           if r["grading"]["grade"] == "PASS") / n, 1),
+        "doc_agreement_pct": round(100.0 * found / expected, 1) if expected else None,
+    }
+
+
+def run_replay(backend_names, pairs, index, instructions, concurrency=DEFAULT_CONCURRENCY,
+               citations=None, backend_options=None):
+    # type: (List[str], List[Dict[str, Any]], Any, str, int, Any, Optional[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]
+    """{backend: {"quality", "metrics", "results"}} or {backend: {"error"}}
+    for a backend that cannot be constructed."""
+    report = {}  # type: Dict[str, Dict[str, Any]]
+    for name in backend_names:
+        try:
+            backend = load_backend(name, **(backend_options or {}).get(name, {}))
+        except Exception as e:  # missing SDK or credentials
+            report[name] = {"error": str(e)}
+            continue
+        results = replay_backend(backend, pairs, index, instructions, concurrency,
+                                 citations=citations)
+        report[name] = {
+            "model": getattr(backend, "model", ""),
+            "concurrency": concurrency,
+            "quality": answer_quality(pairs, results),
+            "metrics": summarize(results),
+            "results": results,
+        }
+    return report
+
+
+def print_replay_report(report):
+    # type: (Dict[str, Dict[str, Any]]) -> None
+    print("  %-10s %6s %7s %7s %6s %9s %9s %8s" % (
+        "platform", "score", "parity", "pass", "docs", "p50", "p90", "q/min"))
+    for name, row in report.items():
+        if "error" in row:
+            print("  %-10s unavailable: %s" % (name, row["error"][:60]))
+            continue
+        q, m = row["quality"], row["metrics"]
+        print("  %-10s %6.1f %6.1f%% %6.1f%% %6s %8.3fs %8.3fs %8.1f" % (
+            name, q["mean_score"], q["parity_pct"], q["pass_rate_pct"],
+            "-" if q["doc_agreement_pct"] is None else "%d%%" % q["doc_agreement_pct"],
+            m["latency_seconds"]["p50"], m["latency_seconds"]["p90"], m["throughput_qpm"]))
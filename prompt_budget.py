@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- prompt token budget and cost projection.
+
+Measures, offline, the prompts each knowledge-loading strategy would send
+for every question in the question bank (question_bank.py) and projects
+cost and latency per 1,000 queries for each model:
+
+  full         instructions + every FAQ file on every call
+               (canon_rag.full_prompt_baseline, the original migration script)
+  full-cached  the same prompt with the static system part billed at the
+               model's prompt-cache read price (warm cache assumed)
+  rag-k<N>     instructions + top-N retrieved canon chunks under the token
+               budget (canon_rag.select_context, what the configs deploy)
+
+Tokens are counted with tiktoken when it is installed (o200k_base, the
+GPT-4o encoding; Claude and Llama tokenizers differ by roughly +/-15%) and
+with canon_rag.estimate_tokens (characters / 4) otherwise. Output length
+per answer is the mean golden answer length (golden_qa_store.py) unless
+--output-tokens is given.
+
+Latency is modelled per query as
+
+    time to first token + input tokens / prefill rate
+                        + output tokens / decode rate + retrieval time
+
+with retrieval time measured here and the model rates taken from MODELS
+(list-price and typical-throughput assumptions; edit them, or pass
+--model, when sizing a specific deployment).
+
+Usage:
+    python prompt_budget.py                           # Every strategy x model
+    python prompt_budget.py -k 3,6,10 --budget 2000   # Other retrieval settings
+    python prompt_budget.py --model claude-sonnet-4-5-20250929 --out budget.json
+
+Python 3.8+ compatible. Exact token counts need: pip install tiktoken
+"""
+
+import argparse
+import io
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+from canon_rag import (DEFAULT_TOKEN_BUDGET, DEFAULT_TOP_K, build_system_prompt,
+                       estimate_tokens, full_prompt_baseline, load_instructions, select_context)
+from qa_metrics import percentile
+
+TIKTOKEN_ENCODING = "o200k_base"
+DEFAULT_OUTPUT_TOKENS = 500
+PER_QUERIES = 1000
+
+# USD per million tokens and latency model per model.
+#   cache_read  price of prompt-cache hits (None: no prompt caching)
+#   ttft        seconds to first token, prefill/decode in tokens per second
+MODELS = {
+    "claude-sonnet-4-5-20250929": {"input": 3.00, "output": 15.00, "cache_read": 0.30,
+                                   "ttft": 0.8, "prefill": 8000.0, "decode": 60.0},
+    "claude-opus-4-5": {"input": 5.00, "output": 25.00, "cache_read": 0.50,
+                        "ttft": 1.5, "prefill": 5000.0, "decode": 40.0},
+    "gpt-4o": {"input": 2.50, "output": 10.00, "cache_read": 1.25,
+               "ttft": 0.6, "prefill": 10000.0, "decode": 80.0},
+    "llama3.1:70b": {"input": 0.0, "output": 0.0, "cache_read": None,
+                     "ttft": 0.5, "prefill": 1500.0, "decode": 20.0},
+}  # type: Dict[str, Dict[str, Any]]
+
+
+# ═══════════════════════════════════════════════════════════════
+# TOKEN COUNTING
+# ═══════════════════════════════════════════════════════════════
+
+def token_counter():
+    # type: () -> Callable[[str], int]
+    """tiktoken counter when available, else canon_rag.estimate_tokens."""
+    if not HAS_TIKTOKEN:
+        return estimate_tokens
+    encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def tokenizer_name():
+    # type: () -> str
+    return "tiktoken %s" % TIKTOKEN_ENCODING if HAS_TIKTOKEN else "chars/4 estimate"
+
+
+def mean_output_tokens(count, pairs):
+    # type: (Callable[[str], int], Sequence[Dict[str, Any]]) -> int
+    answers = [p.get("ideal_response", "") for p in pairs if p.get("ideal_response")]
+    if not answers:
+        return DEFAULT_OUTPUT_TOKENS
+    return int(round(float(sum(count(a) for a in answers)) / len(answers)))
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROMPT MEASUREMENT
+# ═══════════════════════════════════════════════════════════════
+
+def measure_prompts(index, instructions, questions, ks=(DEFAULT_TOP_K,),
+                    token_budget=DEFAULT_TOKEN_BUDGET, count=None):
+    # type: (Any, str, List[Dict[str, Any]], Sequence[int], int, Optional[Callable[[str], int]]) -> Dict[str, List[Dict[str, Any]]]
+    """{strategy: [{"id", "system", "cached", "question", "retrieval_seconds"}]}
+    token counts per bank question."""
+    count = count or token_counter()
+    full_tokens = count(full_prompt_baseline(instructions))
+    rows = {"full": [], "full-cached": []}  # type: Dict[str, List[Dict[str, Any]]]
+    for k in ks:
+        rows["rag-k%d" % k] = []
+    for q in questions:
+        question_tokens = count(q["text"])
+        base = {"id": q.get("id", ""), "question": question_tokens, "retrieval_seconds": 0.0}
+        rows["full"].append(dict(base, system=full_tokens, cached=0))
+        rows["full-cached"].append(dict(base, system=full_tokens, cached=full_tokens))
+        for k in ks:
+            start = time.perf_counter()
+            chunks = select_context(index, q["text"], k, token_budget)
+            elapsed = time.perf_counter() - start
+            rows["rag-k%d" % k].append(dict(base, system=count(build_system_prompt(
+                instructions, chunks)), cached=0, chunks=len(chunks),
+                retrieval_seconds=elapsed))
+    return rows
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROJECTION
+# ═══════════════════════════════════════════════════════════════
+
+def query_cost(model, input_tokens, cached_tokens, output_tokens):
+    # type: (Dict[str, Any], int, int, int) -> float
+    """USD for one query; cached tokens at the cache-read price if the
+    model has one."""
+    cache_price = model["cache_read"] if model.get("cache_read") is not None else model["input"]
+    return (cache_price * cached_tokens + model["input"] * (input_tokens - cached_tokens)
+            + model["output"] * output_tokens) / 1e6
+
+
+def query_latency(model, input_tokens, output_tokens, retrieval_seconds=0.0):
+    # type: (Dict[str, Any], int, int, float) -> float
+    return (model["ttft"] + float(input_tokens) / model["prefill"]
+            + float(output_tokens) / model["decode"] + retrieval_seconds)
+
+
+def project(rows, model, output_tokens, per=PER_QUERIES):
+    # type: (List[Dict[str, Any]], Dict[str, Any], int, int) -> Dict[str, Any]
+    """Token, cost and latency summary of one strategy on one model."""
+    if not rows:
+        return {"questions": 0}
+    inputs = [r["system"] + r["question"] for r in rows]
+    cached = [r["cached"] if model.get("cache_read") is not None else 0 for r in rows]
+    costs = [query_cost(model, i, c, output_tokens) for i, c in zip(inputs, cached)]
+    latencies = [query_latency(model, i, output_tokens, r["retrieval_seconds"])
+                 for i, r in zip(inputs, rows)]
+    n = len(rows)
+    return {
+        "questions": n,
+        "input_tokens": {"mean": round(float(sum(inputs)) / n, 1),
+                         "p50": percentile(inputs, 0.5), "p95": percentile(inputs, 0.95),
+                         "max": max(inputs)},
+        "output_tokens": output_tokens,
+        "cost_per_query_usd": round(sum(costs) / n, 5),
+        "cost_per_%d_usd" % per: round(sum(costs) / n * per, 2),
+        "latency_seconds": {"mean": round(sum(latencies) / n, 3),
+                            "p95": round(percentile(latencies, 0.95), 3)},
+        "serial_hours_per_%d" % per: round(sum(latencies) / n * per / 3600.0, 2),
+    }
+
+
+def budget_report(rows, models, output_tokens, per=PER_QUERIES):
+    # type: (Dict[str, List[Dict[str, Any]]], Dict[str, Dict[str, Any]], int, int) -> Dict[str, Any]
+    """{"tokenizer", "output_tokens", "strategies": {strategy: {model: projection}}}."""
+    strategies = {}  # type: Dict[str, Dict[str, Any]]
+    for strategy, strategy_rows in rows.items():
+        for name, model in sorted(models.items()):
+            if strategy.endswith("-cached") and model.get("cache_read") is None:
+                continue
+            strategies.setdefault(strategy, {})[name] = project(strategy_rows, model,
+                                                                output_tokens, per)
+    return {"tokenizer": tokenizer_name(), "output_tokens": output_tokens,
+            "per_queries": per, "strategies": strategies}
+
+
+def print_budget_report(report, claim=None):
+    # type: (Dict[str, Any], Optional[str]) -> None
+    per = report["per_queries"]
+    print("Tokenizer: %s | output %d tokens/answer" % (report["tokenizer"],
+                                                       report["output_tokens"]))
+    print("  %-12s %-27s %9s %8s %9s %11s %9s %9s" % (
+        "strategy", "model", "in/query", "in p95", "$/query", "$/%dq" % per, "lat mean",
+        "lat p95"))
+    for strategy, by_model in report["strategies"].items():
+        for name, p in by_model.items():
+            print("  %-12s %-27s %9.0f %8d %9.4f %11.2f %8.2fs %8.2fs" % (
+                strategy, name, p["input_tokens"]["mean"], p["input_tokens"]["p95"],
+                p["cost_per_query_usd"], p["cost_per_%d_usd" % per],
+                p["latency_seconds"]["mean"], p["latency_seconds"]["p95"]))
+    if claim:
+        print("  anthropic_config.json claims: %s" % claim)
+
+
+def anthropic_claim():
+    # type: () -> Optional[str]
+    try:
+        from migration_generator import load_platforms
+    except ImportError:
+        return None
+    for platform in load_platforms():
+        if platform["key"] == "anthropic":
+            return platform["config"].get("_meta", {}).get("cost_estimate")
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt token budget and cost per strategy")
+    parser.add_argument("--bank", help="Question bank file or directory (default qa_data/)")
+    parser.add_argument("-k", default=str(DEFAULT_TOP_K),
+                        help="Comma-separated top-k values for the rag strategies")
+    parser.add_argument("--budget", type=int, default=DEFAULT_TOKEN_BUDGET,
+                        help="Context token budget per question")
+    parser.add_argument("--model", action="append", choices=sorted(MODELS),
+                        help="Only these models (repeatable)")
+    parser.add_argument("--output-tokens", type=int,
+                        help="Answer length (default: mean golden answer length)")
+    parser.add_argument("--out", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    from canon_bm25 import load_or_build
+    from golden_qa_store import GoldenQAStore
+    from question_bank import DEFAULT_BANK, load_questions
+
+    count = token_counter()
+    questions = load_questions(args.bank or DEFAULT_BANK)
+    rows = measure_prompts(load_or_build(), load_instructions(), questions,
+                           [int(k) for k in args.k.split(",")], args.budget, count)
+    output_tokens = args.output_tokens or mean_output_tokens(
+        count, list(GoldenQAStore().iter_pairs()))
+    models = dict((m, MODELS[m]) for m in (args.model or sorted(MODELS)))
+    report = budget_report(rows, models, output_tokens)
+    report["question_bank_size"] = len(questions)
+    report["token_budget"] = args.budget
+
+    print("Questions: %d (%s)" % (len(questions), args.bank or DEFAULT_BANK))
+    print_budget_report(report, anthropic_claim())
+    if args.out:
+        with io.open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print("Report: %s" % args.out)
+
+
+if __name__ == "__main__":
+    main()
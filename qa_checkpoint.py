@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- JSONL checkpoints for resumable QA runs.
+
+qa_stress_test.py Phases A and E append every finished question to a
+checkpoint (one JSON result per line, flushed and fsynced), so an
+interrupted run can resume with --resume instead of asking every question
+again. It needs no API client, so it is tested offline.
+
+Results loaded from a checkpoint are marked "resumed": their latency was
+measured in the earlier run, but their started_at/finished_at stamps
+belong to it, so qa_metrics leaves them out of throughput.
+
+Python 3.8+ compatible, standard library only.
+"""
+
+import json
+import os
+from typing import Dict
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def append_checkpoint(result, filename, directory=SCRIPT_DIR):
+    # type: (Dict, str, str) -> None
+    """Append one finished question to a JSONL checkpoint, flushed to disk."""
+    filepath = os.path.join(directory, filename)
+    with open(filepath, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def load_checkpoint(filename, directory=SCRIPT_DIR):
+    # type: (str, str) -> Dict[str, Dict]
+    """Load completed results from a JSONL checkpoint, keyed by question_id.
+
+    Only results with status "completed" count as answered, so errored or
+    timed-out questions are retried on resume. A truncated or corrupt line
+    (from a crash mid-write) is ignored. Each result is marked "resumed".
+    """
+    filepath = os.path.join(directory, filename)
+    done = {}  # type: Dict[str, Dict]
+    if not os.path.exists(filepath):
+        return done
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(result, dict) and result.get("status") == "completed" \
+                    and result.get("question_id"):
+                result["resumed"] = True
+                done[result["question_id"]] = result
+    return done
+
+
+def reset_checkpoint(filename, directory=SCRIPT_DIR):
+    # type: (str, str) -> None
+    """Truncate a checkpoint so a fresh (non-resumed) run starts clean."""
+    filepath = os.path.join(directory, filename)
+    with open(filepath, "w", encoding="utf-8"):
+        pass
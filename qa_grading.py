@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- response auto-grading.
+
+grade_response() scores one QA result (100 points, minus penalties) and
+flags what it found. It is used by qa_stress_test.py Phases B and E and
+needs no API client, so it can grade results from any backend offline.
+
+Checks:
+  1. Run error / non-completion (FAIL, score 0)
+  2. Response length
+  3. File search used
+  4. Citation annotations
+  5. Hedge phrases (qa_data/hedge_phrases.txt)
+  6. DOC-NNN references present
+  7. Target document coverage
+  8. Citation validity (citation_index.py): citations of documents or
+     sections that do not exist are INVALID_CITATIONS (-10); citations of
+     documents that exist but are not in the master index (DOC-040..042)
+     are flagged UNINDEXED_CITATIONS without penalty.
+
+Python 3.8+ compatible, standard library only.
+"""
+
+from typing import Dict, Optional
+
+from citation_index import CitationIndex, load_or_build_citations
+from question_bank import load_hedge_phrases
+
+HEDGE_PHRASES = load_hedge_phrases()
+INVALID_CITATION_PENALTY = 10
+
+_citation_index = None  # type: Optional[CitationIndex]
+
+
+def default_citation_index():
+    # type: () -> Optional[CitationIndex]
+    """The cached citation index, or None when the canon is not available."""
+    global _citation_index
+    if _citation_index is None:
+        try:
+            _citation_index = load_or_build_citations()
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+    return _citation_index
+
+
+def grade_response(result, citations=None):
+    # type: (Dict, Optional[CitationIndex]) -> Dict
+    """Auto-grade a single response. Returns grade dict.
+
+    citations defaults to the cached citation index; check 8 is skipped
+    when no index can be built.
+    """
+    flags = []
+    score = 100
+
+    text = result.get("response", "")
+    text_lower = text.lower()
+    length = len(text)
+
+    # 1. Error / non-completion
+    if result.get("status") != "completed" or result.get("error"):
+        return {
+            "grade": "FAIL",
+            "score": 0,
+            "flags": ["RUN_ERROR: %s" % result.get("error", "unknown")],
+            "doc_refs_found": [],
+            "hedge_phrases_found": [],
+            "citations": [],
+        }
+
+    # 2. Response length
+    if length < 100:
+        score -= 40
+        flags.append("VERY_SHORT_RESPONSE (%d chars)" % length)
+    elif length < 300:
+        score -= 20
+        flags.append("SHORT_RESPONSE (%d chars)" % length)
+
+    # 3. File search
+    if not result.get("file_search_used", False):
+        score -= 30
+        flags.append("NO_FILE_SEARCH")
+
+    # 4. Citations / annotations
+    ann_count = result.get("annotation_count", 0)
+    if ann_count == 0:
+        score -= 15
+        flags.append("NO_ANNOTATIONS")
+    elif ann_count < 2:
+        score -= 5
+        flags.append("LOW_ANNOTATIONS (%d)" % ann_count)
+
+    # 5. Hedge phrase detection
+    hedges_found = []
+    for phrase in HEDGE_PHRASES:
+        if phrase in text_lower:
+            hedges_found.append(phrase)
+    if len(hedges_found) >= 3:
+        score -= 25
+        flags.append("EXCESSIVE_HEDGING (%d phrases)" % len(hedges_found))
+    elif len(hedges_found) >= 1:
+        score -= 10
+        flags.append("SOME_HEDGING: %s" % ", ".join(hedges_found[:3]))
+
+    # 6. Document reference check
+    doc_refs = []
+    for doc_num in range(1, 43):
+        patterns = [
+            "doc-%03d" % doc_num,
+            "doc %03d" % doc_num,
+            "doc-%d" % doc_num,
+            "document %d" % doc_num,
+            "doc %d " % doc_num,
+        ]
+        for pat in patterns:
+            if pat in text_lower:
+                ref = "DOC-%03d" % doc_num
+                if ref not in doc_refs:
+                    doc_refs.append(ref)
+                break
+    if not doc_refs:
+        score -= 10
+        flags.append("NO_DOC_REFERENCES")
+
+    # 7. Check target doc coverage
+    targets = result.get("target_docs", [])
+    if targets and doc_refs:
+        covered = [t for t in targets if t in doc_refs]
+        if len(covered) < len(targets):
+            missing = [t for t in targets if t not in doc_refs]
+            flags.append("MISSING_TARGET_DOCS: %s" % ", ".join(missing))
+
+    # 8. Citation validity
+    resolved = []
+    if citations is None:
+        citations = default_citation_index()
+    if citations is not None:
+        report = citations.validate(text)
+        resolved = report["citations"]
+        if report["invalid"]:
+            score -= INVALID_CITATION_PENALTY
+            flags.append("INVALID_CITATIONS: %s" % ", ".join(report["invalid"]))
+        if report["unindexed"]:
+            flags.append("UNINDEXED_CITATIONS: %s" % ", ".join(report["unindexed"]))
+
+    # Determine grade
+    if score >= 70:
+        grade = "PASS"
+    elif score >= 40:
+        grade = "WEAK"
+    else:
+        grade = "FAIL"
+
+    return {
+        "grade": grade,
+        "score": score,
+        "flags": flags,
+        "doc_refs_found": doc_refs,
+        "hedge_phrases_found": hedges_found,
+        "citations": [{k: c[k] for k in ("doc_id", "section", "status") if k in c}
+                      for c in resolved],
+    }
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- QA latency, throughput and error-rate metrics.
+
+Shared by qa_stress_test.py (Phases B and F) and any other runner that
+produces per-question result dicts with "status", "elapsed_seconds",
+"persona" and "backend" keys.
+
+Percentiles use linear interpolation between closest ranks, so small
+samples (40 questions) still give stable p90/p99 values. Results served
+from the answer cache ("cached": True) carry the latency of the run that
+produced them, so they are counted separately and left out of the latency
+and throughput figures. Results resumed from a checkpoint ("resumed":
+True, qa_checkpoint.py) keep their measured latency but are left out of
+throughput, since their timestamps belong to the interrupted run.
+
+Python 3.8+ compatible, standard library only.
+"""
+
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_BACKEND = "openai-assistants"
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+# ═══════════════════════════════════════════════════════════════
+# STATISTICS
+# ═══════════════════════════════════════════════════════════════
+
+def percentile(values, q):
+    # type: (Iterable[float], float) -> float
+    """Return the q-quantile (0 <= q <= 1) of values by linear interpolation."""
+    data = sorted(values)
+    if not data:
+        return 0.0
+    if len(data) == 1:
+        return float(data[0])
+    pos = (len(data) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(data) - 1)
+    frac = pos - lo
+    return float(data[lo] + (data[hi] - data[lo]) * frac)
+
+
+def latency_summary(values):
+    # type: (List[float]) -> Dict[str, float]
+    """p50/p90/p99, mean and max of a list of latencies (seconds)."""
+    if not values:
+        return {"count": 0, "p50": 0.0, "p90": 0.0, "p99": 0.0,
+                "mean": 0.0, "max": 0.0, "sum": 0.0}
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 0.5), 3),
+        "p90": round(percentile(values, 0.9), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "mean": round(sum(values) / len(values), 3),
+        "max": round(max(values), 3),
+        "sum": round(sum(values), 3),
+    }
+
+
+def _throughput_qpm(results):
+    # type: (List[Dict]) -> float
+    """Questions per minute over the wall-clock span of a run.
+
+    Uses started_at/finished_at epoch stamps when every result has them
+    (so concurrent runs are measured correctly); otherwise falls back to
+    the summed per-question latency of a sequential run.
+    """
+    if not results:
+        return 0.0
+    stamped = [r for r in results
+               if r.get("started_at") is not None and r.get("finished_at") is not None]
+    if len(stamped) == len(results):
+        span = max(r["finished_at"] for r in stamped) - min(r["started_at"] for r in stamped)
+    else:
+        span = sum(r.get("elapsed_seconds", 0) or 0 for r in results)
+    if span <= 0:
+        return 0.0
+    return round(len(results) * 60.0 / span, 2)
+
+
+def summarize(results):
+    # type: (List[Dict]) -> Dict[str, Any]
+    """Latency distribution, throughput and error rate for one group.
+
+    Cache hits count towards total/completed and are reported under
+    "cached"; latency and throughput cover only questions actually asked.
+    """
+    total = len(results)
+    completed = [r for r in results if r.get("status") == "completed" and not r.get("error")]
+    errors = total - len(completed)
+    live = [r for r in results if not r.get("cached")]
+    return {
+        "total": total,
+        "completed": len(completed),
+        "cached": total - len(live),
+        "errors": errors,
+        "error_rate_pct": round(errors * 100.0 / total, 1) if total else 0.0,
+        "throughput_qpm": _throughput_qpm([r for r in live if not r.get("resumed")]),
+        "latency_seconds": latency_summary(
+            [float(r.get("elapsed_seconds", 0) or 0) for r in completed if not r.get("cached")]),
+    }
+
+
+def _group_by(results, key, default):
+    # type: (List[Dict], str, str) -> Dict[str, List[Dict]]
+    groups = {}  # type: Dict[str, List[Dict]]
+    for r in results:
+        groups.setdefault(r.get(key) or default, []).append(r)
+    return groups
+
+
+def build_metrics_report(results):
+    # type: (List[Dict]) -> Dict[str, Any]
+    """Overall, per-persona, per-backend and per-(persona, backend) summaries
+    for a result set; "by_persona_backend" is keyed persona -> backend."""
+    by_persona = _group_by(results, "persona", "unknown")
+    return {
+        "overall": summarize(results),
+        "by_persona": dict((k, summarize(v)) for k, v in by_persona.items()),
+        "by_backend": dict(
+            (k, summarize(v)) for k, v in _group_by(results, "backend", DEFAULT_BACKEND).items()),
+        "by_persona_backend": dict(
+            (k, dict((b, summarize(rows))
+                     for b, rows in _group_by(v, "backend", DEFAULT_BACKEND).items()))
+            for k, v in by_persona.items()),
+    }
+
+
+def print_metrics_report(report, title="LATENCY / THROUGHPUT"):
+    # type: (Dict[str, Any], str) -> None
+    print("\n%s" % title)
+    print("  %-22s %5s %6s %7s %7s %7s %8s %7s" % (
+        "group", "n", "cached", "p50(s)", "p90(s)", "p99(s)", "q/min", "err%"))
+    rows = [("ALL", report["overall"])]
+    rows += [("persona:" + k, v) for k, v in sorted(report["by_persona"].items())]
+    rows += [("backend:" + k, v) for k, v in sorted(report["by_backend"].items())]
+    for name, s in rows:
+        lat = s["latency_seconds"]
+        print("  %-22s %5d %6d %7.1f %7.1f %7.1f %8.2f %7.1f" % (
+            name[:22], s["total"], s.get("cached", 0), lat["p50"], lat["p90"], lat["p99"],
+            s["throughput_qpm"], s["error_rate_pct"]))
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROMETHEUS / OPENMETRICS EXPORT
+# ═══════════════════════════════════════════════════════════════
+
+def _escape_label(value):
+    # type: (str) -> str
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels):
+    # type: (Dict[str, str]) -> str
+    if not labels:
+        return ""
+    return "{" + ",".join(
+        '%s="%s"' % (k, _escape_label(v)) for k, v in sorted(labels.items())) + "}"
+
+
+def render_prometheus(report, prefix="mw_qa", extra_labels=None, openmetrics=False):
+    # type: (Dict[str, Any], str, Optional[Dict[str, str]], bool) -> str
+    """Render a metrics report in Prometheus text format (or OpenMetrics).
+
+    Every series is labelled with both persona and backend, one per
+    (persona, backend) pair, so each question is counted in exactly one
+    series and sum() over either label gives the overall count. Latency is
+    exported as a summary with 0.5/0.9/0.99 quantiles.
+    """
+    extra = dict(extra_labels or {})
+    series = [({"persona": p, "backend": b}, s)
+              for p, backends in sorted(report["by_persona_backend"].items())
+              for b, s in sorted(backends.items())]
+
+    lines = []  # type: List[str]
+    latency = "%s_latency_seconds" % prefix
+    lines.append("# HELP %s Assistant response latency per question." % latency)
+    lines.append("# TYPE %s summary" % latency)
+    if openmetrics:
+        lines.append("# UNIT %s seconds" % latency)
+    for labels, s in series:
+        lat = s["latency_seconds"]
+        for q, key in zip(QUANTILES, ("p50", "p90", "p99")):
+            ql = dict(extra, **labels)
+            ql["quantile"] = str(q)
+            lines.append("%s%s %s" % (latency, _labels(ql), lat[key]))
+        base = dict(extra, **labels)
+        lines.append("%s_sum%s %s" % (latency, _labels(base), lat["sum"]))
+        lines.append("%s_count%s %d" % (latency, _labels(base), lat["count"]))
+
+    gauges = [
+        ("questions", "total", "Questions attempted, including cache hits."),
+        ("errors", "errors", "Questions that failed or did not complete."),
+        ("error_ratio", "error_rate_pct", "Fraction of the series' questions that errored."),
+        ("throughput_questions_per_minute", "throughput_qpm",
+         "Questions sent to the assistant per minute of wall-clock time, completed or not; "
+         "cache hits and checkpoint-resumed results are excluded."),
+    ]
+    for name, key, help_text in gauges:
+        metric = "%s_%s" % (prefix, name)
+        lines.append("# HELP %s %s" % (metric, help_text))
+        lines.append("# TYPE %s gauge" % metric)
+        for labels, s in series:
+            value = s[key] / 100.0 if key == "error_rate_pct" else s[key]
+            lines.append("%s%s %s" % (metric, _labels(dict(extra, **labels)), value))
+
+    if openmetrics:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(report, path, prefix="mw_qa", extra_labels=None):
+    # type: (Dict[str, Any], str, str, Optional[Dict[str, str]]) -> str
+    """Write the report as Prometheus text, or OpenMetrics for *.om/*.openmetrics."""
+    openmetrics = path.endswith(".om") or path.endswith(".openmetrics")
+    text = render_prometheus(report, prefix=prefix, extra_labels=extra_labels,
+                             openmetrics=openmetrics)
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- question bank and QA reference data loader.
+
+Question banks are JSONL (one question per line) or YAML (a list of
+questions, or a mapping with a "questions" key) files under qa_data/.
+Each question needs:
+
+    {"id": "CFO-1", "persona": "cfo", "text": "...", "targets": ["DOC-005"]}
+
+JSONL banks are streamed line by line, so banks with thousands of
+questions never need to be parsed in one go. A directory path loads every
+*.jsonl / *.yaml / *.yml file in it, in sorted order.
+
+Sharding (--shard i/N, 1-based) assigns each question to a shard by a
+stable hash of its id, so shards stay balanced and a question keeps its
+shard when the bank grows.
+
+Python 3.8+ compatible. YAML banks need PyYAML (pip install pyyaml).
+"""
+
+import glob
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import yaml
+    HAS_YAML = True
+except ImportError:
+    HAS_YAML = False
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(SCRIPT_DIR, "qa_data")
+DEFAULT_BANK = os.path.join(DATA_DIR, "questions.jsonl")
+HEDGE_PHRASES_FILE = os.path.join(DATA_DIR, "hedge_phrases.txt")
+IMPROVED_INSTRUCTIONS_FILE = os.path.join(DATA_DIR, "improved_instructions.md")
+FAQ_SUPPLEMENT_FILE = os.path.join(DATA_DIR, "faq_supplement.txt")
+
+REQUIRED_FIELDS = ("id", "persona", "text", "targets")
+BANK_EXTENSIONS = (".jsonl", ".yaml", ".yml")
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARDING / FILTERING
+# ═══════════════════════════════════════════════════════════════
+
+def parse_shard(spec):
+    # type: (Optional[str]) -> Optional[Tuple[int, int]]
+    """Parse "i/N" (1 <= i <= N) into (i, N). None/empty means no sharding."""
+    if not spec:
+        return None
+    try:
+        index, count = [int(part) for part in spec.split("/")]
+    except ValueError:
+        raise ValueError("Shard must look like i/N (e.g. 2/8), got %r" % spec)
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError("Shard index must be between 1 and N, got %r" % spec)
+    return index, count
+
+
+def shard_of(question_id, count):
+    # type: (str, int) -> int
+    """1-based shard number for a question id."""
+    digest = hashlib.sha256(question_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def _matches(question, shard, personas, targets):
+    # type: (Dict, Optional[Tuple[int, int]], Optional[set], Optional[set]) -> bool
+    if personas and question["persona"] not in personas:
+        return False
+    if targets and not targets.intersection(question["targets"]):
+        return False
+    if shard and shard_of(question["id"], shard[1]) != shard[0]:
+        return False
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════
+# LOADING
+# ═══════════════════════════════════════════════════════════════
+
+def _validate(question, where):
+    # type: (Dict, str) -> Dict
+    missing = [k for k in REQUIRED_FIELDS if k not in question]
+    if missing:
+        raise ValueError("%s: question missing %s" % (where, ", ".join(missing)))
+    if not isinstance(question["targets"], list):
+        raise ValueError("%s: targets must be a list" % where)
+    return question
+
+
+def _iter_file(path):
+    # type: (str) -> Iterator[Dict]
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                yield _validate(json.loads(line), "%s:%d" % (path, lineno))
+    elif path.endswith((".yaml", ".yml")):
+        if not HAS_YAML:
+            raise ImportError("YAML question banks need PyYAML: pip install pyyaml")
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or []
+        if isinstance(data, dict):
+            data = data.get("questions", [])
+        for n, question in enumerate(data, 1):
+            yield _validate(question, "%s[%d]" % (path, n))
+    else:
+        raise ValueError("Unsupported question bank format: %s" % path)
+
+
+def bank_files(path):
+    # type: (str) -> List[str]
+    """Expand a bank path (file or directory) into the files to read."""
+    if os.path.isdir(path):
+        files = []
+        for ext in BANK_EXTENSIONS:
+            files.extend(glob.glob(os.path.join(path, "*" + ext)))
+        return sorted(files)
+    return [path]
+
+
+def iter_questions(path=DEFAULT_BANK, shard=None, personas=None, targets=None):
+    # type: (str, Optional[Tuple[int, int]], Optional[Iterable[str]], Optional[Iterable[str]]) -> Iterator[Dict]
+    """Stream questions from a bank, keeping only this shard and filters.
+
+    personas: keep questions whose persona is in the set.
+    targets: keep questions targeting at least one of these DOC ids.
+    Duplicate ids across files are an error.
+    """
+    persona_set = set(personas) if personas else None
+    target_set = set(targets) if targets else None
+    seen = set()
+    for bank in bank_files(path):
+        for question in _iter_file(bank):
+            if question["id"] in seen:
+                raise ValueError("%s: duplicate question id %s" % (bank, question["id"]))
+            seen.add(question["id"])
+            if _matches(question, shard, persona_set, target_set):
+                yield question
+
+
+def load_questions(path=DEFAULT_BANK, shard=None, personas=None, targets=None):
+    # type: (str, Optional[Tuple[int, int]], Optional[Iterable[str]], Optional[Iterable[str]]) -> List[Dict]
+    return list(iter_questions(path, shard=shard, personas=personas, targets=targets))
+
+
+def load_hedge_phrases(path=HEDGE_PHRASES_FILE):
+    # type: (str) -> List[str]
+    """One phrase per line; blank lines and # comments are ignored."""
+    phrases = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                phrases.append(line.lower())
+    return phrases
+
+
+def load_text(path):
+    # type: (str) -> str
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- content-addressed on-disk response cache.
+
+Answers are stored under a SHA-256 key of (backend, model, assistant
+fingerprint, question text). The fingerprint hashes the instructions and
+the vector store state, so any instruction patch (qa_stress_test.py
+Phase D) or knowledge-base change produces new keys and stale answers are
+never served; they simply age out.
+
+Eviction:
+  - TTL: entries older than ttl_seconds are treated as misses and deleted.
+  - LRU: file mtime is bumped on every hit; when the cache holds more than
+    max_entries, the least recently used entries are removed. The sweep
+    runs on open and every EVICT_EVERY_PUTS writes, not on every put.
+
+Python 3.8+ compatible, standard library only.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(SCRIPT_DIR, ".qa_cache", "responses")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+EVICT_EVERY_PUTS = 50
+
+
+def _sha256(text):
+    # type: (str) -> str
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def assistant_fingerprint(instructions, vector_stores=()):
+    # type: (Optional[str], Iterable[Dict[str, Any]]) -> str
+    """Hash the instructions plus the identity and size of each vector store.
+
+    vector_stores is a list of dicts such as
+    {"id": "vs_...", "file_count": 44, "usage_bytes": 1234567}; including the
+    counts means uploading a file (Phase D) changes the fingerprint even
+    though the vector store id stays the same.
+    """
+    payload = {
+        "instructions": instructions or "",
+        "vector_stores": sorted(
+            (dict(vs) for vs in vector_stores), key=lambda vs: str(vs.get("id", ""))),
+    }
+    return _sha256(json.dumps(payload, sort_keys=True))
+
+
+def openai_assistant_fingerprint(client, assistant):
+    # type: (Any, Any) -> str
+    """assistant_fingerprint() for a retrieved OpenAI assistant object.
+
+    Looks up each attached vector store so file uploads are reflected; a
+    failed lookup falls back to the store id alone.
+    """
+    stores = []
+    if assistant.tool_resources and assistant.tool_resources.file_search:
+        for vs_id in assistant.tool_resources.file_search.vector_store_ids or []:
+            entry = {"id": vs_id}  # type: Dict[str, Any]
+            try:
+                vs = client.beta.vector_stores.retrieve(vs_id)
+                entry["file_count"] = vs.file_counts.completed if vs.file_counts else 0
+                entry["usage_bytes"] = getattr(vs, "usage_bytes", 0)
+            except Exception:
+                pass
+            stores.append(entry)
+    return assistant_fingerprint(assistant.instructions, stores)
+
+
+def normalize_question(text):
+    # type: (str) -> str
+    """Collapse whitespace so trivially re-wrapped questions share a key."""
+    return " ".join((text or "").split())
+
+
+def make_key(backend, model, fingerprint, question):
+    # type: (str, str, str, str) -> str
+    return _sha256(json.dumps(
+        [backend, model or "", fingerprint, normalize_question(question)]))
+
+
+class ResponseCache(object):
+    """Content-addressed JSON cache with TTL and LRU eviction."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        # type: (str, float, int) -> None
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.evict()
+
+    def _path(self, key):
+        # type: (str) -> str
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def get(self, key):
+        # type: (str) -> Optional[Dict[str, Any]]
+        """Return the cached value for key, or None on miss/expiry."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError):
+            self.misses += 1
+            return None
+        if self.ttl_seconds and time.time() - entry.get("stored_at", 0) > self.ttl_seconds:
+            self._remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path, None)  # LRU: mark as recently used
+        except OSError:
+            pass
+        self.hits += 1
+        return entry.get("value")
+
+    def put(self, key, value, meta=None):
+        # type: (str, Dict[str, Any], Optional[Dict[str, Any]]) -> None
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {"key": key, "stored_at": time.time(), "meta": meta or {}, "value": value}
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        self._puts += 1
+        if self._puts % EVICT_EVERY_PUTS == 0:
+            self.evict()
+
+    def _entries(self):
+        # type: () -> List[str]
+        paths = []
+        for root, dirs, files in os.walk(self.cache_dir):
+            for fname in files:
+                if fname.endswith(".json"):
+                    paths.append(os.path.join(root, fname))
+        return paths
+
+    @staticmethod
+    def _remove(path):
+        # type: (str) -> None
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        # type: () -> int
+        """Drop expired entries, then least recently used beyond max_entries."""
+        removed = 0
+        now = time.time()
+        live = []
+        for path in self._entries():
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            live.append((mtime, path))
+        if self.ttl_seconds:
+            # mtime >= stored_at, so anything untouched for a full TTL is expired
+            expired = [p for m, p in live if now - m > self.ttl_seconds]
+            for path in expired:
+                self._remove(path)
+            removed += len(expired)
+            live = [(m, p) for m, p in live if now - m <= self.ttl_seconds]
+        if self.max_entries and len(live) > self.max_entries:
+            live.sort()
+            for mtime, path in live[:len(live) - self.max_entries]:
+                self._remove(path)
+                removed += 1
+        return removed
+
+    def clear(self):
+        # type: () -> int
+        paths = self._entries()
+        for path in paths:
+            self._remove(path)
+        return len(paths)
+
+    def stats(self):
+        # type: () -> Dict[str, int]
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries())}
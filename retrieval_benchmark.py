@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+MW Infrastructure Stack -- offline retrieval-quality benchmark.
+
+Every question in the QA bank (qa_data/questions.jsonl) lists the target
+documents it should retrieve. This runs each local retrieval engine over
+the bank and reports, per engine:
+
+  recall@k      share of a question's target documents that appear among
+                the documents of its top-k chunks, averaged over questions
+  MRR           mean reciprocal rank of the first chunk from a target doc
+                (0 if none in the top --depth chunks)
+  latency       per-query search time, p50/p90/p99 (qa_metrics.py)
+  build / size  index build time and on-disk size (the chunk store the
+                engines share is reported once)
+
+Engines: bm25 (canon_bm25.py), dense and dense-ivf (canon_dense.py),
+hybrid (canon_hybrid.py: both fused with RRF, optional --reranker, with
+per-stage latencies reported). All but bm25 need numpy. Indexes are built from scratch in a temporary directory, so
+the cached indexes in assistant_portability/retrieval_index/ are untouched.
+The hybrid stage budgets are off by default here (--budget-<stage> 0), so
+its recall and MRR do not depend on wall-clock time; pass budgets to see
+how often the serving defaults would time out.
+
+Each run is appended to a JSON history file and compared with the last
+run of the same engine with the same configuration (bank, personas, -k,
+--depth and engine options); --fail-on-regression exits 1
+when recall@k or MRR dropped by more than --tolerance.
+
+Usage:
+    python retrieval_benchmark.py                          # All available engines
+    python retrieval_benchmark.py --engine bm25 --engine dense-ivf --nlist 64
+    python retrieval_benchmark.py --persona cfo -k 1 -k 5
+    python retrieval_benchmark.py --engine hybrid --reranker terms
+    python retrieval_benchmark.py --fail-on-regression     # CI gate
+
+Python 3.8+ compatible. The dense engines need numpy (pip install numpy).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from canon_bm25 import BM25Index
+from canon_dense import DEFAULT_EMBEDDER, DEFAULT_NPROBE, HAS_NUMPY
+from canon_hybrid import STAGES, add_hybrid_args, hybrid_options
+from canon_store import DEFAULT_STORE_PATH, index_path_for, load_or_build_store
+from canon_text import RETRIEVAL_DIR
+from qa_metrics import percentile
+from question_bank import DEFAULT_BANK, load_questions
+
+DEFAULT_HISTORY = os.path.join(RETRIEVAL_DIR, "benchmark_history.json")
+DEFAULT_KS = (1, 3, 5, 10)
+DEFAULT_DEPTH = 50
+DEFAULT_NLIST = 32
+DEFAULT_TOLERANCE = 0.02
+HISTORY_LIMIT = 200
+CONFIG_KEYS = ("bank", "personas", "ks", "depth", "options")
+
+
+# ═══════════════════════════════════════════════════════════════
+# ENGINES
+# ═══════════════════════════════════════════════════════════════
+# Each engine builds an index from (chunks, signature, store), saves it
+# under the given path prefix and returns (index, files written).
+
+def _build_bm25(chunks, signature, store, prefix, options):
+    # type: (List[Dict], str, Any, str, Dict) -> Tuple[Any, List[str]]
+    index = BM25Index.build(chunks, signature=signature, store=store, deleted=store.deleted)
+    return index, [index.save(prefix + ".json")]
+
+
+def _build_dense(chunks, signature, store, prefix, options, nlist=0):
+    # type: (List[Dict], str, Any, str, Dict, int) -> Tuple[Any, List[str]]
+    from canon_dense import DenseIndex, load_embedder
+    index = DenseIndex.build(chunks, load_embedder(options.get("embedder", DEFAULT_EMBEDDER)),
+                             signature, nlist, store, deleted=store.deleted)
+    index.save(prefix)
+    files = [prefix + ".npy", prefix + ".json"]
+    if nlist:
+        files.append(prefix + "_ivf.npz")
+    return index, files
+
+
+def _build_dense_ivf(chunks, signature, store, prefix, options):
+    # type: (List[Dict], str, Any, str, Dict) -> Tuple[Any, List[str]]
+    return _build_dense(chunks, signature, store, prefix, options,
+                        options.get("nlist", DEFAULT_NLIST))
+
+
+def _build_hybrid(chunks, signature, store, prefix, options):
+    # type: (List[Dict], str, Any, str, Dict) -> Tuple[Any, List[str]]
+    from canon_hybrid import HybridIndex, load_reranker
+    lexical, lexical_files = _build_bm25(chunks, signature, store, prefix + "-bm25", options)
+    dense, dense_files = _build_dense(chunks, signature, store, prefix + "-dense", options)
+    index = HybridIndex(lexical, dense, reranker=load_reranker(options.get("reranker")),
+                        budgets_ms=options.get("budgets_ms"), weights=options.get("weights"))
+    return index, lexical_files + dense_files
+
+
+ENGINES = {
+    "bm25": _build_bm25,
+    "dense": _build_dense,
+    "dense-ivf": _build_dense_ivf,
+    "hybrid": _build_hybrid,
+}  # type: Dict[str, Callable[..., Tuple[Any, List[str]]]]
+NUMPY_ENGINES = ("dense", "dense-ivf", "hybrid")
+
+
+def available_engines():
+    # type: () -> List[str]
+    return [name for name in ENGINES if HAS_NUMPY or name not in NUMPY_ENGINES]
+
+
+# ═══════════════════════════════════════════════════════════════
+# METRICS
+# ═══════════════════════════════════════════════════════════════
+
+def score_ranking(ranked_docs, targets, ks=DEFAULT_KS):
+    # type: (Sequence[str], Sequence[str], Sequence[int]) -> Dict[str, float]
+    """recall@k and reciprocal rank for one question.
+
+    ranked_docs is the doc id of each retrieved chunk, best first (a doc
+    may repeat); targets are the expected doc ids.
+    """
+    wanted = set(targets)
+    out = {}
+    for k in ks:
+        found = wanted.intersection(ranked_docs[:k])
+        out["recall@%d" % k] = float(len(found)) / len(wanted) if wanted else 0.0
+    out["rr"] = 0.0
+    for rank, doc_id in enumerate(ranked_docs, 1):
+        if doc_id in wanted:
+            out["rr"] = 1.0 / rank
+            break
+    return out
+
+
+def evaluate(index, questions, ks=DEFAULT_KS, depth=DEFAULT_DEPTH, search_kwargs=None):
+    # type: (Any, List[Dict], Sequence[int], int, Optional[Dict]) -> Dict[str, Any]
+    """Run every question with targets through index.search and aggregate."""
+    search_kwargs = search_kwargs or {}
+    depth = max(depth, max(ks))
+    rows = []
+    latencies = []
+    for q in questions:
+        if not q.get("targets"):
+            continue
+        start = time.perf_counter()
+        hits = index.search(q["text"], k=depth, **search_kwargs)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        row = score_ranking([chunk["doc_id"] for _, chunk in hits], q["targets"], ks)
+        row["id"] = q.get("id")
+        rows.append(row)
+    n = len(rows)
+    report = {"questions": n}  # type: Dict[str, Any]
+    for k in ks:
+        key = "recall@%d" % k
+        report[key] = round(sum(r[key] for r in rows) / n, 4) if n else 0.0
+    report["mrr"] = round(sum(r["rr"] for r in rows) / n, 4) if n else 0.0
+    report["latency_ms"] = {
+        "p50": round(percentile(latencies, 0.5), 3),
+        "p90": round(percentile(latencies, 0.9), 3),
+        "p99": round(percentile(latencies, 0.99), 3),
+        "mean": round(sum(latencies) / n, 3) if n else 0.0,
+    }
+    report["misses"] = [r["id"] for r in rows if r["rr"] == 0.0]
+    return report
+
+
+# ═══════════════════════════════════════════════════════════════
+# BENCHMARK
+# ═══════════════════════════════════════════════════════════════
+
+def benchmark_engine(name, chunks, signature, store, questions, workdir, ks=DEFAULT_KS,
+                     depth=DEFAULT_DEPTH, options=None):
+    # type: (str, List[Dict], str, Any, List[Dict], str, Sequence[int], int, Optional[Dict]) -> Dict[str, Any]
+    options = options or {}
+    start = time.perf_counter()
+    index, files = ENGINES[name](chunks, signature, store, os.path.join(workdir, name), options)
+    build_seconds = time.perf_counter() - start
+    search_kwargs = {"nprobe": options.get("nprobe", DEFAULT_NPROBE)} if name == "dense-ivf" else {}
+    report = evaluate(index, questions, ks, depth, search_kwargs)
+    report["build_seconds"] = round(build_seconds, 3)
+    report["index_bytes"] = sum(os.path.getsize(f) for f in files if os.path.exists(f))
+    if name == "dense-ivf":
+        report["nlist"] = index.nlist
+        report["nprobe"] = search_kwargs["nprobe"]
+    if hasattr(index, "stage_summary"):
+        report["stages"] = dict((stage, s) for stage, s in index.stage_summary().items()
+                                if s["count"] or s["timeouts"])
+        index.close()
+    return report
+
+
+def run_benchmark(engines, questions, store, ks=DEFAULT_KS, depth=DEFAULT_DEPTH, options=None):
+    # type: (Sequence[str], List[Dict], Any, Sequence[int], int, Optional[Dict]) -> Dict[str, Any]
+    chunks = [store.chunk_with_text(n) for n in range(len(store))]
+    workdir = tempfile.mkdtemp(prefix="mw-retrieval-bench-")
+    try:
+        results = dict((name, benchmark_engine(name, chunks, store.signature, store, questions,
+                                               workdir, ks, depth, options))
+                       for name in engines)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "corpus_signature": store.signature,
+        "chunks": len(chunks) - len(store.deleted),
+        "store_bytes": (os.path.getsize(store.path) +
+                        os.path.getsize(index_path_for(store.path))),
+        "questions": sum(1 for q in questions if q.get("targets")),
+        "ks": list(ks),
+        "depth": depth,
+        "engines": results,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+# HISTORY
+# ═══════════════════════════════════════════════════════════════
+
+def load_history(path=DEFAULT_HISTORY):
+    # type: (str) -> List[Dict]
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def append_history(run, path=DEFAULT_HISTORY, limit=HISTORY_LIMIT):
+    # type: (Dict, str, int) -> List[Dict]
+    history = load_history(path)
+    history.append(run)
+    history = history[-limit:]
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+    return history
+
+
+def run_config(run):
+    # type: (Dict) -> Dict[str, Any]
+    """What makes two runs comparable: bank, persona filter, cut-offs,
+    depth and engine options (embedder, nlist/nprobe, hybrid settings)."""
+    return dict((key, run.get(key)) for key in CONFIG_KEYS)
+
+
+def previous_result(history, run, engine):
+    # type: (List[Dict], Dict, str) -> Optional[Dict]
+    """The engine's result in the latest earlier run with the same
+    run_config()."""
+    config = run_config(run)
+    for past in reversed(history):
+        if past is run or run_config(past) != config:
+            continue
+        if engine in past.get("engines", {}):
+            return past["engines"][engine]
+    return None
+
+
+def find_regressions(previous, current, tolerance=DEFAULT_TOLERANCE):
+    # type: (Dict, Dict, float) -> List[str]
+    regressions = []
+    for key in sorted(current):
+        if not (key.startswith("recall@") or key == "mrr") or key not in previous:
+            continue
+        drop = previous[key] - current[key]
+        if drop > tolerance:
+            regressions.append("%s %.4f -> %.4f" % (key, previous[key], current[key]))
+    return regressions
+
+
+def print_report(run, history, tolerance=DEFAULT_TOLERANCE):
+    # type: (Dict, List[Dict], float) -> List[str]
+    """Print the run as a table; return regression messages."""
+    ks = run["ks"]
+    print("\n" + "=" * 70)
+    print("RETRIEVAL BENCHMARK  (%d questions, %d chunks, store %s bytes)" % (
+        run["questions"], run["chunks"], "{:,}".format(run["store_bytes"])))
+    print("=" * 70)
+    header = "  %-10s" % "engine" + "".join(" %8s" % ("R@%d" % k) for k in ks) + \
+        " %7s %9s %9s %8s %12s" % ("MRR", "p50 ms", "p99 ms", "build s", "index bytes")
+    print(header)
+    regressions = []
+    for name, result in run["engines"].items():
+        print("  %-10s" % name + "".join(" %8.3f" % result["recall@%d" % k] for k in ks) +
+              " %7.3f %9.3f %9.3f %8.2f %12s" % (
+                  result["mrr"], result["latency_ms"]["p50"], result["latency_ms"]["p99"],
+                  result["build_seconds"], "{:,}".format(result["index_bytes"])))
+        previous = previous_result(history, run, name)
+        if previous is not None:
+            for message in find_regressions(previous, result, tolerance):
+                regressions.append("%s: %s" % (name, message))
+    for name, result in run["engines"].items():
+        for stage, s in sorted(result.get("stages", {}).items()):
+            print("  %s %-8s p50 %.3f ms | p99 %.3f ms | budget %s ms | %d timeouts" % (
+                name, stage, s["p50_ms"], s["p99_ms"], s["budget_ms"], s["timeouts"]))
+    for name, result in run["engines"].items():
+        if result["misses"]:
+            print("  %s missed all targets for: %s" % (name, ", ".join(result["misses"])))
+    if regressions:
+        print("\nREGRESSIONS vs previous run:")
+        for message in regressions:
+            print("  " + message)
+    print("=" * 70)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval-quality benchmark")
+    parser.add_argument("--engine", action="append", choices=sorted(ENGINES),
+                        help="Engine to benchmark (repeatable; default: all available)")
+    parser.add_argument("--bank", default=DEFAULT_BANK, help="Question bank file or directory")
+    parser.add_argument("--persona", action="append", help="Only these personas")
+    parser.add_argument("-k", type=int, action="append", dest="ks",
+                        help="recall@k cut-offs (repeatable; default: 1 3 5 10)")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH,
+                        help="Chunks retrieved per question for MRR")
+    parser.add_argument("--embedder", default=DEFAULT_EMBEDDER, help="Dense embedder spec")
+    parser.add_argument("--nlist", type=int, default=DEFAULT_NLIST, help="dense-ivf partitions")
+    parser.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE, help="dense-ivf probes")
+    add_hybrid_args(parser, budgets_ms=dict((stage, 0.0) for stage in STAGES))
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="Chunk store pack path")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON history file")
+    parser.add_argument("--no-history", action="store_true", help="Do not record this run")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed drop in recall@k / MRR before flagging a regression")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit 1 when a metric regressed beyond --tolerance")
+    args = parser.parse_args()
+
+    engines = args.engine or available_engines()
+    missing = [e for e in engines if e not in available_engines()]
+    if missing:
+        print("ERROR: %s need numpy. pip install numpy" % ", ".join(missing))
+        sys.exit(1)
+    questions = load_questions(args.bank, personas=args.persona)
+    ks = tuple(sorted(set(args.ks))) if args.ks else DEFAULT_KS
+    options = {"embedder": args.embedder, "nlist": args.nlist, "nprobe": args.nprobe}
+    options.update(hybrid_options(args))
+
+    store = load_or_build_store(args.store)
+    try:
+        run = run_benchmark(engines, questions, store, ks, args.depth, options)
+    finally:
+        store.close()
+    run["bank"] = os.path.relpath(os.path.abspath(args.bank))
+    run["personas"] = args.persona
+    run["options"] = options
+
+    history = load_history(args.history)
+    regressions = print_report(run, history, args.tolerance)
+    if not args.no_history:
+        append_history(run, args.history)
+        print("History: %s" % args.history)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -83,7 +83,7 @@ def find_document_file(doc_id):
     
     for root, dirs, files in os.walk(docs_dir):
         for f in files:
-            if f.startswith(doc_id):
+            if f.startswith(doc_id) and f.endswith(".txt"):
                 return os.path.join(root, f)
     return None
 
@@ -0,0 +1,110 @@
+"""Semantic answer cache: exact/semantic tiers, LRU bound, canon invalidation."""
+import asyncio
+import json
+import os
+
+from answer_cache import CanonVersion, SemanticAnswerCache, normalize_text
+from assistant_backends import OfflineBackend
+from assistant_server import AssistantServer, http_request, run_load_test
+from canon_bm25 import BM25Index
+from canon_text import chunk_document
+from qa_metrics import summarize
+
+Q = "What is the exact pricing model for MW certifications?"
+
+
+class Version:
+    def __init__(self):
+        self.value = "v1"
+
+    def __call__(self):
+        return self.value
+
+
+class TestCache:
+    def test_exact_tier_ignores_case_and_punctuation(self):
+        cache = SemanticAnswerCache(Version())
+        cache.put(Q, ["DOC-005:1"], 6, 1500, "fixed price")
+        assert normalize_text("  what IS the exact pricing-model for MW certifications??") == \
+            normalize_text(Q)
+        assert cache.lookup_exact("what is the EXACT pricing model for MW certifications", 6, 1500)
+        assert cache.lookup_exact(Q, 8, 1500) is None  # different retrieval settings
+
+    def test_semantic_tier_needs_similar_signature_and_terms(self):
+        cache = SemanticAnswerCache(Version())
+        cache.put(Q, ["DOC-005:1", "DOC-005:2", "DOC-005:3", "DOC-005:4", "DOC-005:5"], 6, 1500,
+                  "fixed price")
+        paraphrase = "What's the exact pricing model of MW certification?"
+        hit = cache.lookup_semantic(paraphrase, ["DOC-005:1", "DOC-005:2", "DOC-005:3",
+                                                 "DOC-005:4", "DOC-005:5"], 6, 1500)
+        assert hit["answer"] == "fixed price"
+        # Same documents, unrelated wording
+        assert cache.lookup_semantic("Who appoints arbitrators?", ["DOC-005:1", "DOC-005:2",
+                                     "DOC-005:3", "DOC-005:4", "DOC-005:5"], 6, 1500) is None
+        # Similar wording, different retrieval
+        assert cache.lookup_semantic(paraphrase, ["DOC-017:1", "DOC-017:2"], 6, 1500) is None
+        assert cache.stats == dict(cache.stats, semantic_hits=1, misses=2)
+
+    def test_lru_bound(self):
+        cache = SemanticAnswerCache(Version(), max_entries=2)
+        for n in range(3):
+            cache.put("question %d" % n, ["c%d" % n], 6, 1500, "a%d" % n)
+        assert len(cache) == 2 and cache.stats["evictions"] == 1
+        assert cache.lookup_exact("question 0", 6, 1500) is None
+        assert cache.lookup_semantic("question 0", ["c0"], 6, 1500) is None
+
+    def test_canon_change_invalidates(self, tmp_path):
+        index = tmp_path / "master-index.json"
+        index.write_text('{"documents": {}}')
+        version = CanonVersion(str(index))
+        cache = SemanticAnswerCache(version)
+        cache.put(Q, ["c"], 6, 1500, "old")
+        assert cache.lookup_exact(Q, 6, 1500)
+        index.write_text('{"documents": {"DOC-001": {}}}')
+        os.utime(str(index), ns=(1, 1))
+        assert cache.lookup_exact(Q, 6, 1500) is None
+        assert cache.stats["invalidations"] == 1
+
+
+def test_server_answers_repeats_from_cache():
+    doc = "I. FEES\nFees are identical for every institution.\n".encode("utf-8")
+
+    async def main():
+        index = BM25Index.build(chunk_document("DOC-005", "documents/x.txt", doc))
+        server = AssistantServer(index, OfflineBackend(), "INSTR",
+                                 cache=SemanticAnswerCache(Version()))
+        host, port = await server.start("127.0.0.1", 0)
+        try:
+            out = []
+            for question in ("What are the fees?", "what are the FEES", "What are fees?"):
+                status, body = await http_request(host, port, "POST", "/ask", {"question": question})
+                out.append(json.loads(body.decode("utf-8")))
+            return out
+        finally:
+            await server.close()
+
+    first, exact, semantic = asyncio.run(main())
+    assert [r["cache"] for r in (first, exact, semantic)] == ["miss", "exact", "semantic"]
+    assert first["answer"] == exact["answer"] == semantic["answer"]
+    assert exact["backend"] == "answer-cache"
+
+
+def test_load_test_marks_cache_hits():
+    doc = "I. FEES\nFees are identical for every institution.\n".encode("utf-8")
+    bank = [{"id": "Q1", "text": "What are the fees?", "persona": "cfo"}] * 3
+
+    async def main(stream):
+        index = BM25Index.build(chunk_document("DOC-005", "documents/x.txt", doc))
+        server = AssistantServer(index, OfflineBackend(), "INSTR",
+                                 cache=SemanticAnswerCache(Version()))
+        host, port = await server.start("127.0.0.1", 0)
+        try:
+            return await run_load_test(host, port, bank, 1, stream)
+        finally:
+            await server.close()
+
+    for stream in (False, True):
+        results = asyncio.run(main(stream))
+        assert [r["cached"] for r in results] == [False, True, True]
+        summary = summarize(results)
+        assert summary["cached"] == 2 and summary["latency_seconds"]["count"] == 1
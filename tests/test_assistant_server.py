@@ -0,0 +1,107 @@
+"""Local HTTP serving mode against the offline backend."""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+from assistant_backends import OfflineBackend
+from assistant_server import AssistantServer, http_request, main, parse_events
+from canon_bm25 import BM25Index
+from canon_text import chunk_document
+
+DOC = ("DOCUMENT 5: PRICING\n\nI. FEES\nFees are identical for every institution.\n\n"
+       "II. DISCOUNTS\nNo discounts are offered under any circumstances.\n").encode("utf-8")
+
+
+def _run(scenario, **kwargs):
+    async def main():
+        index = BM25Index.build(chunk_document("DOC-005", "documents/x.txt", DOC))
+        server = AssistantServer(index, OfflineBackend(**kwargs.pop("backend", {})), "INSTR",
+                                 **kwargs)
+        host, port = await server.start("127.0.0.1", 0)
+        try:
+            return await scenario(server, host, port)
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_ask_health_and_metrics():
+    async def scenario(server, host, port):
+        status, body = await http_request(host, port, "POST", "/ask",
+                                          {"question": "are discounts offered?", "persona": "cfo"})
+        assert status == 200
+        answer = json.loads(body.decode("utf-8"))
+        assert answer["chunks"][0]["section"] == "II. DISCOUNTS"
+        assert "DOC-005" in answer["answer"]
+
+        status, body = await http_request(host, port, "GET", "/health")
+        assert status == 200 and json.loads(body.decode("utf-8"))["chunks"] == len(server.index.chunks)
+
+        status, body = await http_request(host, port, "GET", "/metrics")
+        text = body.decode("utf-8")
+        assert 'mw_assistant_latency_seconds_count{backend="offline",persona="cfo"} 1' in text
+        assert "mw_assistant_retrieval_batches_total 1" in text
+    _run(scenario)
+
+
+def test_streaming_response():
+    async def scenario(server, host, port):
+        status, body = await http_request(host, port, "POST", "/ask",
+                                          {"question": "fees", "stream": True})
+        events = parse_events(body)
+        assert status == 200 and events[-1]["done"] is True
+        deltas = [e["delta"] for e in events[:-1]]
+        assert len(deltas) > 1 and "DOC-005" in "".join(deltas)
+    _run(scenario, backend={"delta_chars": 8})
+
+
+def test_per_client_limit_and_batching():
+    async def scenario(server, host, port):
+        ask = lambda client: http_request(host, port, "POST", "/ask", {"question": "fees"},
+                                          {"X-Client-Id": client})
+        statuses = [s for s, _ in await asyncio.gather(ask("a"), ask("a"), ask("a"), ask("b"))]
+        assert sorted(statuses) == [200, 200, 200, 429]
+        assert server.rejected == 1
+        assert server.batcher.batches < server.batcher.lookups == 3
+    _run(scenario, per_client=2, batch_wait_ms=50, backend={"latency": 0.2})
+
+
+def test_bad_requests():
+    async def scenario(server, host, port):
+        assert (await http_request(host, port, "POST", "/ask", {"nope": 1}))[0] == 400
+        assert (await http_request(host, port, "POST", "/ask", {"question": "x", "k": "all"}))[0] == 400
+        assert (await http_request(host, port, "GET", "/ask"))[0] == 405
+        assert (await http_request(host, port, "GET", "/missing"))[0] == 404
+    _run(scenario)
+
+
+def test_invalid_content_length_and_error_after_stream_start():
+    async def scenario(server, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b"POST /ask HTTP/1.1\r\nContent-Length: lots\r\n\r\n")
+        raw = await reader.read()
+        writer.close()
+        assert raw.startswith(b"HTTP/1.1 400 ")
+
+        def broken(answer):
+            raise RuntimeError("citation index unavailable")
+        server.resolve_citations = broken
+        status, body = await http_request(host, port, "POST", "/ask",
+                                          {"question": "fees", "stream": True})
+        events = parse_events(body)
+        assert status == 200 and b"HTTP/1.1" not in body
+        assert events[-1] == {"done": True, "error": "citation index unavailable"}
+    _run(scenario)
+
+
+def test_load_test_refuses_backend_from_platform_config(monkeypatch, capsys):
+    config = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "assistant_portability", "migration_configs", "azure_config.json")
+    monkeypatch.setattr(sys, "argv", ["assistant_server.py", "--load-test", "5",
+                                      "--platform-config", config])
+    with pytest.raises(SystemExit):
+        main()
+    assert "--load-test uses the offline backend (got azure)" in capsys.readouterr().out
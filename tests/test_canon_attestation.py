@@ -0,0 +1,141 @@
+"""Batched Merkle attestation and offline OpenTimestamps proof verification.
+
+tests/fixtures/batch-attestation.ots is a synthetic proof of the root of
+the artifact tree built by _tree() (one pending calendar attestation and
+one Bitcoin attestation); tests/fixtures/bitcoin-headers.json caches the
+matching block header.
+"""
+import hashlib
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from canon_attestation import (BATCH_FILE, OTSError, build_batch, build_levels, leaf_hash,
+                               load_headers, merkle_path, parse_ots, root_from_path,
+                               serialize_ots, sidecar_path, verify_artifact, verify_ots,
+                               write_batch)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(REPO_ROOT, "tests", "fixtures")
+FIXTURE_ROOT = "ed5d6a01e2522b7d234f4471036d78415519bddc86c97325c056a14d4b48d179"
+FILES = {
+    "documents/01/DOC-001_ALPHA.txt": b"alpha\n",
+    "documents/02/DOC-002_BETA.txt": b"beta\n",
+    "pdf-reference/MW-CANON-DOC-01.pdf": b"%PDF-1.4 fixture\n",
+    "verification/master-index.json": b"{}\n",
+    "MANIFEST.json": b"{\"documents\": []}\n",
+}
+
+
+def _tree(tmp_path):
+    for path, data in FILES.items():
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_bytes(data)
+    return str(tmp_path)
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def test_every_leaf_path_leads_to_the_root():
+    for n in (1, 2, 3, 5, 8, 13):
+        leaves = [hashlib.sha256(b"%d" % i).digest() for i in range(n)]
+        levels = build_levels(leaves)
+        for i, leaf in enumerate(leaves):
+            assert root_from_path(leaf, merkle_path(levels, i)) == levels[-1][0]
+
+
+def test_build_writes_root_and_sidecars(tmp_path):
+    root = _tree(tmp_path)
+    batch, sidecars = build_batch(root)
+    assert batch["root"] == FIXTURE_ROOT and batch["artifact_count"] == len(FILES)
+    assert write_batch(batch, sidecars, root) == len(FILES) + 1
+    assert write_batch(batch, sidecars, root) == 0
+    for path in FILES:
+        assert os.path.exists(sidecar_path(path, root))
+        assert "root" not in json.loads(open(sidecar_path(path, root)).read())
+        assert verify_artifact(path, root) == (True, "ok")
+    assert (tmp_path / BATCH_FILE).exists()
+    assert not [f for f in os.listdir(str(tmp_path / "documents" / "01")) if f != "DOC-001_ALPHA.txt"]
+    del sidecars["MANIFEST.json"]
+    write_batch(batch, sidecars, root)
+    assert not os.path.exists(sidecar_path("MANIFEST.json", root))
+
+
+def test_tampered_or_stale_artifacts_fail(tmp_path):
+    root = _tree(tmp_path)
+    write_batch(*build_batch(root), root=root)
+    (tmp_path / "documents/02/DOC-002_BETA.txt").write_bytes(b"beta, edited\n")
+    assert verify_artifact("documents/02/DOC-002_BETA.txt", root) == (False, "SHA3-512 mismatch")
+    assert verify_artifact("documents/01/DOC-001_ALPHA.txt", root, "00" * 32)[1].startswith("stale")
+    os.remove(str(tmp_path / "MANIFEST.json"))
+    assert verify_artifact("MANIFEST.json", root) == (False, "missing")
+    assert leaf_hash("a", "00" * 64) != leaf_hash("b", "00" * 64)
+
+
+def test_stored_proof_fixture_verifies_offline(tmp_path):
+    root = bytes.fromhex(build_batch(_tree(tmp_path))[0]["root"])
+    data = _fixture("batch-attestation.ots")
+    headers = load_headers(os.path.join(FIXTURES, "bitcoin-headers.json"))
+    verdict = verify_ots(data, root, headers)
+    assert verdict["status"] == "verified" and verdict["time"] == 1771560000
+    assert [a["attestation"] for a in verdict["attestations"]] == ["pending", "bitcoin"]
+    assert verify_ots(data, root)["status"] == "unverified"
+    assert verify_ots(data, hashlib.sha256(b"other").digest())["status"] == "failed"
+    forged = dict((h, dict(v, merkleroot="00" * 32)) for h, v in headers.items())
+    assert verify_ots(data, root, forged)["status"] == "failed"
+    proof = parse_ots(data)
+    assert serialize_ots(proof["digest"], proof["timestamp"]) == data
+
+
+def test_master_index_proof_parses_and_is_pending():
+    with open(os.path.join(REPO_ROOT, "verification", "master-index.json.ots"), "rb") as f:
+        data = f.read()
+    proof = parse_ots(data)
+    verdict = verify_ots(data, proof["digest"])
+    assert verdict["status"] == "pending" and len(verdict["attestations"]) == 3
+    with pytest.raises(OTSError):
+        parse_ots(data[:-5])
+    with pytest.raises(OTSError):
+        parse_ots(b"not a proof")
+
+
+def _run_verify_canon(tmp_path, headers, *args):
+    index = b'{"documents": {}}\n'
+    (tmp_path / "verification").mkdir()
+    (tmp_path / "verification" / "master-index.json").write_bytes(index)
+    (tmp_path / "verification" / "hashes.json").write_text("{}")
+    digest = hashlib.sha256(index).digest()
+    entries = [{"op": "sha256", "timestamp": [{"attestation": "bitcoin", "height": 7}]}]
+    (tmp_path / "verification" / "master-index.json.ots").write_bytes(
+        serialize_ots(digest, entries))
+    commitment = hashlib.sha256(digest).digest()
+    cached = {"7": {"hash": "ab" * 32, "merkleroot": commitment[::-1].hex(), "time": 1}}
+    if headers is not None:
+        (tmp_path / "verification" / "bitcoin-headers.json").write_text(
+            json.dumps(dict((h, dict(v, **headers)) for h, v in cached.items())))
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    return subprocess.run([sys.executable, os.path.join(REPO_ROOT, "verification", "verify-canon.py")]
+                          + list(args), cwd=str(tmp_path), env=env, stdout=subprocess.PIPE,
+                          universal_newlines=True)
+
+
+def test_verify_canon_checks_the_timestamp(tmp_path):
+    run = _run_verify_canon(tmp_path, {})
+    assert run.returncode == 0 and "OTS Timestamp:       VERIFIED" in run.stdout
+    assert "VERDICT: AUTHENTIC" in run.stdout
+
+
+def test_verify_canon_uncached_header_needs_require_flag(tmp_path):
+    run = _run_verify_canon(tmp_path, None, "--require-timestamp")
+    assert run.returncode == 1 and "OTS Timestamp:       UNVERIFIED" in run.stdout
+
+
+def test_verify_canon_rejects_contradicting_header(tmp_path):
+    run = _run_verify_canon(tmp_path, {"merkleroot": "00" * 32})
+    assert run.returncode == 1 and "INTEGRITY COMPROMISED" in run.stdout
@@ -0,0 +1,79 @@
+"""Content-addressed canon backups: dedup, hash check, verify, restore, prune."""
+import hashlib
+
+import pytest
+
+from canon_backup import (BackupError, BackupStore, create_snapshot, prune, restore_snapshot,
+                          verify_snapshot)
+
+
+def _tree(tmp_path):
+    root = tmp_path / "repo"
+    (root / "documents" / "01").mkdir(parents=True)
+    (root / "verification").mkdir()
+    (root / "documents" / "01" / "DOC-001_A.txt").write_bytes(b"alpha\n" * 1000)
+    (root / "documents" / "01" / "DOC-002_B.txt").write_bytes(b"beta\n")
+    (root / "verification" / "copy-of-a.txt").write_bytes(b"alpha\n" * 1000)
+    (root / "LICENSE").write_bytes(b"license\n")
+    return root
+
+
+def _sha3(data):
+    return hashlib.sha3_512(data).hexdigest()
+
+
+def test_snapshots_share_chunks(tmp_path):
+    root = _tree(tmp_path)
+    store = BackupStore(str(tmp_path / "store"))
+    first = create_snapshot(store, str(root), ["documents", "verification", "LICENSE"])
+    assert first["file_count"] == 4 and first["chunk_count"] == 3 and first["new_chunks"] == 3
+    second = create_snapshot(store, str(root), ["documents", "verification", "LICENSE"])
+    assert second["new_chunks"] == 0 and second["root_sha3_512"] == first["root_sha3_512"]
+    (root / "documents" / "01" / "DOC-002_B.txt").write_bytes(b"beta v2\n")
+    third = create_snapshot(store, str(root), ["documents", "verification", "LICENSE"])
+    assert third["new_chunks"] == 1
+    assert len(store.snapshot_ids()) == 3 and len(store.chunk_digests()) == 4
+
+
+def test_hash_check_blocks_snapshot(tmp_path):
+    root = _tree(tmp_path)
+    store = BackupStore(str(tmp_path / "store"))
+    expected = {"DOC-001_A.txt": _sha3(b"alpha\n" * 1000), "DOC-002_B.txt": _sha3(b"beta\n")}
+    assert create_snapshot(store, str(root), ["documents"], expected)["hashes_checked"]
+    with pytest.raises(BackupError, match="MISMATCH: DOC-002_B.txt"):
+        create_snapshot(store, str(root), ["documents"], dict(expected, **{"DOC-002_B.txt": "0"}))
+    with pytest.raises(BackupError, match="MISSING: DOC-003_C.txt"):
+        create_snapshot(store, str(root), ["documents"], dict(expected, **{"DOC-003_C.txt": "0"}))
+    assert len(store.snapshot_ids()) == 1
+
+
+def test_verify_and_restore(tmp_path):
+    root = _tree(tmp_path)
+    store = BackupStore(str(tmp_path / "store"))
+    snap = create_snapshot(store, str(root), ["documents", "verification", "LICENSE"])
+    assert verify_snapshot(store, store.load_snapshot("latest")) == []
+    dest = tmp_path / "restored"
+    assert restore_snapshot(store, snap, str(dest), "documents/") == 2
+    assert (dest / "documents" / "01" / "DOC-001_A.txt").read_bytes() == b"alpha\n" * 1000
+    assert not (dest / "LICENSE").exists()
+
+    digest = snap["files"]["LICENSE"]["chunks"][0]
+    with open(store.chunk_path(digest), "wb") as f:
+        f.write(b"garbage")
+    assert verify_snapshot(store, snap) == ["LICENSE: corrupt chunk %s" % digest[:16]]
+    with pytest.raises(BackupError):
+        restore_snapshot(store, snap, str(tmp_path / "again"))
+
+
+def test_prune_drops_old_snapshots_and_orphans(tmp_path):
+    root = _tree(tmp_path)
+    store = BackupStore(str(tmp_path / "store"))
+    create_snapshot(store, str(root), ["documents"])
+    (root / "documents" / "01" / "DOC-002_B.txt").write_bytes(b"beta v2\n")
+    latest = create_snapshot(store, str(root), ["documents"])
+    with pytest.raises(BackupError):
+        prune(store, keep=0)
+    assert len(store.snapshot_ids()) == 2
+    assert prune(store, keep=1) == (1, 1)
+    assert store.snapshot_ids() == [latest["id"]]
+    assert verify_snapshot(store, latest) == []
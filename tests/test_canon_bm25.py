@@ -0,0 +1,82 @@
+"""Section chunking and the local BM25 index."""
+import pytest
+
+import canon_bm25
+from canon_bm25 import BM25Index
+from canon_text import (chunk_document, corpus_signature, is_section_heading, iter_corpus_files,
+                        split_sections)
+
+SAMPLE = (
+    "DOCUMENT 5: PRICING\n"
+    "intro line\n"
+    "\n"
+    "I. FEES\n"
+    "Certification fees are fixed per institution.\n"
+    "\n"
+    "A. Volume Discounts\n"
+    "Discounts apply above ten certifications per year.\n"
+).encode("utf-8")
+
+
+class TestChunking:
+    def test_heading_rule(self):
+        assert is_section_heading("IV. GOVERNANCE")
+        assert is_section_heading("B. Scope")
+        assert is_section_heading("CANONICAL METADATA")
+        assert not is_section_heading("Ordinary sentence.")
+        assert not is_section_heading("___")
+
+    def test_sections_are_byte_ranges(self):
+        sections = split_sections(SAMPLE)
+        assert [s[0] for s in sections] == ["DOCUMENT 5: PRICING", "I. FEES", "A. Volume Discounts"]
+        assert sections[0][1] == 0 and sections[-1][2] == len(SAMPLE)
+        assert SAMPLE[sections[1][1]:sections[1][2]].startswith(b"I. FEES")
+
+    def test_long_sections_split_on_blank_lines(self):
+        body = b"HEADER\n" + b"".join(b"para %d " % i + b"x" * 80 + b"\n\n" for i in range(20))
+        chunks = chunk_document("DOC-001", "documents/x.txt", body, max_chunk_bytes=400)
+        assert len(chunks) > 1
+        assert all(c["end"] - c["start"] <= 400 for c in chunks)
+        assert chunks[0]["start"] == 0 and chunks[-1]["end"] == len(body)
+        assert all(a["end"] == b["start"] for a, b in zip(chunks, chunks[1:]))
+
+    def test_corpus_deduplicates_mirrored_files(self):
+        files = iter_corpus_files()
+        assert len(set(f["sha3_512"] for f in files)) == len(files)
+        assert any(f["doc_id"] == "MW-PROSPECT-FAQ-SUPPLEMENT" for f in files)
+
+
+class TestBM25:
+    def test_ranking(self):
+        chunks = chunk_document("DOC-005", "documents/x.txt", SAMPLE)
+        index = BM25Index.build(chunks)
+        hits = index.search("volume discounts", k=2)
+        assert hits[0][1]["section"] == "A. Volume Discounts"
+        assert index.search("nonexistentterm") == []
+
+    def test_save_load_roundtrip(self, tmp_path):
+        chunks = chunk_document("DOC-005", "documents/x.txt", SAMPLE)
+        path = str(tmp_path / "bm25.json")
+        BM25Index.build(chunks, signature="abc").save(path)
+        loaded = BM25Index.load(path)
+        assert loaded.signature == "abc"
+        assert loaded.search("fees")[0][1]["id"] == BM25Index.build(chunks).search("fees")[0][1]["id"]
+
+    def test_load_or_build_rebuilds_stale_index(self, tmp_path):
+        path = str(tmp_path / "bm25.json")
+        BM25Index.build([], signature="stale").save(path)
+        index = canon_bm25.load_or_build(path, store_path=str(tmp_path / "canon.pack"))
+        assert index.signature == corpus_signature(iter_corpus_files())
+        assert index.search("Document Interdependency Map")[0][1]["doc_id"] == "DOC-042"
+
+        reloaded = canon_bm25.load_or_build(path, store_path=str(tmp_path / "canon.pack"))
+        hit = reloaded.search("Document Interdependency Map")[0][1]
+        assert "DOCUMENT INTERDEPENDENCY MAP" in hit["text"].upper()
+        reloaded.store.close()
+        index.store.close()
+
+    def test_rejects_foreign_file(self, tmp_path):
+        path = tmp_path / "other.json"
+        path.write_text('{"format": "something-else"}')
+        with pytest.raises(ValueError):
+            BM25Index.load(str(path))
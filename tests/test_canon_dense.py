@@ -0,0 +1,71 @@
+"""Dense-embedding index: hashing embedder, exact and IVF search."""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from canon_dense import DenseIndex, HashingEmbedder, kmeans, load_embedder  # noqa: E402
+
+TOPICS = ["pricing fees discounts invoice", "arbitration dispute tribunal seat",
+          "cryptography hash signature ledger", "membership institution eligibility"]
+
+
+def _chunks():
+    chunks = []
+    for t, topic in enumerate(TOPICS):
+        for i in range(10):
+            chunks.append({"id": "DOC-%03d:%d" % (t + 1, i), "doc_id": "DOC-%03d" % (t + 1),
+                           "path": "documents/x.txt", "section": "S", "start": 0, "end": 1,
+                           "text": "%s paragraph %d variant %d" % (topic, i, i * 7)})
+    return chunks
+
+
+class TestEmbedder:
+    def test_deterministic_and_normalized(self):
+        a = HashingEmbedder(256).embed(["volume discounts on pricing", ""])
+        b = HashingEmbedder(256).embed(["volume discounts on pricing", ""])
+        assert a.dtype == np.float32 and a.shape == (2, 256)
+        assert np.array_equal(a, b)
+        assert abs(float(np.linalg.norm(a[0])) - 1.0) < 1e-5
+        assert float(np.linalg.norm(a[1])) == 0.0
+
+    def test_load_embedder_specs(self):
+        assert load_embedder("hashing").dim == 512
+        assert load_embedder("hashing:128").name == "hashing-128-bigram-v1"
+        with pytest.raises(ValueError):
+            load_embedder("no-factory")
+
+
+class TestSearch:
+    def test_exact_search_ranks_topic(self):
+        index = DenseIndex.build(_chunks(), HashingEmbedder(256))
+        hits = index.search("dispute arbitration seat", k=5)
+        assert len(hits) == 5
+        assert all(chunk["doc_id"] == "DOC-002" for _, chunk in hits)
+        assert [s for s, _ in hits] == sorted((s for s, _ in hits), reverse=True)
+
+    def test_ivf_matches_exact_when_probing_everything(self):
+        chunks = _chunks()
+        exact = DenseIndex.build(chunks, HashingEmbedder(256))
+        ivf = DenseIndex.build(chunks, HashingEmbedder(256), nlist=4)
+        assert ivf.nlist == 4 and int(ivf.offsets[-1]) == len(chunks)
+        for query in TOPICS:
+            a = [round(s, 5) for s, _ in exact.search(query, k=3)]
+            b = [round(s, 5) for s, _ in ivf.search(query, k=3, nprobe=4)]
+            assert a == b  # ties may come back in a different order
+
+    def test_kmeans_deterministic(self):
+        vectors = HashingEmbedder(64).embed([c["text"] for c in _chunks()])
+        c1, a1 = kmeans(vectors, 4, seed=3)
+        c2, a2 = kmeans(vectors, 4, seed=3)
+        assert np.array_equal(a1, a2) and np.allclose(c1, c2)
+
+    def test_save_load_roundtrip(self, tmp_path):
+        path = str(tmp_path / "dense")
+        built = DenseIndex.build(_chunks(), HashingEmbedder(256), signature="sig", nlist=4)
+        built.save(path)
+        loaded = DenseIndex.load(path, HashingEmbedder(256))
+        assert loaded.signature == "sig" and loaded.nlist == 4
+        assert [c["id"] for _, c in loaded.search("hash ledger", nprobe=4)] == \
+            [c["id"] for _, c in built.search("hash ledger", nprobe=4)]
+        with pytest.raises(ValueError):
+            DenseIndex.load(path, HashingEmbedder(128))
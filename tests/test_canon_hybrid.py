@@ -0,0 +1,104 @@
+"""Hybrid retrieval: RRF fusion, per-stage budgets and the reranker hook."""
+import time
+
+import pytest
+
+from canon_hybrid import (HybridIndex, RetrievalTimeout, TermOverlapReranker, load_reranker,
+                          reciprocal_rank_fusion)
+
+
+def _chunk(cid, text="x"):
+    return {"id": cid, "doc_id": cid.split(":")[0], "section": "S", "text": text}
+
+
+class FakeIndex(object):
+    signature = "sig"
+
+    def __init__(self, ids, delay=0.0):
+        self.chunks = [_chunk(cid, "text of %s" % cid) for cid in ids]
+        self.delay = delay
+
+    def search(self, query, k=5):
+        time.sleep(self.delay)
+        return [(1.0 / (n + 1), c) for n, c in enumerate(self.chunks[:k])]
+
+
+def test_rrf_rewards_agreement_and_weights():
+    lexical = [(9.0, _chunk("A:0")), (8.0, _chunk("B:0")), (7.0, _chunk("C:0"))]
+    dense = [(0.9, _chunk("C:0")), (0.8, _chunk("B:0")), (0.7, _chunk("D:0"))]
+    fused = [c["id"] for _, c in reciprocal_rank_fusion([lexical, dense], rrf_k=60)]
+    assert set(fused[:2]) == {"B:0", "C:0"}  # in both lists beats a single first place
+    assert set(fused) == {"A:0", "B:0", "C:0", "D:0"}
+    weighted = reciprocal_rank_fusion([lexical, dense], rrf_k=1, weights=[1.0, 0.1])
+    assert weighted[0][1]["id"] == "A:0"
+
+
+def test_stage_budget_drops_slow_retriever():
+    index = HybridIndex(FakeIndex(["A:0", "B:0"]), FakeIndex(["C:0"], delay=0.2),
+                        budgets_ms={"dense": 20})
+    try:
+        hits, timings = index.search_with_timings("q", k=5)
+        assert [c["id"] for _, c in hits] == ["A:0", "B:0"]
+        assert timings["dense"] == "timeout" and timings["rerank"] == "skipped"
+        assert isinstance(timings["lexical"], float)
+        assert index.stage_summary()["dense"]["timeouts"] == 1
+    finally:
+        index.close()
+
+
+def test_budget_counts_from_stage_start_and_all_timeouts_raise():
+    # One worker per stage: the second query queues behind the first one's
+    # slow dense call but still gets its full budget once it runs.
+    index = HybridIndex(FakeIndex(["A:0"]), FakeIndex(["C:0"], delay=0.15),
+                        budgets_ms={"dense": 200}, workers=1)
+    try:
+        first = index._submit("dense", index.dense.search, "q", 5)
+        hits, timings = index.search_with_timings("q", k=5)
+        assert isinstance(timings["dense"], float) and index.timeouts["dense"] == 0
+        assert index._await("dense", first) is not None
+    finally:
+        index.close()
+
+    index = HybridIndex(FakeIndex(["A:0"], delay=0.2), FakeIndex(["C:0"], delay=0.2),
+                        budgets_ms={"lexical": 10, "dense": 10})
+    try:
+        with pytest.raises(RetrievalTimeout):
+            index.search("q")
+    finally:
+        index.close()
+
+
+def test_reranker_hook_and_timeout():
+    calls = []
+
+    def reverse(query, candidates):
+        calls.append(query)
+        return list(reversed(candidates))
+
+    index = HybridIndex(FakeIndex(["A:0", "B:0"]), FakeIndex(["A:0", "B:0"]), reranker=reverse)
+    try:
+        assert [c["id"] for _, c in index.search("q", k=2)] == ["B:0", "A:0"] and calls == ["q"]
+    finally:
+        index.close()
+
+    def slow(query, candidates):
+        time.sleep(0.2)
+        return []
+
+    index = HybridIndex(FakeIndex(["A:0", "B:0"]), FakeIndex(["A:0"]), reranker=slow,
+                        budgets_ms={"rerank": 10})
+    try:
+        hits, timings = index.search_with_timings("q", k=2)
+        assert timings["rerank"] == "timeout" and hits[0][1]["id"] == "A:0"
+    finally:
+        index.close()
+
+
+def test_term_overlap_reranker():
+    candidates = [(0.9, _chunk("A:0", "fees only")), (0.5, _chunk("B:0", "arbitration fees"))]
+    assert [c["id"] for _, c in TermOverlapReranker()("arbitration fees", candidates)] == \
+        ["B:0", "A:0"]
+    assert load_reranker("none") is None
+    assert isinstance(load_reranker("terms"), TermOverlapReranker)
+    with pytest.raises(ValueError):
+        load_reranker("bogus")
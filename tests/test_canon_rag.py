@@ -0,0 +1,56 @@
+"""Retrieval-augmented prompt assembly and its token-savings report."""
+from canon_bm25 import BM25Index
+from canon_rag import (build_system_prompt, cited_docs, dedupe_chunks, estimate_tokens,
+                       format_chunk, savings_report, select_context)
+from canon_text import chunk_document
+
+
+def _chunk(path, start, end, text):
+    return {"id": "%s:%d" % (path, start), "doc_id": "DOC-001", "path": path,
+            "section": "S", "start": start, "end": end, "text": text}
+
+
+def _index():
+    body = "".join("SECTION %d\nfee schedule paragraph %d %s\n" % (i, i, "word " * 60)
+                   for i in range(12))
+    return BM25Index.build(chunk_document("DOC-005", "documents/x.txt", body.encode("utf-8")))
+
+
+class TestSelection:
+    def test_dedupe_drops_overlaps_and_repeated_text(self):
+        chunks = [
+            _chunk("a.txt", 0, 100, "alpha"),
+            _chunk("a.txt", 50, 150, "beta"),     # overlaps the first
+            _chunk("b.txt", 0, 100, "alpha"),     # same text, other file
+            _chunk("a.txt", 100, 200, "gamma"),   # adjacent, not overlapping
+        ]
+        assert [c["text"] for c in dedupe_chunks(chunks)] == ["alpha", "gamma"]
+
+    def test_budget_and_k_respected(self):
+        index = _index()
+        for budget in (100, 300, 1000):
+            chunks = select_context(index, "fee schedule", k=5, token_budget=budget)
+            assert len(chunks) <= 5
+            assert sum(estimate_tokens(format_chunk(c)) + 1 for c in chunks) <= budget
+        assert select_context(index, "fee schedule", k=5, token_budget=1) == []
+
+    def test_system_prompt(self):
+        assert build_system_prompt("INSTR", []) == "INSTR"
+        prompt = build_system_prompt("INSTR", [_chunk("a.txt", 0, 5, "alpha")])
+        assert prompt.startswith("INSTR") and "alpha" in prompt
+
+
+class TestSavings:
+    def test_cited_docs(self):
+        assert cited_docs("Per DOC-005 and Document 35, see Document 1") == [
+            "DOC-001", "DOC-005", "DOC-035"]
+
+    def test_report(self):
+        pairs = [{"question": "fee schedule 3", "ideal_response": "See DOC-005."},
+                 {"question": "paragraph 7", "ideal_response": ""}]
+        report = savings_report(_index(), "INSTR", pairs, k=2, token_budget=200)
+        assert report["questions"] == 2
+        assert report["total_saved_tokens"] == sum(r["saved_tokens"] for r in report["results"])
+        assert all(r["rag_tokens"] <= estimate_tokens("INSTR") + 200 + 10
+                   for r in report["results"])
+        assert report["cited_doc_coverage_pct"] == 100.0
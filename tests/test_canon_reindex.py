@@ -0,0 +1,129 @@
+"""Incremental re-indexing: store tombstones, index catch-up and compaction."""
+import pytest
+
+from canon_bm25 import BM25Index, build_index
+from canon_reindex import reindex
+from canon_store import ChunkStore, build_store, update_store
+
+DOCS = {
+    "DOC-001_A.txt": "DOCUMENT 1: ALPHA\n\nI. SCOPE\nScope of the membership framework.\n",
+    "DOC-002_B.txt": "DOCUMENT 2: BETA\n\nI. FEES\nFees are identical for all institutions.\n",
+    "DOC-003_C.txt": "DOCUMENT 3: GAMMA\n\nI. DISPUTES\nDisputes go to an arbitration tribunal.\n",
+}
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    import canon_text
+    root = tmp_path / "repo"
+    docs = root / "documents"
+    docs.mkdir(parents=True)
+    for name, text in DOCS.items():
+        (docs / name).write_text(text, encoding="utf-8")
+    monkeypatch.setattr(canon_text, "SCRIPT_DIR", str(root))
+
+    def listing():
+        return canon_text.iter_corpus_files([str(docs)])
+    return docs, listing, str(tmp_path / "canon.pack")
+
+
+def _edit(docs):
+    (docs / "DOC-002_B.txt").write_text(
+        "DOCUMENT 2: BETA\n\nI. FEES\nVolume discounts are never offered.\n", encoding="utf-8")
+    (docs / "DOC-003_C.txt").unlink()
+    (docs / "DOC-004_D.txt").write_text(
+        "DOCUMENT 4: DELTA\n\nI. LEDGER\nEvery ruling is hashed into the ledger.\n",
+        encoding="utf-8")
+
+
+def _hits(index, query):
+    return [(round(score, 6), chunk["id"], chunk["text"]) for score, chunk in index.search(query, 5)]
+
+
+def test_update_store_tombstones_and_appends(repo):
+    docs, listing, pack = repo
+    build_store(pack, listing()).close()
+    _edit(docs)
+    store, changes = update_store(pack, listing(), compact=False)
+    with store:
+        assert changes["documents_added"] == ["documents/DOC-002_B.txt", "documents/DOC-004_D.txt"]
+        assert changes["documents_removed"] == ["documents/DOC-002_B.txt", "documents/DOC-003_C.txt"]
+        assert len(store.deleted) == changes["chunks_removed"] > 0
+        assert store.chunk_text("DOC-002:1").startswith("I. FEES\nVolume")
+        assert store.document("documents/DOC-003_C.txt") is None
+        assert store.verify() == []
+        assert store.dead_bytes > 0 and store.generation == 1
+
+
+def test_bm25_sync_matches_full_rebuild(repo, tmp_path):
+    docs, listing, pack = repo
+    with build_store(pack, listing()) as store:
+        stale = build_index(str(tmp_path / "bm25.json"), store)
+    _edit(docs)
+    store, _ = update_store(pack, listing(), compact=False)
+    with store:
+        stale = BM25Index.load(str(tmp_path / "bm25.json"), store)
+        assert stale.sync(store)
+        fresh = BM25Index.build([store.chunk_with_text(n) for n in range(len(store))],
+                                store.signature, store=store, deleted=store.deleted)
+        for query in ("volume discounts", "arbitration tribunal", "ledger ruling", "fees"):
+            assert _hits(stale, query) == _hits(fresh, query)
+        assert not any("arbitration" in text for _, _, text in _hits(stale, "arbitration"))
+
+
+def test_dense_sync_matches_full_rebuild(repo):
+    pytest.importorskip("numpy")
+    from canon_dense import DenseIndex, HashingEmbedder
+    docs, listing, pack = repo
+    with build_store(pack, listing()) as store:
+        stale = DenseIndex.build([store.chunk_with_text(n) for n in range(len(store))],
+                                 HashingEmbedder(128), store.signature, nlist=2, store=store)
+    _edit(docs)
+    store, _ = update_store(pack, listing(), compact=False)
+    with store:
+        assert stale.sync(store)
+        fresh = DenseIndex.build([store.chunk_with_text(n) for n in range(len(store))],
+                                 HashingEmbedder(128), store.signature, store=store,
+                                 deleted=store.deleted)
+        live = len(store) - len(store.deleted)
+        assert sorted(c["id"] for _, c in stale.search("ledger", k=50, nprobe=2)) == \
+            sorted(c["id"] for _, c in fresh.search("ledger", k=50))
+        assert len(fresh.search("ledger", k=50)) == live
+
+
+def test_dense_reload_keeps_capped_ivf(repo, tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    import canon_dense
+    docs, listing, pack = repo
+    build_store(pack, listing()).close()
+    monkeypatch.setattr(canon_dense, "load_or_build_store", ChunkStore)
+    builds = []
+    build_dense = canon_dense.build_dense
+    monkeypatch.setattr(canon_dense, "build_dense",
+                        lambda *a, **kw: builds.append(1) or build_dense(*a, **kw))
+    path = str(tmp_path / "dense")
+    embedder = canon_dense.HashingEmbedder(64)
+    first = canon_dense.load_or_build_dense(path, embedder, nlist=64, store_path=pack)
+    assert first.nlist < 64 and first.requested_nlist == 64
+    again = canon_dense.load_or_build_dense(path, embedder, nlist=64, store_path=pack)
+    assert len(builds) == 1 and again.nlist == first.nlist
+    again.store.close()
+    first.store.close()
+    with pytest.raises(ValueError):
+        again.search("ledger", nprobe=0)
+
+
+def test_compaction_starts_new_epoch(repo, tmp_path):
+    docs, listing, pack = repo
+    bm25 = str(tmp_path / "bm25.json")
+    with build_store(pack, listing()) as store:
+        build_index(bm25, store)
+        epoch = store.epoch
+    _edit(docs)
+    report = reindex(pack, bm25, compact=False)
+    assert report["bm25"] == "synced" and not report["store"]["compacted"]
+    report = reindex(pack, bm25, compact=True)
+    assert report["bm25"] == "rebuilt" and report["store"]["compacted"]
+    with ChunkStore(pack) as store:
+        assert store.epoch != epoch and not store.deleted and store.dead_bytes == 0
+        assert reindex(pack, bm25)["bm25"] == "current"
@@ -0,0 +1,71 @@
+"""Memory-mapped chunk store: packing, zero-copy reads and integrity."""
+import hashlib
+
+import pytest
+
+from canon_store import ChunkStore, build_store, load_or_build_store
+
+DOCS = {
+    "DOC-001_A.txt": "DOCUMENT 1: ALPHA\nintro\n\nI. SCOPE\nScope text.\n",
+    "DOC-002_B.txt": "DOCUMENT 2: BETA\n\nA. Terms\nTerms text â\u0080\u0094 dash.\n",
+}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    import canon_text
+    root = tmp_path / "repo"
+    (root / "documents").mkdir(parents=True)
+    for name, text in DOCS.items():
+        (root / "documents" / name).write_text(text, encoding="utf-8")
+    monkeypatch.setattr(canon_text, "SCRIPT_DIR", str(root))
+    files = canon_text.iter_corpus_files([str(root / "documents")])
+    s = build_store(str(tmp_path / "canon.pack"), files)
+    yield s
+    s.close()
+
+
+def test_chunks_slice_source_bytes(store):
+    assert [d["doc_id"] for d in store.documents] == ["DOC-001", "DOC-002"]
+    for n, chunk in enumerate(store.chunks):
+        data = DOCS[chunk["path"].rsplit("/", 1)[-1]].encode("utf-8")
+        assert bytes(store.chunk_view(n)) == data[chunk["start"]:chunk["end"]]
+        assert chunk["sha3_512"] == hashlib.sha3_512(data[chunk["start"]:chunk["end"]]).hexdigest()
+    assert store.chunk_text("DOC-002:1").startswith("A. Terms")
+    assert isinstance(store.chunk_view(0), memoryview)
+
+
+def test_document_lookup_and_verify(store):
+    doc = store.document("documents/DOC-001_A.txt")
+    assert store.document_text(doc) == DOCS["DOC-001_A.txt"]
+    assert store.document("documents/missing.txt") is None
+    assert store.verify() == []
+
+
+def test_tampered_pack_detected(store, tmp_path):
+    path = str(tmp_path / "canon.pack")
+    store.close()
+    with open(path, "r+b") as f:
+        f.seek(3)
+        f.write(b"X")
+    with ChunkStore(path) as reopened:
+        assert "documents/DOC-001_A.txt" in reopened.verify()
+        assert "DOC-001:0" in reopened.verify()
+
+
+def test_truncated_pack_rejected(store, tmp_path):
+    path = str(tmp_path / "canon.pack")
+    store.close()
+    with open(path, "r+b") as f:
+        f.truncate(5)
+    with pytest.raises(ValueError):
+        ChunkStore(path)
+
+
+def test_load_or_build_reuses_current_pack(tmp_path):
+    path = str(tmp_path / "canon.pack")
+    first = load_or_build_store(path)
+    first.close()
+    with load_or_build_store(path) as second:
+        assert second.signature == first.signature
+        assert len(second) == len(first) > 1000
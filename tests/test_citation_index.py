@@ -0,0 +1,94 @@
+"""Citation resolution index over the canon, and citation checks in grading."""
+import asyncio
+import json
+
+import pytest
+
+from assistant_backends import OfflineBackend
+from assistant_server import AssistantServer, http_request
+from canon_bm25 import BM25Index
+from canon_text import chunk_document, read_corpus_file
+from citation_index import CitationIndex, build_citation_index, citation_section, section_labels
+from qa_grading import grade_response
+
+
+@pytest.fixture(scope="module")
+def citations():
+    return CitationIndex(build_citation_index())
+
+
+def test_section_labels():
+    assert section_labels("IV. GOVERNANCE", "") == ["IV"]
+    assert section_labels("ARTICLE 3 — SCOPE", "") == ["III"]
+    assert section_labels("B. FEES", "IV") == ["IV.B", "B"]
+    assert section_labels("5. CONFIDENTIALITY", "") == ["5"]
+    assert section_labels("2025 PRICING TABLE", "") == []
+
+
+def test_resolve_sections_to_offsets(citations):
+    hit = citations.resolve("DOC-017", "IV")
+    assert hit["status"] == "ok"
+    data = read_corpus_file(hit["path"])
+    assert data[hit["start"]:hit["end"]].decode("utf-8").startswith(hit["heading"])
+    assert data[:hit["start"]].count(b"\n") + 1 == hit["line"]
+    assert hit["link"] == "%s#L%d" % (hit["path"], hit["line"])
+    # Arabic article numbers fall back to the Roman label
+    assert citations.resolve("DOC-017", "4")["start"] == hit["start"]
+
+
+def test_resolve_statuses(citations):
+    assert citations.resolve("DOC-005")["status"] == "ok"
+    assert citations.resolve("DOC-003", "ZZ")["status"] == "unknown_section"
+    assert citations.resolve("DOC-041")["status"] == "unindexed"
+    assert citations.resolve("DOC-057")["status"] == "unknown"
+
+
+def test_validate_text(citations):
+    report = citations.validate("Per DOC-017, Section IV and Document 17 Section IV; "
+                                "see DOC-041 and DOC-057.")
+    assert [c["doc_id"] for c in report["citations"]] == ["DOC-017", "DOC-041", "DOC-057"]
+    assert report["unindexed"] == ["DOC-041"]
+    assert report["invalid"] == ["DOC-057"]
+
+
+def test_prose_after_section_is_not_a_label(citations):
+    assert citation_section("ii") == "II" and citation_section("B") == "B"
+    assert citation_section("civil") is None and citation_section("a") is None
+    assert citation_section("IIII") is None and citation_section("4.2") == "4.2"
+    report = citations.validate("DOC-017 Section civil disputes; DOC-017 section iv.")
+    assert report["invalid"] == []
+    assert [c["section"] for c in report["citations"]] == [None, "IV"]
+
+
+def test_grading_flags_citations(citations):
+    result = {"status": "completed", "file_search_used": True, "annotation_count": 3,
+              "response": "Per DOC-005 and DOC-041, fees are identical. " * 10}
+    base = grade_response(result, citations)
+    assert not any(f.startswith("INVALID_CITATIONS") for f in base["flags"])
+    assert "UNINDEXED_CITATIONS: DOC-041" in base["flags"]
+    assert base["score"] == 100
+
+    result["response"] += " See DOC-099."
+    graded = grade_response(result, citations)
+    assert "INVALID_CITATIONS: DOC-099" in graded["flags"]
+    assert graded["score"] == 90
+    assert {"doc_id": "DOC-099", "section": None, "status": "unknown"} in graded["citations"]
+
+
+def test_server_returns_resolved_citations(citations):
+    doc = "DOCUMENT 17: IATA\n\nIV. ARBITRATION\nDisputes go to a tribunal.\n".encode("utf-8")
+
+    async def main():
+        index = BM25Index.build(chunk_document("DOC-017", "documents/x.txt", doc))
+        server = AssistantServer(index, OfflineBackend(), "INSTR", citations=citations)
+        host, port = await server.start("127.0.0.1", 0)
+        try:
+            return await http_request(host, port, "POST", "/ask", {"question": "tribunal?"})
+        finally:
+            await server.close()
+
+    status, body = asyncio.run(main())
+    assert status == 200
+    cited = json.loads(body.decode("utf-8"))["citations"]
+    assert cited and cited[0]["doc_id"] == "DOC-017" and cited[0]["status"] == "ok"
+
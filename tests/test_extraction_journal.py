@@ -0,0 +1,54 @@
+"""State extraction change journal: write-if-changed outputs and file diffs."""
+import json
+
+from extraction_journal import (ChangeJournal, file_changes, read_journal, without_keys,
+                                without_lines, write_if_changed)
+
+
+def test_write_if_changed_ignores_volatile_fields(tmp_path):
+    path = str(tmp_path / "config.json")
+    config = {"model": "gpt-4o", "extracted_at": "2026-01-01"}
+    assert write_if_changed(path, json.dumps(config), without_keys("extracted_at")) == "added"
+    config["extracted_at"] = "2026-02-02"
+    assert write_if_changed(path, json.dumps(config, indent=2),
+                            without_keys("extracted_at")) == "unchanged"
+    assert "2026-01-01" in open(path).read()
+    config["model"] = "gpt-4.1"
+    assert write_if_changed(path, json.dumps(config), without_keys("extracted_at")) == "changed"
+
+    md = str(tmp_path / "SYSTEM.md")
+    write_if_changed(md, "# Extracted: 1\nbody\n")
+    assert write_if_changed(md, "# Extracted: 2\nbody\n", without_lines("# Extracted: ")) == \
+        "unchanged"
+
+
+def test_file_changes_classifies_reports():
+    known = {"file-1": {"filename": "a.txt"}, "file-2": {"filename": "b.txt"},
+             "file-3": {"filename": "c.txt"}}
+    reports = [
+        {"id": "file-1", "downloaded": True, "skipped": True},
+        {"id": "file-2", "filename": "b.txt", "bytes": 3, "sha256": "x", "downloaded": True,
+         "skipped": False},
+        {"id": "file-4", "filename": "d.txt", "bytes": 4, "sha256": "y", "downloaded": True,
+         "skipped": False},
+        {"id": "file-5", "error": "404"},
+    ]
+    actions = [(c["action"], c["id"]) for c in file_changes(known, reports)]
+    assert actions == [("unchanged", "file-1"), ("changed", "file-2"), ("added", "file-4"),
+                       ("failed", "file-5"), ("removed", "file-3")]
+
+
+def test_journal_appends_changes_and_run_summary(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    for _ in range(2):
+        journal = ChangeJournal(path, "incremental")
+        journal.record("file", "unchanged", id="file-1")
+        journal.record("output", "changed", path="assistant_config.json")
+        summary = journal.close()
+    records = read_journal(path)
+    assert [r["kind"] for r in records] == ["output", "run", "output", "run"]
+    assert records[0]["run"] == records[1]["run"] != records[2]["run"]
+    assert summary["counts"] == {"unchanged": 1, "changed": 1}
+    with open(path, "a") as f:
+        f.write('{"torn')
+    assert len(read_journal(path)) == 4
@@ -0,0 +1,64 @@
+"""Golden QA store: dedup by question hash, best score kept, indexed reads."""
+from golden_qa_store import GoldenQAStore, golden_pairs, merge_result_files, question_key
+
+
+def _result(qid, persona, question, score, response, targets=()):
+    return {"question_id": qid, "persona": persona, "question": question,
+            "target_docs": list(targets), "response": response,
+            "grading": {"score": score, "grade": "PASS" if score >= 80 else "WEAK"}}
+
+
+GRADED = {"timestamp": "20260101_000000", "results": [
+    _result("CFO-1", "cfo", "What does MW cost?", 85, "Fees are fixed.", ["DOC-005"]),
+    _result("ATT-1", "attorney", "Who arbitrates disputes?", 90, "IATA.", ["DOC-017"]),
+    _result("ATT-2", "attorney", "Is it admissible?", 60, "Maybe."),
+]}
+RETEST = {"timestamp": "20260102_000000", "results": [
+    _result("CFO-1", "cfo", "what does MW cost", 95, "Fees are fixed; see DOC-005.", ["DOC-005"]),
+    _result("ATT-1", "attorney", "Who arbitrates disputes?", 80, "Worse answer.", ["DOC-017"]),
+]}
+
+
+def test_question_key_ignores_case_and_punctuation():
+    assert question_key("What does MW cost?") == question_key("what  does mw COST")
+    assert question_key("What does MW cost?") != question_key("What does MW charge?")
+
+
+def test_golden_pairs_threshold_and_bank_targets():
+    pairs = golden_pairs(GRADED, "graded.json")
+    assert [p["question_id"] for p in pairs] == ["CFO-1", "ATT-1"]
+    legacy = [{"persona": "cfo", "question": "What does MW cost?", "ideal_response": "x",
+               "score": 90, "grade": "PASS", "source": "qa_graded_results.json"}]
+    bank = {question_key("What does MW cost?"): {"id": "CFO-1", "targets": ["DOC-005"]}}
+    pair = golden_pairs(legacy, "golden_qa_pairs.json", bank)[0]
+    assert pair["targets"] == ["DOC-005"] and pair["question_id"] == "CFO-1"
+    assert pair["source"] == "qa_graded_results.json"
+
+
+def test_merge_keeps_best_answer_with_provenance(tmp_path):
+    import json
+    paths = []
+    for name, data in (("graded.json", GRADED), ("retest.json", RETEST)):
+        (tmp_path / name).write_text(json.dumps(data))
+        paths.append(str(tmp_path / name))
+    path = str(tmp_path / "golden.jsonl")
+    store = GoldenQAStore(path)
+    assert merge_result_files(store, paths) == {"added": 2, "improved": 1, "duplicate": 1}
+    store.save()
+
+    store = GoldenQAStore(path)
+    assert len(store) == 2
+    cfo = store.get(question_key("What does MW cost?"))
+    assert cfo["score"] == 95 and cfo["source"] == "retest.json"
+    assert [p["source"] for p in cfo["provenance"]] == ["graded.json", "retest.json"]
+    att = store.sample(5, persona="attorney", target="DOC-017", seed=1)
+    assert len(att) == 1 and att[0]["ideal_response"] == "IATA." and len(att[0]["provenance"]) == 2
+    assert store.keys(target="DOC-999") == []
+
+    before = open(path, "rb").read()
+    assert merge_result_files(store, paths) == {"added": 0, "improved": 0, "duplicate": 4}
+    assert not store.pending
+    store.save()
+    assert open(path, "rb").read() == before
+    assert [p["question"] for p in store.to_list()] == \
+        [p["question"] for p in store.iter_pairs()]
@@ -0,0 +1,60 @@
+"""Migration configs generated from the platform definitions in migration_platforms/."""
+import json
+
+import pytest
+
+from migration_generator import (generate, instructions_ref, load_platforms,
+                                 resolve_instructions, serving_settings)
+
+
+def test_configs_reference_instructions_by_hash(tmp_path):
+    platforms = load_platforms()
+    assert [p["key"] for p in platforms] == ["anthropic", "azure", "selfhosted"]
+    actions = generate("Answer from the canon.\n", platforms, str(tmp_path))
+    ref = instructions_ref("Answer from the canon.\n")
+    assert actions[ref["path"]] == "added"
+    for platform in platforms:
+        config = json.loads((tmp_path / platform["output"]).read_text())
+        assert config[platform["instructions_field"]] == ref
+        assert "Answer from the canon" not in (tmp_path / platform["output"]).read_text()
+        stub = (tmp_path / ("serve_%s.py" % platform["key"])).read_text()
+        compile(stub, "serve_%s.py" % platform["key"], "exec")
+        assert '"--backend", "%s"' % platform["backend"] in stub
+    assert "claude-sonnet-4-5" in (tmp_path / "anthropic_migrate.py").read_text()
+    settings = serving_settings(str(tmp_path / "azure_config.json"))
+    assert settings["backend"] == "azure"
+    assert settings["backend_options"]["deployment"] == "mw-knowledge-assistant"
+    assert settings["instructions"] == "Answer from the canon.\n"
+
+
+def test_regeneration_is_a_no_op_and_prunes_old_instructions(tmp_path):
+    platforms = load_platforms()
+    generate("v1\n", platforms, str(tmp_path))
+    assert set(generate("v1\n", platforms, str(tmp_path)).values()) == {"unchanged"}
+    actions = generate("v2\n", platforms, str(tmp_path))
+    assert actions[instructions_ref("v1\n")["path"]] == "removed"
+    assert [p.name for p in tmp_path.glob("instructions-*.md")] == [instructions_ref("v2\n")["path"]]
+    assert actions["serve_azure.py"] == "unchanged"
+
+
+def test_tampered_instructions_are_rejected(tmp_path):
+    ref = instructions_ref("original")
+    (tmp_path / ref["path"]).write_text("edited")
+    with pytest.raises(ValueError):
+        resolve_instructions(ref, str(tmp_path))
+    assert resolve_instructions("inline text", str(tmp_path)) == "inline text"
+
+
+def test_new_platform_needs_only_a_definition(tmp_path):
+    platform_dir = tmp_path / "platforms"
+    platform_dir.mkdir()
+    (platform_dir / "local.json").write_text(json.dumps({
+        "key": "local", "title": "Local test", "output": "local_config.json",
+        "backend": "offline", "instructions_field": "prompt", "config": {"_meta": {}}}))
+    (platform_dir / "broken.json").write_text(json.dumps({"key": "broken"}))
+    with pytest.raises(ValueError):
+        load_platforms(str(platform_dir))
+    (platform_dir / "broken.json").unlink()
+    generate("x", load_platforms(str(platform_dir)), str(tmp_path / "out"))
+    assert serving_settings(str(tmp_path / "out" / "local_config.json"))["backend"] == "offline"
+    assert (tmp_path / "out" / "serve_local.py").exists()
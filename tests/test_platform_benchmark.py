@@ -0,0 +1,102 @@
+"""Platform benchmark: repeats, warm-up, confidence intervals, switching evidence."""
+import threading
+import time
+
+from platform_benchmark import (DEFAULT_LEVELS, DEFAULT_REPEATS, DEFAULT_WARMUP, append_history,
+                                latency_stats, load_history, mean_confidence_interval, new_run,
+                                question_set_id, run_level, run_platform, switching_evidence)
+
+
+def test_confidence_interval_uses_student_t():
+    mean, low, high = mean_confidence_interval([1.0, 2.0, 3.0])
+    assert mean == 2.0
+    assert round(high - mean, 3) == round(4.303 * 1.0 / 3 ** 0.5, 3)
+    assert mean_confidence_interval([5.0]) == (5.0, 5.0, 5.0)
+    stats = latency_stats([1.0, 2.0, 3.0, 4.0])
+    assert stats["p50"] == 2.5 and stats["min"] == 1.0 and stats["count"] == 4
+
+
+def test_run_level_repeats_warmup_and_concurrency():
+    calls = []
+    lock = threading.Lock()
+    active = [0, 0]
+
+    def ask(question):
+        with lock:
+            calls.append(question)
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        if question == "bad":
+            raise RuntimeError("boom")
+        return {"status": "completed", "response": question.upper()}
+
+    row = run_level(ask, ["a", "b", "bad"], repeats=4, warmup=2, concurrency=3)
+    assert len(calls) == 3 * 6
+    assert row["samples"] == 12 and row["errors"] == 4 and row["error_rate_pct"] == 33.3
+    assert row["latency"]["count"] == 8 and row["throughput_qps"] > 0
+    assert active[1] > 1
+    assert row["first_samples"]["a"]["answer"]["response"] == "A"
+
+    result = run_platform("fake", ask, ["a"], repeats=2, warmup=0, levels=(1, 2))
+    assert [r["concurrency"] for r in result["levels"]] == [1, 2]
+    assert result["samples"]["a"]["ok"]
+    assert "samples" not in new_run([result])["platforms"]["fake"]
+
+
+def test_default_run_is_one_paced_call_per_question():
+    calls = []
+
+    def ask(question):
+        calls.append(time.perf_counter())
+        return {"status": "completed", "response": question}
+
+    result = run_platform("fake", ask, ["a", "b", "c"], DEFAULT_REPEATS, DEFAULT_WARMUP,
+                          DEFAULT_LEVELS, pause=0.05)
+    assert len(calls) == 3
+    assert min(b - a for a, b in zip(calls, calls[1:])) >= 0.05
+    assert result["levels"][0]["wall_seconds"] < 0.05
+
+
+def _result(platform, latencies, errors=0, questions=("q",), repeats=4):
+    stats = latency_stats(latencies)
+    total = len(latencies) + errors
+    return {"platform": platform, "questions": len(questions), "repeats": repeats,
+            "question_set": question_set_id(questions), "levels": [{
+        "concurrency": 1, "latency": stats, "error_rate_pct": 100.0 * errors / total}]}
+
+
+def test_switching_evidence_requires_non_overlapping_intervals(tmp_path):
+    path = str(tmp_path / "history.json")
+    assert not switching_evidence([])["openai_api_degradation"]["fired"]
+    append_history(new_run([_result("openai-assistants", [4.0, 4.2, 3.9, 4.1])]), path)
+    history = append_history(new_run([
+        _result("openai-assistants", [4.1, 4.3, 3.8, 4.0]),
+        _result("anthropic", [2.0, 2.1, 1.9, 2.2]),
+        _result("offline", [3.0, 5.5, 4.0, 6.0]),
+    ]), path)
+    evidence = switching_evidence(history)
+    assert not evidence["openai_api_degradation"]["fired"]
+    assert evidence["anthropic_faster_than_openai-assistants"]["fired"]
+    assert not evidence["offline_faster_than_openai-assistants"]["fired"]
+
+    history = append_history(new_run([_result("openai-assistants", [9.0, 9.5, 8.8, 9.2])]), path)
+    assert switching_evidence(history)["openai_api_degradation"]["fired"]
+    history = append_history(new_run([_result("openai-assistants", [4.0, 4.1], errors=2)]), path)
+    assert "error rate" in switching_evidence(history)["openai_api_degradation"]["evidence"]
+    assert len(load_history(path)) == 4
+
+
+def test_switching_evidence_only_compares_like_runs(tmp_path):
+    path = str(tmp_path / "history.json")
+    append_history(new_run([_result("openai-assistants", [4.0, 4.2, 3.9, 4.1])]), path)
+    history = append_history(new_run([_result("openai-assistants", [9.0, 9.5, 8.8, 9.2],
+                                              questions=("other",))]), path)
+    assert not switching_evidence(history)["openai_api_degradation"]["fired"]
+    history = append_history(new_run([_result("openai-assistants", [9.0, 9.5, 8.8, 9.2],
+                                              repeats=1)]), path)
+    assert not switching_evidence(history)["openai_api_degradation"]["fired"]
+    history = append_history(new_run([_result("openai-assistants", [9.0, 9.5, 8.8, 9.2])]), path)
+    assert switching_evidence(history)["openai_api_degradation"]["fired"]
@@ -0,0 +1,60 @@
+"""Golden QA replay: concurrent backend runs graded against golden scores."""
+from assistant_backends import OfflineBackend
+from portability_replay import answer_quality, replay_backend, run_replay
+
+CHUNKS = [
+    {"id": "DOC-005:1", "doc_id": "DOC-005", "section": "I. FEES", "path": "d5",
+     "start": 0, "end": 60,
+     "text": "Fees are identical for every institution. No volume discounts are offered."},
+    {"id": "DOC-017:1", "doc_id": "DOC-017", "section": "II. ARBITRATION", "path": "d17",
+     "start": 0, "end": 60,
+     "text": "Disputes between authorities go to the IATA arbitration tribunal."},
+]
+
+
+class FakeIndex(object):
+    def search(self, query, k=5):
+        words = set(query.lower().split())
+        hits = [c for c in CHUNKS if words & set(c["text"].lower().split())]
+        return [(1.0, c) for c in hits[:k]]
+
+
+class Failing(object):
+    name = "failing"
+
+    def generate(self, system, question, chunks):
+        raise RuntimeError("503 from upstream")
+
+
+PAIRS = [
+    {"persona": "cfo", "question": "are there volume discounts", "score": 90,
+     "ideal_response": "No: see DOC-005.", "targets": ["DOC-005"]},
+    {"persona": "attorney", "question": "who handles arbitration", "score": 100,
+     "ideal_response": "DOC-017 and DOC-035 define it.", "targets": ["DOC-017"]},
+]
+
+
+def test_replay_grades_each_answer_in_order():
+    results = replay_backend(OfflineBackend(), PAIRS, FakeIndex(), "instructions",
+                             concurrency=2)
+    assert [r["question"] for r in results] == [p["question"] for p in PAIRS]
+    assert all(r["status"] == "completed" and r["file_search_used"] for r in results)
+    assert results[0]["annotation_count"] == 1 and "DOC-005" in results[0]["response"]
+    assert all("grading" in r and r["finished_at"] >= r["started_at"] for r in results)
+
+    quality = answer_quality(PAIRS, results)
+    assert quality["golden_mean_score"] == 95.0
+    assert quality["doc_agreement_pct"] == round(100.0 * 2 / 3, 1)
+    assert quality["parity_pct"] == round(100.0 * quality["mean_score"] / 95.0, 1)
+
+
+def test_run_replay_reports_errors_and_unknown_backends(monkeypatch):
+    import portability_replay
+    monkeypatch.setattr(portability_replay, "load_backend",
+                        lambda name: Failing() if name == "failing" else OfflineBackend()
+                        if name == "offline" else (_ for _ in ()).throw(ValueError("unknown")))
+    report = run_replay(["offline", "failing", "bogus"], PAIRS, FakeIndex(), "i")
+    assert report["offline"]["metrics"]["completed"] == 2
+    failing = report["failing"]
+    assert failing["metrics"]["errors"] == 2 and failing["quality"]["mean_score"] == 0.0
+    assert report["bogus"] == {"error": "unknown"}
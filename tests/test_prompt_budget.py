@@ -0,0 +1,48 @@
+"""Prompt token budget: strategy measurement and cost/latency projection."""
+from canon_bm25 import BM25Index
+from canon_rag import estimate_tokens
+from canon_text import chunk_document
+from prompt_budget import (budget_report, mean_output_tokens, measure_prompts, project,
+                           query_cost, query_latency)
+
+MODEL = {"input": 3.0, "output": 15.0, "cache_read": 0.3, "ttft": 1.0, "prefill": 1000.0,
+         "decode": 50.0}
+
+
+def _index():
+    body = "".join("SECTION %d\nfee schedule paragraph %d %s\n" % (i, i, "word " * 60)
+                   for i in range(12))
+    return BM25Index.build(chunk_document("DOC-005", "documents/x.txt", body.encode("utf-8")))
+
+
+def test_measure_prompts_per_strategy():
+    questions = [{"id": "Q1", "text": "What is the fee schedule?"},
+                 {"id": "Q2", "text": "Which paragraph covers fees?"}]
+    rows = measure_prompts(_index(), "INSTR " * 50, questions, ks=(1, 4), token_budget=400,
+                           count=estimate_tokens)
+    assert sorted(rows) == ["full", "full-cached", "rag-k1", "rag-k4"]
+    assert rows["full"][0]["system"] == rows["full-cached"][0]["cached"]
+    assert rows["rag-k1"][0]["system"] < rows["rag-k4"][0]["system"]
+    assert all(r["chunks"] <= 4 for r in rows["rag-k4"])
+
+
+def test_cost_and_latency_model():
+    assert query_cost(MODEL, 1000000, 0, 0) == 3.0
+    assert round(query_cost(MODEL, 1000, 1000, 100), 6) == round((300 + 1500) / 1e6, 6)
+    assert query_cost(dict(MODEL, cache_read=None), 1000, 1000, 0) == query_cost(MODEL, 1000, 0, 0)
+    assert query_latency(MODEL, 2000, 100, 0.5) == 1.0 + 2.0 + 2.0 + 0.5
+    rows = [{"system": 900, "question": 100, "cached": 0, "retrieval_seconds": 0.0}] * 4
+    p = project(rows, MODEL, 200)
+    assert p["input_tokens"]["mean"] == 1000
+    assert p["cost_per_1000_usd"] == round(query_cost(MODEL, 1000, 0, 200) * 1000, 2)
+    assert p["serial_hours_per_1000"] == round(query_latency(MODEL, 1000, 200) * 1000 / 3600, 2)
+
+
+def test_report_skips_cached_strategy_without_prompt_cache():
+    rows = {"full": [{"system": 10, "question": 2, "cached": 0, "retrieval_seconds": 0.0}],
+            "full-cached": [{"system": 10, "question": 2, "cached": 10, "retrieval_seconds": 0.0}]}
+    report = budget_report(rows, {"a": MODEL, "b": dict(MODEL, cache_read=None)}, 100)
+    assert sorted(report["strategies"]["full"]) == ["a", "b"]
+    assert sorted(report["strategies"]["full-cached"]) == ["a"]
+    assert mean_output_tokens(estimate_tokens, [{"ideal_response": "x" * 40}]) == 10
+    assert mean_output_tokens(estimate_tokens, []) == 500
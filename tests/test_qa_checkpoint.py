@@ -0,0 +1,39 @@
+"""Resumable QA run checkpoints: append, resume and corrupt lines."""
+import json
+
+import qa_metrics
+from qa_checkpoint import append_checkpoint, load_checkpoint, reset_checkpoint
+
+
+def _result(qid, status="completed", started=0.0):
+    return {"question_id": qid, "persona": "cfo", "status": status, "error": None,
+            "elapsed_seconds": 10.0, "started_at": started, "finished_at": started + 10.0}
+
+
+def test_resume_skips_only_completed(tmp_path):
+    directory = str(tmp_path)
+    append_checkpoint(_result("Q1"), "ck.jsonl", directory)
+    append_checkpoint(_result("Q2", status="failed"), "ck.jsonl", directory)
+    append_checkpoint(_result("Q3"), "ck.jsonl", directory)
+    done = load_checkpoint("ck.jsonl", directory)
+    assert sorted(done) == ["Q1", "Q3"] and all(r["resumed"] for r in done.values())
+    reset_checkpoint("ck.jsonl", directory)
+    assert load_checkpoint("ck.jsonl", directory) == {}
+    assert load_checkpoint("missing.jsonl", directory) == {}
+
+
+def test_corrupt_and_truncated_lines_are_ignored(tmp_path):
+    path = tmp_path / "ck.jsonl"
+    path.write_text("\n".join([json.dumps(_result("Q1")), "not json", json.dumps([1, 2]),
+                               json.dumps({"status": "completed"}),
+                               json.dumps(_result("Q2"))[:25]]) + "\n", encoding="utf-8")
+    assert list(load_checkpoint("ck.jsonl", str(tmp_path))) == ["Q1"]
+
+
+def test_resumed_results_left_out_of_throughput(tmp_path):
+    append_checkpoint(_result("Q1", started=0.0), "ck.jsonl", str(tmp_path))
+    resumed = list(load_checkpoint("ck.jsonl", str(tmp_path)).values())
+    fresh = [_result("Q2", started=86400.0), _result("Q3", started=86400.0)]
+    summary = qa_metrics.summarize(resumed + fresh)
+    assert summary["throughput_qpm"] == 12.0  # two questions in 10 s, not three in a day
+    assert summary["latency_seconds"]["count"] == 3
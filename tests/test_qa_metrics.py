@@ -0,0 +1,82 @@
+"""QA latency/throughput metrics -- percentile math and Prometheus export."""
+import qa_metrics
+
+
+def _result(persona, elapsed, status="completed", backend=None):
+    r = {"persona": persona, "elapsed_seconds": elapsed, "status": status, "error": None}
+    if status != "completed":
+        r["error"] = "Run did not complete: %s" % status
+    if backend:
+        r["backend"] = backend
+    return r
+
+
+class TestPercentiles:
+    def test_percentile_interpolates(self):
+        values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+        assert qa_metrics.percentile(values, 0.5) == 5.5
+        assert abs(qa_metrics.percentile(values, 0.9) - 9.1) < 1e-9
+        assert qa_metrics.percentile(values, 1.0) == 10
+
+    def test_percentile_empty_and_single(self):
+        assert qa_metrics.percentile([], 0.99) == 0.0
+        assert qa_metrics.percentile([4.2], 0.5) == 4.2
+
+
+class TestMetricsReport:
+    def test_groups_and_error_rates(self):
+        results = [
+            _result("cfo", 10.0),
+            _result("cfo", 20.0),
+            _result("cfo", 0, status="failed"),
+            _result("attorney", 5.0, backend="offline"),
+        ]
+        report = qa_metrics.build_metrics_report(results)
+        cfo = report["by_persona"]["cfo"]
+        assert cfo["total"] == 3
+        assert cfo["errors"] == 1
+        assert cfo["error_rate_pct"] == 33.3
+        # Errored runs are excluded from the latency distribution
+        assert cfo["latency_seconds"]["count"] == 2
+        assert cfo["latency_seconds"]["p50"] == 15.0
+        assert set(report["by_backend"]) == {qa_metrics.DEFAULT_BACKEND, "offline"}
+
+    def test_throughput_uses_wall_clock_when_stamped(self):
+        results = [
+            dict(_result("cfo", 30.0), started_at=0.0, finished_at=30.0),
+            dict(_result("cfo", 30.0), started_at=0.0, finished_at=30.0),
+        ]
+        # Two concurrent 30 s questions -> 4 questions/minute
+        assert qa_metrics.summarize(results)["throughput_qpm"] == 4.0
+
+    def test_cache_hits_excluded_from_latency_and_throughput(self):
+        results = [
+            dict(_result("cfo", 30.0), started_at=0.0, finished_at=30.0),
+            dict(_result("cfo", 90.0), cached=True, started_at=100.0, finished_at=100.1),
+        ]
+        summary = qa_metrics.summarize(results)
+        assert summary["completed"] == 2 and summary["cached"] == 1
+        assert summary["latency_seconds"]["count"] == 1
+        assert summary["latency_seconds"]["max"] == 30.0
+        assert summary["throughput_qpm"] == 2.0
+
+    def test_prometheus_export(self, tmp_path):
+        report = qa_metrics.build_metrics_report([_result("cfo", 12.0)])
+        text = qa_metrics.render_prometheus(report)
+        assert '# TYPE mw_qa_latency_seconds summary' in text
+        assert ('mw_qa_latency_seconds{backend="openai-assistants",persona="cfo",'
+                'quantile="0.99"} 12.0') in text
+        assert "Completed throughput" not in text
+
+        report = qa_metrics.build_metrics_report([
+            _result("cfo", 1.0, backend="anthropic"), _result("cfo", 2.0, backend="offline"),
+            _result("cro", 3.0, backend="offline")])
+        counts = [line for line in qa_metrics.render_prometheus(report).splitlines()
+                  if line.startswith("mw_qa_latency_seconds_count")]
+        assert len(counts) == 3 and all("persona=" in c and "backend=" in c for c in counts)
+        assert sum(int(c.split()[-1]) for c in counts) == 3
+        assert not text.rstrip().endswith("# EOF")
+
+        path = qa_metrics.write_metrics_file(report, str(tmp_path / "qa.om"))
+        with open(path) as f:
+            assert f.read().rstrip().endswith("# EOF")
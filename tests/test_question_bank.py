@@ -0,0 +1,67 @@
+"""Question bank loading, sharding and filtering."""
+import json
+
+import pytest
+
+import question_bank
+
+
+class TestDefaultBank:
+    def test_default_bank_has_40_questions_across_8_personas(self):
+        questions = question_bank.load_questions()
+        assert len(questions) == 40
+        assert len(set(q["persona"] for q in questions)) == 8
+
+    def test_hedge_phrases_loaded_lowercase(self):
+        phrases = question_bank.load_hedge_phrases()
+        assert "i'm not sure" in phrases
+        assert all(p == p.lower() for p in phrases)
+
+    def test_faq_template_formats(self):
+        text = question_bank.load_text(question_bank.FAQ_SUPPLEMENT_FILE)
+        assert "2026-01-01" in text.format(timestamp="2026-01-01")
+
+
+class TestSharding:
+    def test_shards_partition_the_bank(self):
+        all_ids = set(q["id"] for q in question_bank.iter_questions())
+        seen = []
+        for i in range(1, 5):
+            seen.extend(q["id"] for q in question_bank.iter_questions(shard=(i, 4)))
+        assert sorted(seen) == sorted(all_ids)
+
+    def test_parse_shard(self):
+        assert question_bank.parse_shard("2/8") == (2, 8)
+        assert question_bank.parse_shard(None) is None
+        for bad in ("0/4", "5/4", "x/4", "3"):
+            with pytest.raises(ValueError):
+                question_bank.parse_shard(bad)
+
+
+class TestFilters:
+    def test_persona_and_target_filters(self):
+        cfo = question_bank.load_questions(personas=["cfo"])
+        assert len(cfo) == 5
+        pricing = question_bank.load_questions(personas=["cfo"], targets=["DOC-005"])
+        assert [q["id"] for q in pricing] == ["CFO-1", "CFO-2", "CFO-5"]
+
+    def test_directory_bank_and_duplicate_ids(self, tmp_path):
+        q = {"id": "X-1", "persona": "cfo", "text": "?", "targets": ["DOC-005"]}
+        (tmp_path / "a.jsonl").write_text(json.dumps(q) + "\n")
+        assert len(question_bank.load_questions(str(tmp_path))) == 1
+        (tmp_path / "b.jsonl").write_text(json.dumps(q) + "\n")
+        with pytest.raises(ValueError):
+            question_bank.load_questions(str(tmp_path))
+
+    def test_missing_fields_rejected(self, tmp_path):
+        path = tmp_path / "bad.jsonl"
+        path.write_text(json.dumps({"id": "X-1", "text": "?"}) + "\n")
+        with pytest.raises(ValueError):
+            question_bank.load_questions(str(path))
+
+    def test_yaml_bank(self, tmp_path):
+        pytest.importorskip("yaml")
+        path = tmp_path / "bank.yaml"
+        path.write_text("questions:\n  - id: Y-1\n    persona: skeptic\n    text: Why?\n"
+                        "    targets: [DOC-006]\n")
+        assert question_bank.load_questions(str(path))[0]["id"] == "Y-1"
@@ -0,0 +1,49 @@
+"""Response cache -- content addressing, invalidation and eviction."""
+import os
+import time
+
+from response_cache import ResponseCache, assistant_fingerprint, make_key
+
+
+class TestKeys:
+    def test_instruction_change_changes_key(self):
+        before = assistant_fingerprint("Be precise.", [{"id": "vs_1", "file_count": 43}])
+        after = assistant_fingerprint("Be precise. Cite documents.", [{"id": "vs_1", "file_count": 43}])
+        assert make_key("openai-assistants", "gpt-4o", before, "Q?") != \
+            make_key("openai-assistants", "gpt-4o", after, "Q?")
+
+    def test_vector_store_upload_changes_fingerprint(self):
+        assert assistant_fingerprint("x", [{"id": "vs_1", "file_count": 43}]) != \
+            assistant_fingerprint("x", [{"id": "vs_1", "file_count": 44}])
+
+    def test_whitespace_is_normalized(self):
+        assert make_key("b", "m", "f", "What  is\nDOC-005?") == make_key("b", "m", "f", "What is DOC-005?")
+
+
+class TestCache:
+    def test_roundtrip_and_stats(self, tmp_path):
+        cache = ResponseCache(str(tmp_path))
+        assert cache.get("ab" * 32) is None
+        cache.put("ab" * 32, {"response": "Per DOC-005..."})
+        assert cache.get("ab" * 32) == {"response": "Per DOC-005..."}
+        assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+    def test_ttl_expiry(self, tmp_path):
+        cache = ResponseCache(str(tmp_path), ttl_seconds=60)
+        cache.put("cd" * 32, {"response": "old"})
+        path = cache._path("cd" * 32)
+        past = time.time() - 120
+        os.utime(path, (past, past))
+        assert cache.evict() == 1
+        assert cache.get("cd" * 32) is None
+
+    def test_lru_eviction(self, tmp_path):
+        cache = ResponseCache(str(tmp_path), max_entries=2)
+        keys = ["%02x" % i * 32 for i in range(3)]
+        for n, key in enumerate(keys):
+            cache.put(key, {"n": n})
+            stamp = time.time() - 100 + n
+            os.utime(cache._path(key), (stamp, stamp))
+        cache.evict()
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[2]) == {"n": 2}
@@ -0,0 +1,51 @@
+"""Offline retrieval benchmark: metrics, engine runs and regression history."""
+from canon_store import build_store
+from canon_text import iter_corpus_files
+from retrieval_benchmark import (append_history, find_regressions, load_history,
+                                 previous_result, run_benchmark, score_ranking)
+
+QUESTIONS = [
+    {"id": "Q1", "text": "arbitration tribunal disputes", "targets": ["DOC-017"]},
+    {"id": "Q2", "text": "volume discounts pricing", "targets": ["DOC-005", "DOC-009"]},
+    {"id": "Q3", "text": "no targets here", "targets": []},
+]
+
+
+def test_score_ranking():
+    row = score_ranking(["DOC-001", "DOC-005", "DOC-001", "DOC-009"], ["DOC-005", "DOC-009"],
+                        ks=(1, 2, 4))
+    assert row == {"recall@1": 0.0, "recall@2": 0.5, "recall@4": 1.0, "rr": 0.5}
+    assert score_ranking(["DOC-001"], ["DOC-002"], ks=(1,))["rr"] == 0.0
+
+
+def test_run_benchmark_bm25(tmp_path):
+    docs = tmp_path / "documents"
+    docs.mkdir()
+    (docs / "DOC-005_P.txt").write_text("PRICING\nVolume discounts are never offered.\n")
+    (docs / "DOC-017_I.txt").write_text("ARBITRATION\nDisputes go to a tribunal.\n")
+    store = build_store(str(tmp_path / "pack"), iter_corpus_files([str(docs)]))
+    try:
+        run = run_benchmark(["bm25"], QUESTIONS, store, ks=(1, 5))
+    finally:
+        store.close()
+    result = run["engines"]["bm25"]
+    assert run["questions"] == result["questions"] == 2
+    assert result["recall@1"] == 0.75 and result["recall@5"] == 0.75
+    assert result["mrr"] == 1.0
+    assert result["index_bytes"] > 0 and result["build_seconds"] >= 0
+    assert set(result["latency_ms"]) == {"p50", "p90", "p99", "mean"}
+
+
+def test_history_and_regressions(tmp_path):
+    path = str(tmp_path / "history.json")
+    old = {"bank": "b", "engines": {"bm25": {"recall@5": 0.90, "mrr": 0.70}}}
+    new = {"bank": "b", "engines": {"bm25": {"recall@5": 0.85, "mrr": 0.69}}}
+    append_history(old, path)
+    history = load_history(path)
+    assert previous_result(history, new, "bm25") == old["engines"]["bm25"]
+    assert previous_result(history, dict(new, bank="other"), "bm25") is None
+    assert previous_result(history, dict(new, personas=["cfo"]), "bm25") is None
+    assert previous_result(history, dict(new, options={"nprobe": 1}), "bm25") is None
+    assert find_regressions(old["engines"]["bm25"], new["engines"]["bm25"], 0.02) == \
+        ["recall@5 0.9000 -> 0.8500"]
+    assert len(append_history(new, path, limit=1)) == 1
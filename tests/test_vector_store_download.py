@@ -0,0 +1,111 @@
+"""Concurrent vector-store download against an in-memory stand-in client."""
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from vector_store_download import download_vector_store, iter_vector_store_files
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def iter_bytes(self, chunk_size):
+        for n in range(0, len(self.data), chunk_size):
+            yield self.data[n:n + chunk_size]
+
+
+class FakeClient:
+    """Vector store of `contents` ({file id: bytes}); ids in `broken` fail."""
+
+    def __init__(self, contents, broken=(), filenames=None):
+        self.contents = contents
+        self.broken = set(broken)
+        self.filenames = filenames or {}
+        self.pages = []
+        self.fetched = []
+        self.lock = threading.Lock()
+        self.files = SimpleNamespace(
+            retrieve=self._retrieve,
+            with_streaming_response=SimpleNamespace(content=self._content))
+        vs_files = SimpleNamespace(list=self._list)
+        self.beta = SimpleNamespace(vector_stores=SimpleNamespace(files=vs_files))
+
+    def _list(self, vector_store_id, limit=20, after=None):
+        ids = sorted(self.contents)
+        start = ids.index(after) + 1 if after else 0
+        page = ids[start:start + 2]  # tiny pages to exercise pagination
+        self.pages.append(after)
+        return SimpleNamespace(data=[SimpleNamespace(id=i, status="completed") for i in page],
+                               has_more=start + 2 < len(ids))
+
+    def _retrieve(self, file_id):
+        filename = self.filenames.get(file_id, "%s.txt" % file_id)
+        return SimpleNamespace(id=file_id, filename=filename,
+                               bytes=len(self.contents[file_id]), purpose="assistants",
+                               created_at=0)
+
+    @contextmanager
+    def _content(self, file_id):
+        with self.lock:
+            self.fetched.append(file_id)
+        if file_id in self.broken:
+            raise IOError("connection reset")
+        yield FakeResponse(self.contents[file_id])
+
+
+def test_pagination_walks_every_page():
+    client = FakeClient(dict(("file-%d" % n, b"x") for n in range(5)))
+    assert [f.id for f in iter_vector_store_files(client, "vs")] == \
+        ["file-0", "file-1", "file-2", "file-3", "file-4"]
+    assert client.pages == [None, "file-1", "file-3"]
+
+
+def test_download_streams_and_skips_unchanged(tmp_path):
+    contents = dict(("file-%d" % n, (b"chunk %d " % n) * 20000) for n in range(5))
+    client = FakeClient(contents)
+    reports = download_vector_store(client, "vs", str(tmp_path), max_workers=3)
+    assert [r["id"] for r in reports] == sorted(contents)
+    assert all(r["downloaded"] and not r["skipped"] for r in reports)
+    assert (tmp_path / "file-3.txt").read_bytes() == contents["file-3"]
+    assert not list(tmp_path.glob("*.part"))
+
+    known = dict((r["id"], r) for r in reports)
+    (tmp_path / "file-1.txt").write_bytes(b"y" * len(contents["file-1"]))  # same size, new hash
+    client.fetched = []
+    again = download_vector_store(client, "vs", str(tmp_path), known)
+    assert client.fetched == ["file-1"]
+    assert [r["skipped"] for r in again] == [False if r["id"] == "file-1" else True for r in again]
+    assert (tmp_path / "file-1.txt").read_bytes() == contents["file-1"]
+
+
+def test_failed_download_leaves_no_partial_file(tmp_path):
+    client = FakeClient({"file-a": b"a" * 10, "file-b": b"b" * 10}, broken=["file-b"])
+    reports = download_vector_store(client, "vs", str(tmp_path))
+    assert reports[0]["downloaded"]
+    assert not reports[1]["downloaded"] and "connection reset" in reports[1]["download_error"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["file-a.txt"]
+
+
+def test_trust_metadata_skips_without_hashing(tmp_path):
+    client = FakeClient({"file-a": b"a" * 10})
+    known = dict((r["id"], r) for r in download_vector_store(client, "vs", str(tmp_path)))
+    (tmp_path / "file-a.txt").write_bytes(b"z" * 10)  # same size: metadata cannot tell
+    client.fetched = []
+    assert download_vector_store(client, "vs", str(tmp_path), known, trust_metadata=True)[0][
+        "skipped"] and client.fetched == []
+    known["file-a"] = dict(known["file-a"], created_at=99)  # re-uploaded remotely
+    assert not download_vector_store(client, "vs", str(tmp_path), known,
+                                     trust_metadata=True)[0]["skipped"]
+
+
+def test_same_filename_gets_distinct_local_paths(tmp_path):
+    contents = {"file-a": b"a" * 50000, "file-b": b"b" * 70000}
+    client = FakeClient(contents, filenames={"file-a": "faq.md", "file-b": "faq.md"})
+    reports = download_vector_store(client, "vs", str(tmp_path), max_workers=2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["faq.md", "faq__file-b.md"]
+    assert (tmp_path / "faq__file-b.md").read_bytes() == contents["file-b"]
+    client.fetched = []
+    known = dict((r["id"], r) for r in reports)
+    again = download_vector_store(client, "vs", str(tmp_path), known)
+    assert all(r["skipped"] for r in again) and client.fetched == []
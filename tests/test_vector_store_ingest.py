@@ -0,0 +1,116 @@
+"""Batch vector-store ingestion against an in-memory stand-in client."""
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import vector_store_ingest
+from vector_store_ingest import IngestError, backoff_delay, ingest_files
+
+
+class FakeClient:
+    """Each file completes after `polls_needed` retrieves; names in `fail` fail."""
+
+    def __init__(self, polls_needed=2, fail=(), fail_upload=None, upload_delay=0.0):
+        self.polls_needed = polls_needed
+        self.fail = set(fail)
+        self.fail_upload = fail_upload
+        self.upload_delay = upload_delay
+        self.polls = {}
+        self.names = {}
+        self.lock = threading.Lock()
+        self.files = SimpleNamespace(create=self._upload)
+        vs_files = SimpleNamespace(create=self._attach, retrieve=self._retrieve)
+        self.beta = SimpleNamespace(vector_stores=SimpleNamespace(files=vs_files))
+
+    def _upload(self, file, purpose):
+        if file.name.rsplit("/", 1)[-1] == self.fail_upload:
+            raise IOError("connection reset")
+        time.sleep(self.upload_delay)
+        with self.lock:
+            file_id = "file-%d" % len(self.names)
+            self.names[file_id] = file.name.rsplit("/", 1)[-1]
+        return SimpleNamespace(id=file_id)
+
+    def _attach(self, vector_store_id, file_id):
+        return SimpleNamespace(status="in_progress")
+
+    def _retrieve(self, vector_store_id, file_id):
+        with self.lock:
+            self.polls[file_id] = self.polls.get(file_id, 0) + 1
+            n = self.polls[file_id]
+        if self.names[file_id] in self.fail:
+            return SimpleNamespace(status="failed", last_error=SimpleNamespace(message="bad file"))
+        return SimpleNamespace(status="completed" if n >= self.polls_needed else "in_progress")
+
+
+@pytest.fixture
+def paths(tmp_path):
+    out = []
+    for i in range(6):
+        p = tmp_path / ("DOC-%03d.txt" % (i + 1))
+        p.write_text("section %d" % i)
+        out.append(str(p))
+    return out
+
+
+def test_all_files_polled_in_shared_rounds(paths):
+    client = FakeClient(polls_needed=3)
+    sleeps = []
+    reports = ingest_files(client, "vs_1", paths, sleep=sleeps.append)
+    assert [r["status"] for r in reports] == ["completed"] * 6
+    assert all(r["processing_seconds"] is not None for r in reports)
+    # Three polling rounds for six files, not eighteen sequential waits
+    assert len(sleeps) == 3
+
+
+def test_terminal_failure_fails_fast(paths):
+    client = FakeClient(polls_needed=10, fail={"DOC-002.txt"})
+    with pytest.raises(IngestError) as exc:
+        ingest_files(client, "vs_1", paths, sleep=lambda s: None)
+    assert "DOC-002.txt" in str(exc.value)
+    assert max(client.polls.values()) == 1
+
+
+def test_failed_upload_reports_uploads_still_in_flight(paths):
+    client = FakeClient(fail_upload="DOC-001.txt", upload_delay=0.05)
+    with pytest.raises(IngestError) as exc:
+        ingest_files(client, "vs_1", paths, max_workers=len(paths), sleep=lambda s: None)
+    assert "DOC-001.txt: upload failed" in str(exc.value)
+    assert sorted(r["file_id"] for r in exc.value.reports) == sorted(client.names)
+    assert len(exc.value.reports) == 5
+
+
+def test_timeout(paths):
+    client = FakeClient(polls_needed=10 ** 6)
+    with pytest.raises(IngestError) as exc:
+        ingest_files(client, "vs_1", paths, timeout=0, sleep=lambda s: None)
+    assert exc.value.reports and all("attached_at" not in r for r in exc.value.reports)
+
+
+def test_only_consecutive_poll_errors_abort(paths):
+    client = FakeClient(polls_needed=2 * vector_store_ingest.MAX_POLL_ERRORS + 1)
+    retrieve = client.beta.vector_stores.files.retrieve
+
+    def flaky(vector_store_id, file_id):
+        result = retrieve(vector_store_id, file_id)
+        if client.polls[file_id] % 2:  # every other poll fails
+            raise IOError("rate limited")
+        return result
+    client.beta.vector_stores.files.retrieve = flaky
+    reports = ingest_files(client, "vs_1", paths[:1], sleep=lambda s: None)
+    assert reports[0]["status"] == "completed" and reports[0]["poll_errors"] == 0
+
+
+def test_backoff_is_capped_and_jittered():
+    rng = SimpleNamespace(uniform=lambda lo, hi: hi)
+    assert backoff_delay(0, 1.0, 30.0, rng) == 1.0
+    assert backoff_delay(3, 1.0, 30.0, rng) == 8.0
+    assert backoff_delay(10, 1.0, 30.0, rng) == 30.0
+    assert 0 <= backoff_delay(2) <= 4.0
+
+
+def test_expand_paths_walks_directories(tmp_path, paths):
+    (tmp_path / "notes.bin").write_bytes(b"\0")
+    assert vector_store_ingest.expand_paths([str(tmp_path)]) == sorted(paths)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- concurrent vector-store download.
+
+Exports every file of an OpenAI vector store to a local directory, the
+counterpart of vector_store_ingest.py:
+
+  1. List: one pagination loop (iter_vector_store_files) walks the store
+     100 files per page.
+  2. Download: a thread pool runs files.retrieve for every file, then
+     files.content (bounded parallelism). Files sharing a filename get the
+     file id added to every local name after the first (local_names), so
+     no two downloads write the same path. Content is streamed to a
+     temporary file in CHUNK_SIZE pieces, hashed on the way, and renamed
+     into place, so no file is held in memory and an interrupted run
+     leaves no partial copy behind.
+  3. Skip: a file whose local copy has the remote byte size and the
+     SHA-256 recorded for that file id by the previous export is not
+     downloaded again. With trust_metadata (the incremental mode of
+     extract_assistant_state.py) matching created_at and byte counts are
+     enough and the local copy is not re-hashed.
+
+Each file's report records the download latency, the SHA-256 of the local
+copy and whether it was downloaded, skipped or failed.
+
+Requires: openai>=1.57.0 (any client exposing the same methods works).
+Python 3.8+ compatible.
+"""
+
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+DEFAULT_WORKERS = 8
+PAGE_SIZE = 100
+CHUNK_SIZE = 1 << 16
+
+
+def iter_vector_store_files(client, vector_store_id, page_size=PAGE_SIZE):
+    # type: (Any, str, int) -> Iterator[Any]
+    """Yield every file of a vector store, following has_more/after."""
+    after = None  # type: Optional[str]
+    while True:
+        kwargs = {"limit": page_size}  # type: Dict[str, Any]
+        if after:
+            kwargs["after"] = after
+        page = client.beta.vector_stores.files.list(vector_store_id, **kwargs)
+        for vs_file in page.data:
+            yield vs_file
+        if not page.has_more or not page.data:
+            return
+        after = page.data[-1].id
+
+
+def file_sha256(path):
+    # type: (str) -> str
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def previous_files(manifest_path):
+    # type: (str) -> Dict[str, Dict[str, Any]]
+    """{file id: file entry} of the downloaded files in an earlier
+    vector_store_manifest.json."""
+    try:
+        with io.open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    return dict((info["id"], info) for vs in manifest for info in vs.get("files", [])
+                if info.get("downloaded"))
+
+
+def local_names(file_objs):
+    # type: (List[Any]) -> List[str]
+    """Local filename per file: its own filename, or, when an earlier file
+    in the list already took that name, "<stem>__<file id><ext>"."""
+    taken = set()  # type: set
+    names = []
+    for file_obj in file_objs:
+        name = file_obj.filename
+        if name in taken:
+            stem, ext = os.path.splitext(name)
+            name = "%s__%s%s" % (stem, file_obj.id, ext)
+        taken.add(name)
+        names.append(name)
+    return names
+
+
+def _unchanged(file_obj, local_path, previous, trust_metadata):
+    # type: (Any, str, Optional[Dict[str, Any]], bool) -> bool
+    if not previous or not os.path.isfile(local_path):
+        return False
+    if os.path.basename(previous.get("local_path") or "") != os.path.basename(local_path):
+        return False
+    if os.path.getsize(local_path) != file_obj.bytes:
+        return False
+    if trust_metadata:
+        return (previous.get("created_at") == file_obj.created_at
+                and previous.get("bytes") == file_obj.bytes)
+    return bool(previous.get("sha256")) and file_sha256(local_path) == previous["sha256"]
+
+
+def _stream_content(client, file_id, target):
+    # type: (Any, str, Any) -> str
+    """Write a file's content to target chunk by chunk; return its SHA-256."""
+    h = hashlib.sha256()
+    streaming = getattr(client.files, "with_streaming_response", None)
+    if streaming is not None:
+        with streaming.content(file_id) as response:
+            for block in response.iter_bytes(CHUNK_SIZE):
+                h.update(block)
+                target.write(block)
+    else:
+        for block in client.files.content(file_id).iter_bytes(CHUNK_SIZE):
+            h.update(block)
+            target.write(block)
+    return h.hexdigest()
+
+
+def _download_one(client, vs_file, file_obj, local_path, known, trust_metadata):
+    # type: (Any, Any, Any, str, Dict[str, Dict[str, Any]], bool) -> Dict[str, Any]
+    info = {
+        "id": file_obj.id,
+        "filename": file_obj.filename,
+        "bytes": file_obj.bytes,
+        "purpose": file_obj.purpose,
+        "created_at": file_obj.created_at,
+        "status": vs_file.status,
+        "local_path": local_path,
+    }  # type: Dict[str, Any]
+    start = time.time()
+    previous = known.get(file_obj.id)
+    if _unchanged(file_obj, local_path, previous, trust_metadata):
+        info.update(downloaded=True, skipped=True, sha256=previous.get("sha256"),
+                    download_seconds=0.0)
+        return info
+
+    tmp_path = local_path + ".part"
+    try:
+        with open(tmp_path, "wb") as target:
+            digest = _stream_content(client, file_obj.id, target)
+        written = os.path.getsize(tmp_path)
+        if file_obj.bytes is not None and written != file_obj.bytes:
+            raise IOError("expected %d bytes, got %d" % (file_obj.bytes, written))
+        os.replace(tmp_path, local_path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        info.update(downloaded=False, skipped=False, download_error=str(e))
+        info.pop("local_path")
+        return info
+    info.update(downloaded=True, skipped=False, sha256=digest,
+                download_seconds=round(time.time() - start, 3))
+    return info
+
+
+def download_vector_store(client, vector_store_id, dest_dir, known=None,
+                          max_workers=DEFAULT_WORKERS, on_progress=None, trust_metadata=False):
+    # type: (Any, str, str, Optional[Dict[str, Dict[str, Any]]], int, Optional[Callable[[Dict[str, Any]], None]], bool) -> List[Dict[str, Any]]
+    """Download every file of vector_store_id into dest_dir; return per-file
+    reports in listing order.
+
+    known maps file ids to their entry in the last export (see
+    previous_files); unchanged local copies are skipped. A file that
+    cannot be retrieved at all is reported with an "error" key and no
+    filename.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    known = known or {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        vs_files = list(iter_vector_store_files(client, vector_store_id))
+        retrieved = [pool.submit(client.files.retrieve, f.id) for f in vs_files]
+        reports = [None] * len(vs_files)  # type: List[Any]
+        file_objs = []
+        for n, (vs_file, future) in enumerate(zip(vs_files, retrieved)):
+            try:
+                file_objs.append((n, future.result()))
+            except Exception as e:
+                reports[n] = {"id": vs_file.id, "error": str(e)}
+        names = local_names([file_obj for _, file_obj in file_objs])
+        futures = dict((n, pool.submit(_download_one, client, vs_files[n], file_obj,
+                                       os.path.join(dest_dir, name), known, trust_metadata))
+                       for (n, file_obj), name in zip(file_objs, names))
+        for n, vs_file in enumerate(vs_files):
+            if n in futures:
+                try:
+                    reports[n] = futures[n].result()
+                except Exception as e:
+                    reports[n] = {"id": vs_file.id, "error": str(e)}
+            if on_progress:
+                on_progress(reports[n])
+    return reports
+
+
+def print_download_report(reports, elapsed):
+    # type: (List[Dict[str, Any]], float) -> None
+    fetched = [r for r in reports if r.get("downloaded") and not r.get("skipped")]
+    skipped = [r for r in reports if r.get("skipped")]
+    failed = [r for r in reports if not r.get("downloaded")]
+    print("  %d files | %d downloaded (%s bytes) | %d unchanged | %d failed | %.1fs" % (
+        len(reports), len(fetched), "{:,}".format(sum(r["bytes"] or 0 for r in fetched)),
+        len(skipped), len(failed), elapsed))
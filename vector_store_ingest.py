@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+MW Knowledge Assistant -- batch vector-store ingestion.
+
+Uploads many files to an OpenAI vector store concurrently, then polls all
+of them together until every file is processed:
+
+  1. Upload + attach: a thread pool runs files.create and
+     vector_stores.files.create for each path (bounded parallelism).
+  2. Poll: each round retrieves every still-pending file concurrently,
+     then sleeps with exponential backoff and full jitter before the next
+     round, so a 42-document refresh is one polling loop, not 42.
+  3. Fail fast: an upload error, a terminal status ("failed"/"cancelled"),
+     MAX_POLL_ERRORS consecutive poll errors on one file, or the overall
+     timeout raises
+     IngestError at once.
+
+Each file's report records upload latency and processing latency (attach
+to "completed") so slow ingestion shows up per document.
+
+Requires: openai>=1.57.0 (any client exposing the same methods works).
+Python 3.8+ compatible.
+"""
+
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+TERMINAL_OK = "completed"
+TERMINAL_ERRORS = ("failed", "cancelled")
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT_SECONDS = 600
+DEFAULT_INITIAL_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+MAX_POLL_ERRORS = 5
+INGEST_EXTENSIONS = (".txt", ".md", ".pdf", ".json")
+
+
+class IngestError(Exception):
+    """Raised when a file fails processing or the batch times out."""
+
+    def __init__(self, message, reports):
+        # type: (str, List[Dict[str, Any]]) -> None
+        Exception.__init__(self, message)
+        self.reports = reports
+
+
+def expand_paths(paths):
+    # type: (Iterable[str]) -> List[str]
+    """Expand directories (recursively) into ingestible files, sorted."""
+    out = []  # type: List[str]
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for fname in sorted(files):
+                    if fname.endswith(INGEST_EXTENSIONS):
+                        out.append(os.path.join(root, fname))
+        else:
+            out.append(path)
+    return out
+
+
+def backoff_delay(attempt, initial=DEFAULT_INITIAL_DELAY, maximum=DEFAULT_MAX_DELAY, rng=random):
+    # type: (int, float, float, Any) -> float
+    """Exponential backoff with full jitter: uniform(0, min(max, initial * 2**n))."""
+    cap = min(maximum, initial * (2 ** attempt))
+    return rng.uniform(0, cap)
+
+
+def _upload_one(client, vector_store_id, path):
+    # type: (Any, str, str) -> Dict[str, Any]
+    report = {
+        "path": path,
+        "filename": os.path.basename(path),
+        "bytes": os.path.getsize(path),
+        "file_id": None,
+        "status": "uploading",
+        "upload_seconds": 0.0,
+        "processing_seconds": None,
+        "poll_errors": 0,
+        "error": None,
+    }  # type: Dict[str, Any]
+    start = time.time()
+    with open(path, "rb") as f:
+        uploaded = client.files.create(file=f, purpose="assistants")
+    report["file_id"] = uploaded.id
+    vs_file = client.beta.vector_stores.files.create(
+        vector_store_id=vector_store_id,
+        file_id=uploaded.id,
+    )
+    report["attached_at"] = time.time()
+    report["upload_seconds"] = round(report["attached_at"] - start, 2)
+    report["status"] = vs_file.status
+    if vs_file.status == TERMINAL_OK:
+        report["processing_seconds"] = 0.0
+    return report
+
+
+def _poll_one(client, vector_store_id, report):
+    # type: (Any, str, Dict[str, Any]) -> Dict[str, Any]
+    try:
+        vs_file = client.beta.vector_stores.files.retrieve(
+            vector_store_id=vector_store_id,
+            file_id=report["file_id"],
+        )
+    except Exception as e:  # transient 404 right after attach, rate limits
+        report["poll_errors"] += 1
+        report["error"] = str(e)
+        return report
+    report["status"] = vs_file.status
+    report["error"] = None
+    report["poll_errors"] = 0
+    if vs_file.status in TERMINAL_ERRORS:
+        last_error = getattr(vs_file, "last_error", None)
+        report["error"] = getattr(last_error, "message", None) or vs_file.status
+    if vs_file.status == TERMINAL_OK or vs_file.status in TERMINAL_ERRORS:
+        report["processing_seconds"] = round(time.time() - report["attached_at"], 2)
+    return report
+
+
+def ingest_files(client, vector_store_id, paths, max_workers=DEFAULT_WORKERS,
+                 timeout=DEFAULT_TIMEOUT_SECONDS, initial_delay=DEFAULT_INITIAL_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY, sleep=time.sleep, on_progress=None):
+    # type: (Any, str, List[str], int, float, float, float, Callable[[float], None], Optional[Callable[[Dict[str, Any]], None]]) -> List[Dict[str, Any]]
+    """Upload and index paths into vector_store_id; return per-file reports.
+
+    Raises IngestError on the first terminal failure or on timeout; the
+    exception carries the reports gathered so far, including every upload
+    that finished after a failed one (so its file_id can be cleaned up).
+    """
+    reports = []  # type: List[Dict[str, Any]]
+    try:
+        _ingest(client, vector_store_id, paths, reports, max_workers, timeout, initial_delay,
+                max_delay, sleep, on_progress)
+    finally:
+        for r in reports:
+            r.pop("attached_at", None)
+    return reports
+
+
+def _ingest(client, vector_store_id, paths, reports, max_workers, timeout, initial_delay,
+            max_delay, sleep, on_progress):
+    # type: (Any, str, List[str], List[Dict[str, Any]], int, float, float, float, Callable[[float], None], Optional[Callable[[Dict[str, Any]], None]]) -> None
+    deadline = time.time() + timeout
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_upload_one, client, vector_store_id, p) for p in paths]
+        failed = None  # type: Optional[str]
+        for path, future in zip(paths, futures):
+            if future.cancelled():
+                continue
+            try:
+                reports.append(future.result())
+            except Exception as e:
+                if failed is None:
+                    failed = "%s: upload failed (%s)" % (os.path.basename(path), e)
+                    for other in futures:
+                        other.cancel()
+        if failed is not None:
+            # Uploads already running when the first one failed still finish;
+            # their reports carry the file ids the caller must clean up.
+            raise IngestError(failed, reports)
+
+        attempt = 0
+        while True:
+            for r in reports:
+                if r["status"] in TERMINAL_ERRORS:
+                    raise IngestError("%s: %s" % (r["filename"], r["error"]), reports)
+                if r["poll_errors"] >= MAX_POLL_ERRORS:
+                    raise IngestError("%s: %d consecutive poll errors (%s)" % (
+                        r["filename"], r["poll_errors"], r["error"]), reports)
+            pending = [r for r in reports if r["status"] != TERMINAL_OK]
+            if not pending:
+                break
+            if time.time() >= deadline:
+                raise IngestError("Timed out after %ds with %d files pending: %s" % (
+                    timeout, len(pending), ", ".join(r["filename"] for r in pending[:5])),
+                    reports)
+            sleep(min(backoff_delay(attempt, initial_delay, max_delay),
+                      max(0.0, deadline - time.time())))
+            attempt += 1
+            for r in pool.map(lambda r: _poll_one(client, vector_store_id, r), pending):
+                if r["status"] == TERMINAL_OK and on_progress:
+                    on_progress(r)
+
+
+def print_ingest_report(reports):
+    # type: (List[Dict[str, Any]]) -> None
+    for r in reports:
+        print("    %-48s %-10s upload %5.1fs | processing %s" % (
+            r["filename"][:48], r["status"], r["upload_seconds"],
+            "%.1fs" % r["processing_seconds"] if r["processing_seconds"] is not None else "-"))
+    done = [r["processing_seconds"] for r in reports if r["processing_seconds"] is not None]
+    if done:
+        print("  %d files | slowest processing %.1fs | total bytes %s" % (
+            len(reports), max(done), "{:,}".format(sum(r["bytes"] for r in reports))))
@@ -1,15 +1,26 @@
 #!/usr/bin/env python3
 """
 Independent verification script for Reliance Infrastructure Canon.
-Verifies SHA3-512 hashes AND Ed25519 signatures for all 39 documents.
+Verifies SHA3-512 hashes AND Ed25519 signatures for all 39 documents,
+and the OpenTimestamps proof of master-index.json (offline).
+
+The timestamp stage replays master-index.json.ots against the SHA-256 of
+master-index.json and checks Bitcoin attestations against the cached
+block headers in verification/bitcoin-headers.json (height -> {"hash",
+"merkleroot", "time"}, e.g. from `bitcoin-cli getblockheader`). No network
+access is needed. A proof that contradicts a cached header fails the
+verdict; a proof that is still pending, whose header is not cached, or
+that was made for an earlier master-index.json is reported but only fails
+the verdict with --require-timestamp.
 
 Any institution can run this to prove document authenticity without
 relying on the issuing authority.
 
 Requirements: pip install cryptography
-Usage: python verify-canon.py
+Usage: python verify-canon.py [--require-timestamp]
 """
 
+import argparse
 import hashlib
 import json
 import os
@@ -119,7 +130,75 @@ def verify_signatures(repo_root):
     print(f"\nSignature verification: {verified} passed, {errors} failed.")
     return errors == 0
 
+def verify_timestamp(repo_root):
+    """Verify master-index.json.ots offline; returns the timestamp status."""
+    ots_path = repo_root / "verification" / "master-index.json.ots"
+    index_path = repo_root / "verification" / "master-index.json"
+    records_path = repo_root / "verification" / "blockchain-records.json"
+    headers_path = repo_root / "verification" / "bitcoin-headers.json"
+
+    if not ots_path.exists() or not index_path.exists():
+        print("\nWARNING: master-index.json.ots not found. Skipping timestamp verification.")
+        return None
+
+    sys.path.insert(0, str(repo_root.resolve()))
+    try:
+        from canon_attestation import OTSError, load_headers, parse_ots, verify_ots
+    except ImportError:
+        print("\nSkipping timestamp verification (canon_attestation.py not found)")
+        return None
+
+    print("\nVerifying OpenTimestamps proof of master-index.json (offline)...\n")
+    with open(index_path, "rb") as f:
+        index_bytes = f.read()
+    with open(ots_path, "rb") as f:
+        proof_bytes = f.read()
+    digest = hashlib.sha256(index_bytes).digest()
+
+    if records_path.exists():
+        with open(records_path) as f:
+            attested = json.load(f).get("attested_hash", "")
+        current = hashlib.sha3_512(index_bytes).hexdigest()
+        state = "matches" if attested == current else "does NOT match"
+        print(f"  blockchain-records.json attested_hash {state} master-index.json")
+
+    try:
+        proof = parse_ots(proof_bytes)
+        if proof["digest"] != digest:
+            print(f"  STALE  proof is for {proof['digest'].hex()[:16]}..., "
+                  f"master-index.json is {digest.hex()[:16]}...")
+            print("         Re-stamp: ots stamp verification/master-index.json")
+            return "STALE"
+        verdict = verify_ots(proof_bytes, digest, load_headers(str(headers_path)))
+    except (OTSError, ValueError) as e:
+        print(f"  FAIL  {ots_path.name} ({e})")
+        return "FAILED"
+
+    for a in verdict["attestations"]:
+        if a["attestation"] == "pending":
+            print(f"  PENDING   {a['uri']}")
+        elif a["attestation"] == "bitcoin":
+            label = {True: "PASS", False: "FAIL", None: "UNCACHED"}[a.get("verified")]
+            print(f"  {label:<9} Bitcoin block {a['height']}")
+        else:
+            print(f"  SKIP      {a['attestation']} attestation")
+    kinds = set(a["attestation"] for a in verdict["attestations"])
+    if kinds == {"pending"}:
+        print("\n  Only calendar attestations so far; once the Bitcoin block confirms run:")
+        print("    ots upgrade verification/master-index.json.ots")
+    if any(a.get("verified") is None for a in verdict["attestations"]
+           if a["attestation"] == "bitcoin") and not headers_path.exists():
+        print("\n  verification/bitcoin-headers.json is not shipped; cache the attested block")
+        print("  from your own node (bitcoin-cli getblockheader <hash>) to verify offline.")
+    print(f"\nTimestamp verification: {verdict['status']}")
+    return verdict["status"].upper()
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Verify the Reliance Infrastructure Canon")
+    parser.add_argument("--require-timestamp", action="store_true",
+                        help="Fail unless the master-index.json timestamp is verified")
+    args = parser.parse_args()
     repo_root = Path(".")
     
     print("=" * 60)
@@ -130,6 +209,8 @@ def main():
     
     hash_ok = verify_hashes(repo_root)
     sig_ok = verify_signatures(repo_root)
+    ts_status = verify_timestamp(repo_root)
+    ts_ok = ts_status != "FAILED" and (not args.require_timestamp or ts_status == "VERIFIED")
     
     print("\n" + "=" * 60)
     print("RESULTS")
@@ -139,16 +220,19 @@ def main():
         print(f"  Ed25519 Signatures:  {'PASS' if sig_ok else 'FAIL'}")
     else:
         print(f"  Ed25519 Signatures:  SKIPPED")
-    
-    if hash_ok and (sig_ok is None or sig_ok):
+    print(f"  OTS Timestamp:       {ts_status or 'SKIPPED'}")
+
+    if hash_ok and (sig_ok is None or sig_ok) and ts_ok:
         print("\n  VERDICT: AUTHENTIC")
+        if ts_status != "VERIFIED":
+            print("  (timestamp not independently confirmed: %s)" % (ts_status or "SKIPPED"))
     else:
         print("\n  VERDICT: INTEGRITY COMPROMISED — DO NOT RELY")
 
     print("=" * 60)
 
     # Exit with proper code for CI pipelines
-    if not hash_ok or (sig_ok is not None and not sig_ok):
+    if not hash_ok or (sig_ok is not None and not sig_ok) or not ts_ok:
         sys.exit(1)
 
 if __name__ == "__main__":
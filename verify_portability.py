@@ -2,14 +2,39 @@
 """
 PHASE 4: PORTABILITY VERIFICATION
 Proves all extracted state is complete and migration-ready.
+
+With --benchmark the golden QA pairs are also replayed through every
+configured backend (portability_replay.py) and the answer-quality parity,
+latency and throughput of each platform are reported next to the
+scorecard. Replay results are not scored: the offline backend is a
+deterministic stand-in and a backend whose SDK is not installed here says
+nothing about the extracted state.
+
+Usage:
+    python verify_portability.py
+    python verify_portability.py --benchmark [--backends offline,anthropic] [--concurrency 8]
 """
+import argparse
+import glob
 import json
 import io
 import os
 from datetime import datetime
 
+from golden_qa_store import GoldenQAStore
+
 OUTPUT_DIR = "assistant_portability"
 
+parser = argparse.ArgumentParser(description="Verify the extracted assistant state")
+parser.add_argument("--benchmark", action="store_true",
+                    help="Replay the golden QA pairs through each configured backend")
+parser.add_argument("--backends", help="Comma-separated backends (default: offline, plus "
+                                       "anthropic when ANTHROPIC_API_KEY is set)")
+parser.add_argument("--concurrency", type=int, default=4, help="Replay questions in flight")
+parser.add_argument("--limit", type=int, default=0,
+                    help="Replay a fixed random sample of N golden pairs")
+args = parser.parse_args()
+
 print("=" * 60)
 print("PHASE 4: PORTABILITY VERIFICATION")
 print("=" * 60)
@@ -56,6 +81,11 @@ if os.path.exists(pairs_path):
 else:
     print("  WARNING: No golden QA pairs found")
 
+golden = GoldenQAStore(os.path.join(OUTPUT_DIR, "golden_qa_pairs.jsonl"))
+if len(golden):
+    print("  Golden store: %d unique questions, %d target documents indexed" % (
+        len(golden), len(golden.targets)))
+
 # ─────────────────────────────────────────────
 # 4C. Verify vector store files downloaded
 # ─────────────────────────────────────────────
@@ -78,20 +108,53 @@ else:
 # ─────────────────────────────────────────────
 print("\n[4D] Verifying migration scripts...")
 migrate_script = os.path.join(OUTPUT_DIR, "migration_configs", "anthropic_migrate.py")
-if os.path.exists(migrate_script):
+if not os.path.exists(migrate_script):
+    print("  FAIL: Migration script not found")
+for script in sorted(glob.glob(os.path.join(OUTPUT_DIR, "migration_configs", "*.py"))):
     try:
-        with io.open(migrate_script, encoding="utf-8") as f:
-            compile(f.read(), migrate_script, "exec")
-        print("  PASS: anthropic_migrate.py compiles without errors")
+        with io.open(script, encoding="utf-8") as f:
+            compile(f.read(), script, "exec")
+        print("  PASS: %s compiles without errors" % os.path.basename(script))
     except SyntaxError as e:
         print("  FAIL: Syntax error in migration script: %s" % e)
-else:
-    print("  FAIL: Migration script not found")
+
+from migration_generator import load_platforms, serving_settings
+for platform in load_platforms():
+    try:
+        serving_settings(os.path.join(OUTPUT_DIR, "migration_configs", platform["output"]))
+        print("  PASS: %s instructions reference resolves" % platform["output"])
+    except (IOError, OSError, KeyError, ValueError) as e:
+        print("  FAIL: %s: %s" % (platform["output"], e))
 
 # ─────────────────────────────────────────────
-# 4E. Generate portability score
+# 4E. Replay golden QA pairs through migrated backends
 # ─────────────────────────────────────────────
-print("\n[4E] Calculating portability score...")
+replay = {}
+if args.benchmark:
+    print("\n[4E] Replaying golden QA pairs through migrated backends...")
+    from canon_bm25 import load_or_build
+    from canon_rag import load_instructions
+    from portability_replay import configured_backends, print_replay_report, run_replay
+
+    if len(golden):
+        replay_pairs = (golden.sample(args.limit, seed=0) if args.limit
+                        else list(golden.iter_pairs()))
+    else:
+        replay_pairs = pairs[:args.limit] if args.limit else pairs
+    backends = args.backends.split(",") if args.backends else configured_backends()
+    replay = run_replay(backends, replay_pairs, load_or_build(), load_instructions(),
+                        args.concurrency)
+    print_replay_report(replay)
+    replay_path = os.path.join(OUTPUT_DIR, "analytics", "replay_benchmark.json")
+    with io.open(replay_path, "w", encoding="utf-8") as f:
+        json.dump({"generated": datetime.now().isoformat(), "platforms": replay}, f, indent=2,
+                  ensure_ascii=False)
+    print("  -> Per-question results: %s" % replay_path)
+
+# ─────────────────────────────────────────────
+# 4F. Generate portability score
+# ─────────────────────────────────────────────
+print("\n[4F] Calculating portability score...")
 
 scores = {
     "state_extraction": 100 if not missing else max(0, 100 - len(missing) * 10),
@@ -117,9 +180,15 @@ for dimension, score in scores.items():
 print("=" * 60)
 print("  TOTAL PORTABILITY SCORE: %d/100" % total)
 print("=" * 60)
+for name, row in sorted(replay.items()):
+    if "error" in row:
+        print("  [ REPLAY] %s: not run (%s)" % (name, row["error"][:60]))
+    else:
+        print("  [ REPLAY] %s: %.1f%% golden-score parity (not scored)" % (
+            name, row["quality"]["parity_pct"]))
 
 # ─────────────────────────────────────────────
-# 4F. Generate final status
+# 4G. Generate final status
 # ─────────────────────────────────────────────
 
 final_status = {
@@ -127,6 +196,8 @@ final_status = {
     "portability_score": total,
     "scores": scores,
     "missing_files": missing,
+    "replay": dict((name, dict((k, v) for k, v in row.items() if k != "results"))
+                   for name, row in replay.items()),
     "vendor_lock_in_eliminated": total == 100,
     "migration_ready": {
         "anthropic": total >= 90,